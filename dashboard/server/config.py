@@ -14,7 +14,10 @@ class ServerConfig:
     status_interval_sec: float = 1.0
     spectrum_points: int = 256
     spectrum_chunk_interval: int = 20
+    broadcast_window_sec: float = 0.05
     database_path: str = "hab_data.db"
+    db_batch_size: int = 100
+    db_flush_interval_sec: float = 0.25
 
 
 @dataclass
@@ -27,3 +30,8 @@ class ReceiverConfig:
     gain_vga: int = 30
     gain_amp: int = 0
     serial: str | None = None
+    # packet_codec profile the payload transmits with (r1/2, r3/4-il, ...)
+    codec_profile: str = "r1/2"
+    # Filled into binary telemetry records, which don't carry them
+    balloon_id: str | None = None
+    mission_id: str | None = None
@@ -13,6 +13,7 @@ Usage:
 from __future__ import annotations
 
 import sys
+from contextlib import asynccontextmanager
 from pathlib import Path
 
 HAB_ROOT = Path(__file__).resolve().parent.parent.parent
@@ -34,10 +35,23 @@ from routes.ws import create_ws_router
 def create_app() -> FastAPI:
     server_config = ServerConfig()
     receiver_config = ReceiverConfig()
-    ws_manager = WebSocketManager()
-    receiver_manager = ReceiverManager(ws_manager, receiver_config, db_path=server_config.database_path)
+    ws_manager = WebSocketManager(batch_window_sec=server_config.broadcast_window_sec)
+    receiver_manager = ReceiverManager(
+        ws_manager,
+        receiver_config,
+        db_path=server_config.database_path,
+        db_batch_size=server_config.db_batch_size,
+        db_flush_interval_sec=server_config.db_flush_interval_sec,
+    )
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        yield
+        # Commit queued packets and send queued frames before exiting
+        await receiver_manager.shutdown()
+        await ws_manager.close()
 
-    app = FastAPI(title="HAB Receiver Server")
+    app = FastAPI(title="HAB Receiver Server", lifespan=lifespan)
 
     app.add_middleware(
         CORSMiddleware,
@@ -3,8 +3,8 @@
 
 from __future__ import annotations
 from enum import Enum
-from typing import Literal
-from pydantic import BaseModel
+from typing import Annotated, Literal, Optional, Union
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter
 
 
 class AccelData(BaseModel):
@@ -68,6 +68,43 @@ class PowerPayload(BaseModel):
     bat_temp_c: float
 
 
+class PacketEnvelope(BaseModel):
+    """Header fields every telemetry packet carries; unknown fields are kept."""
+    model_config = ConfigDict(extra="allow")
+
+    seq: int
+    v: Optional[int] = None
+    id: Optional[str] = None
+    mid: Optional[str] = None
+    t: Optional[str] = None
+
+
+class EnvironmentPacket(PacketEnvelope, EnvironmentPayload):
+    pass
+
+
+class MotionPacket(PacketEnvelope, MotionPayload):
+    pass
+
+
+class PositionPacket(PacketEnvelope, PositionPayload):
+    pass
+
+
+class PowerPacket(PacketEnvelope, PowerPayload):
+    pass
+
+
+TelemetryPacket = Annotated[
+    Union[EnvironmentPacket, MotionPacket, PositionPacket, PowerPacket],
+    Field(discriminator="type"),
+]
+
+# Built once at import — validating through these skips per-request schema setup
+TELEMETRY_PACKET_ADAPTER = TypeAdapter(TelemetryPacket)
+TELEMETRY_BATCH_ADAPTER = TypeAdapter(list[TelemetryPacket])
+
+
 class ReceiverState(str, Enum):
     IDLE = "idle"
     STARTING = "starting"
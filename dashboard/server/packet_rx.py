@@ -4,8 +4,9 @@
 ReceiverWorker: synchronous SDR manager + signal processing pipeline.
 AsyncPacketReceiver: async bridge using run_in_executor for SDR I/O.
 
-The packet_codec import is lazy (function-level) so tests can import
-without the rf/packet/src/ directory on PYTHONPATH.
+The rf/packet/src imports (packet_codec, telemetry_codec, link_constants)
+are lazy (function-level) so tests can import without the rf/packet/src/
+directory on PYTHONPATH.
 """
 
 from __future__ import annotations
@@ -78,8 +79,8 @@ class ReceiverWorker:
         taps = taps / np.sqrt(np.sum(taps**2))
         self._rrc_taps = taps.astype(np.float32)
 
-    def read_one(self) -> dict | None:
-        """Read one chunk from the SDR and attempt to decode a packet."""
+    def read_one(self) -> list[dict] | None:
+        """Read one chunk from the SDR and attempt to decode a frame."""
         import SoapySDR
         from SoapySDR import SOAPY_SDR_RX
 
@@ -98,10 +99,12 @@ class ReceiverWorker:
         self._raw_iq = samples
         return self._decode(samples)
 
-    def _decode(self, samples: np.ndarray) -> dict | None:
-        """Decode IQ samples into a packet dict (or None if no valid packet)."""
+    def _decode(self, samples: np.ndarray) -> list[dict] | None:
+        """Decode IQ samples into the frame's packet dicts (or None if no valid frame)."""
         # Lazy import — test isolation when rf/packet/src/ is not on path
         from packet_codec import packet_decode
+        from telemetry_codec import decode_payload
+        from link_constants import SYNC_BPSK
 
         samples = samples - np.mean(samples)
         max_val: float = float(np.max(np.abs(samples)))
@@ -116,14 +119,7 @@ class ReceiverWorker:
         filtered = filtered / denom_value
 
         sps = self.config.sps
-        sync_word_bits = [
-            1, 0, 1, 0, 1, 1, 0, 0,
-            1, 1, 0, 1, 1, 1, 0, 1,
-            1, 0, 1, 0, 0, 1, 0, 0,
-            1, 1, 1, 0, 0, 0, 1, 0,
-        ]
-        sync_symbols = np.array([1 if b else -1 for b in sync_word_bits], dtype=np.float32)
-        corr = np.abs(np.correlate(np.real(filtered), sync_symbols, mode="valid"))
+        corr = np.abs(np.correlate(np.real(filtered), SYNC_BPSK, mode="valid"))
         threshold: float = float(np.mean(corr) + 2.5 * np.std(corr))
         peaks = np.where(corr > threshold)[0]
 
@@ -140,11 +136,10 @@ class ReceiverWorker:
             for j in range(8):
                 b = (b << 1) | bits[i + j]
             byte_list.append(b)
-        payload = packet_decode(bytes(byte_list))
+        payload = packet_decode(bytes(byte_list), profile=self.config.codec_profile)
         if payload is None:
             return None
-        import json
-        return json.loads(payload.decode("utf-8"))
+        return decode_payload(payload, self.config.balloon_id, self.config.mission_id)
 
     def compute_spectrum(self, points: int = 256) -> list[float] | None:
         """Compute power spectrum from latest raw IQ samples."""
@@ -218,8 +213,9 @@ class AsyncPacketReceiver:
                 result = await loop.run_in_executor(
                     self._executor, self._worker.read_one
                 )
-                if result is not None:
-                    await self._on_packet(result)
+                # One frame may carry several readings
+                for packet in result or ():
+                    await self._on_packet(packet)
 
                 chunk_count += 1
                 if chunk_count % self._spectrum_interval == 0:
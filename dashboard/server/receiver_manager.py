@@ -8,10 +8,32 @@ import json
 import sqlite3
 import time
 from collections import deque
-from datetime import datetime, timezone
 
 from models import ReceiverState, SpectrumFrame
+from rollups import RollupEngine
+from serialization import dumps
+from trajectory import Trajectory, tolerance_for_zoom
 from config import ReceiverConfig
+from storage import (
+    PacketWriter,
+    create_flight,
+    fetch_flights,
+    fetch_packets,
+    fetch_positions,
+    iter_flight_packets,
+    iter_packets,
+    last_packet,
+    latest_flight,
+    open_database,
+    position_coords,
+)
+
+# A payload seq that steps back by more than this starts a new flight
+SEQ_REORDER_WINDOW = 16
+# Counter widths whose rollover is a wrap, not a reboot
+SEQ_WRAP_BITS = (8, 16, 32)
+# Packets per telemetry_batch frame in a reconnect backlog
+SYNC_CHUNK = 500
 
 
 class InvalidStateError(Exception):
@@ -20,7 +42,8 @@ class InvalidStateError(Exception):
 
 
 class ReceiverManager:
-    def __init__(self, ws_manager, config: ReceiverConfig, db_path: str | None = None):
+    def __init__(self, ws_manager, config: ReceiverConfig, db_path: str | None = None,
+                 db_batch_size: int = 100, db_flush_interval_sec: float = 0.25):
         self._ws = ws_manager
         self._config = config
         self._state = ReceiverState.IDLE
@@ -34,17 +57,23 @@ class ReceiverManager:
         self._start_time: float | None = None
         self._db_path = db_path
         self._db_conn: sqlite3.Connection | None = None
+        self._writer: PacketWriter | None = None
+        self._rx_seq = 0
+        self._flight_id: int | None = None
+        self._last_seq: int | None = None
+        self._last_mission: str | None = None
+        self._trajectory = Trajectory()
+        self._rollups = RollupEngine()
         if db_path:
-            self._db_conn = sqlite3.connect(str(db_path))
-            self._db_conn.execute(
-                "CREATE TABLE IF NOT EXISTS packets ("
-                "  seq INTEGER PRIMARY KEY,"
-                "  received_at TEXT NOT NULL,"
-                "  type TEXT NOT NULL,"
-                "  payload TEXT NOT NULL"
-                ")"
+            # The writer owns packet inserts; this connection serves reads
+            # and the occasional flights row
+            self._writer = PacketWriter(
+                db_path,
+                batch_size=db_batch_size,
+                flush_interval_sec=db_flush_interval_sec,
             )
-            self._db_conn.commit()
+            self._db_conn = open_database(db_path)
+            self._resume_from_database()
 
     @property
     def state(self) -> ReceiverState:
@@ -54,6 +83,10 @@ class ReceiverManager:
     def packet_buffer(self) -> list[dict]:
         return list(self._packet_buffer)
 
+    @property
+    def flight_id(self) -> int | None:
+        return self._flight_id
+
     @property
     def uptime_sec(self) -> float:
         if self._start_time is None:
@@ -82,7 +115,7 @@ class ReceiverManager:
             while self._state == ReceiverState.RUNNING:
                 await asyncio.sleep(2)
                 if self._state == ReceiverState.RUNNING:
-                    await self._ws.broadcast_status(self._build_status())
+                    self._ws.queue_status(self._build_status())
         except asyncio.CancelledError:
             pass
 
@@ -113,21 +146,179 @@ class ReceiverManager:
         """Receive and broadcast a telemetry packet from external sources.
 
         Called by the REST API when an external client (e.g. balloon-sim.py)
-        POSTs a packet.  Appends to the packet buffer, updates counters,
-        and broadcasts to all connected WebSocket clients.
+        POSTs a packet.  Stamps it with the server-side ``rx_seq`` and the
+        current ``flight_id`` (starting a new flight if the payload's seq
+        restarted), appends to the packet buffer, updates counters, and
+        queues the packet for the next coalesced WebSocket frame.
         """
+        await self.ingest_packets([packet])
+
+    async def ingest_packets(self, packets: list[dict]) -> list[dict]:
+        """Ingest several packets at once, in order.
+
+        Same per-packet handling as ``ingest_packet``, but the whole list is
+        handed to the writer as one transaction and goes out in one
+        coalesced WebSocket frame.  Returns the stamped packets.
+        """
+        stamped = [self._stamp(packet) for packet in packets]
+        self._packets_total += len(stamped)
+        self._packets_valid += len(stamped)
+        for packet in stamped:
+            self._ws.queue_telemetry(packet)
+        self._save_packets(stamped)
+        return stamped
+
+    def _stamp(self, packet: dict) -> dict:
+        seq = packet.get("seq")
+        mission = packet.get("mid")
+        reason = self._flight_break(seq, mission)
+        if reason is not None:
+            self.new_flight(reason)
+        if isinstance(seq, int):
+            self._last_seq = seq
+        if mission is not None:
+            self._last_mission = mission
+        self._rx_seq += 1
+        packet = {**packet, "rx_seq": self._rx_seq, "flight_id": self._flight_id}
+        if packet.get("type") == "position":
+            # A fix without finite coordinates would poison the simplified levels
+            coords = position_coords(packet)
+            if coords is not None:
+                self._trajectory.add(self._rx_seq, *coords)
+        else:
+            self._rollups.add(packet, time.time())
         self._packet_buffer.append(packet)
-        self._packets_total += 1
-        self._packets_valid += 1
-        await self._ws.broadcast({"type": "telemetry", "data": packet})
-        self._save_packet(packet)
+        return packet
+
+    def new_flight(self, reason: str = "manual") -> int:
+        """Start a new flight; later packets and queries are scoped to it."""
+        if self._db_conn is not None:
+            self._flight_id = create_flight(self._db_conn, reason)
+        else:
+            self._flight_id = (self._flight_id or 0) + 1
+        self._last_seq = None
+        self._last_mission = None
+        self._packet_buffer.clear()
+        self._trajectory.clear()
+        self._rollups.clear()
+        return self._flight_id
+
+    def flights(self) -> list[dict]:
+        """Logged flights, newest first (empty without a database)."""
+        if self._db_conn is None:
+            return []
+        return fetch_flights(self._db_conn)
+
+    def sync_frames(self, last_seq: int) -> tuple[list[dict], int]:
+        """Frames that bring a client reconnecting at rx_seq *last_seq* up to date.
+
+        Returns ``(frames, floor_seq)`` for ``WebSocketManager.connect``: the
+        current status, a ``sync`` header, then every buffered packet newer
+        than *last_seq* in ``telemetry_batch`` frames.  ``complete`` is false
+        when the buffer no longer reaches back to *last_seq* (or the client
+        is ahead of this server), in which case the client should re-fetch
+        over REST.
+        """
+        backlog = [p for p in self._packet_buffer if p["rx_seq"] > last_seq]
+        first = self._packet_buffer[0]["rx_seq"] if self._packet_buffer else self._rx_seq + 1
+        frames = [
+            {"type": "status", "data": self._build_status()},
+            {
+                "type": "sync",
+                "data": {
+                    "last_seq": last_seq,
+                    "rx_seq": self._rx_seq,
+                    "flight_id": self._flight_id,
+                    "count": len(backlog),
+                    "complete": first - 1 <= last_seq <= self._rx_seq,
+                },
+            },
+        ]
+        for i in range(0, len(backlog), SYNC_CHUNK):
+            frames.append({"type": "telemetry_batch", "data": backlog[i:i + SYNC_CHUNK]})
+        return frames, self._rx_seq
+
+    def packets(self, since: int = 0, until: int | None = None,
+                pkt_type: str | None = None, limit: int = 1000,
+                flight_id: int | None = None) -> list[dict]:
+        """One page of logged packets with ``since < rx_seq <= until``.
+
+        Reads the database when there is one (the newest packets appear once
+        the writer commits them); otherwise filters the in-memory buffer.
+        """
+        if self._db_conn is None:
+            return _filter_buffer(self._packet_buffer, since, until, pkt_type)[:limit]
+        if flight_id is None:
+            flight_id = self._flight_id
+        rows = fetch_packets(self._db_conn, flight_id, since, until, pkt_type, limit)
+        return [json.loads(payload) for _, payload in rows]
+
+    def iter_packet_lines(self, since: int = 0, until: int | None = None,
+                          pkt_type: str | None = None, limit: int | None = None,
+                          flight_id: int | None = None):
+        """Yield matching packets as NDJSON lines, one page at a time."""
+        if self._db_conn is None:
+            packets = _filter_buffer(self._packet_buffer, since, until, pkt_type)
+            for packet in packets[:limit]:
+                yield dumps(packet) + "\n"
+            return
+        if flight_id is None:
+            flight_id = self._flight_id
+        for payload in iter_packets(self._db_path, flight_id, since, until, pkt_type, limit):
+            yield payload + "\n"
+
+    def trajectory(self, zoom: float | None = None, tolerance_m: float | None = None) -> dict:
+        """Simplified track of the current flight for a map *zoom* level
+        (or an explicit *tolerance_m*); finest level when neither is given."""
+        if tolerance_m is None and zoom is not None:
+            last = self._trajectory.last_point
+            tolerance_m = tolerance_for_zoom(zoom, last[1] if last else 0.0)
+        return self._trajectory.query(tolerance_m or 0.0)
+
+    def rollups(self, pkt_type: str, resolution: int, since: float | None = None,
+                until: float | None = None, fields: set[str] | None = None) -> list[dict]:
+        """Min/max/mean buckets of the current flight's *pkt_type* packets.
+
+        Raises KeyError for a type or resolution that is not rolled up.
+        """
+        return self._rollups.query(pkt_type, resolution, since, until, fields)
+
+    @property
+    def rollup_resolutions(self) -> list[int]:
+        return self._rollups.resolutions
+
+    @property
+    def rollup_types(self) -> tuple[str, ...]:
+        return self._rollups.types
+
+    def positions(self, since: int = 0, limit: int = 5000,
+                  flight_id: int | None = None) -> list[dict]:
+        """Logged position fixes of one flight (default: the current one)
+        with rx_seq > *since*, for map trails.  Empty without a database."""
+        if self._db_conn is None:
+            return []
+        if flight_id is None:
+            flight_id = self._flight_id
+        return fetch_positions(self._db_conn, flight_id, since=since, limit=limit)
+
+    async def shutdown(self):
+        """Stop the receiver, commit queued packets and close the database."""
+        await self.stop()
+        if self._writer is not None:
+            await asyncio.to_thread(self._writer.close)
+            self._writer = None
+        if self._db_conn is not None:
+            self._db_conn.close()
+            self._db_conn = None
+
+    async def flush_storage(self):
+        """Wait until every ingested packet has been committed."""
+        if self._writer is not None:
+            await asyncio.to_thread(self._writer.flush)
 
     async def _cleanup(self):
         self._stop_receiver()
         self._receiver = None
-        if self._db_conn:
-            self._db_conn.close()
-            self._db_conn = None
         if self._status_task and not self._status_task.done():
             self._status_task.cancel()
             try:
@@ -152,25 +343,66 @@ class ReceiverManager:
             "pipeline": None,
             "error_count": 0,
             "last_error": "",
+            "storage": self._writer.stats() if self._writer else None,
+            "flight_id": self._flight_id,
         }
 
-    def _save_packet(self, packet: dict):
-        if self._db_conn is None:
-            return
-        try:
-            self._db_conn.execute(
-                "INSERT OR REPLACE INTO packets (seq, received_at, type, payload) VALUES (?, ?, ?, ?)",
-                (
-                    packet.get("seq", 0),
-                    datetime.now(timezone.utc).isoformat(),
-                    packet.get("type", "unknown"),
-                    json.dumps(packet),
-                ),
-            )
-            self._db_conn.commit()
-        except Exception:
-            import logging
-            logging.getLogger("receiver_manager").warning(
-                "Failed to write packet seq=%s to database", packet.get("seq"),
-                exc_info=True,
-            )
+    def _flight_break(self, seq, mission) -> str | None:
+        """Why the next packet starts a new flight, or None if it does not."""
+        if self._flight_id is None:
+            return "first packet"
+        if mission is not None and self._last_mission not in (None, mission):
+            return f"mission changed to {mission}"
+        if isinstance(seq, int) and self._last_seq is not None:
+            if _seq_restarted(self._last_seq, seq):
+                return f"seq reset {self._last_seq} -> {seq}"
+        return None
+
+    def _resume_from_database(self):
+        """Continue rx_seq and the latest flight after a server restart."""
+        last = last_packet(self._db_conn)
+        self._flight_id = latest_flight(self._db_conn)
+        if last is not None:
+            rx_seq, flight_id, seq = last
+            self._rx_seq = rx_seq
+            if flight_id == self._flight_id:
+                self._last_seq = seq
+        # Rebuild the current flight's trajectory levels from the log
+        since = 0
+        while True:
+            rows = fetch_positions(self._db_conn, self._flight_id, since=since, limit=5000)
+            for row in rows:
+                self._trajectory.add(row["rx_seq"], row["lat"], row["lon"], row["alt_m"])
+            if len(rows) < 5000:
+                break
+            since = rows[-1]["rx_seq"]
+        for ts, packet in iter_flight_packets(self._db_conn, self._flight_id, self._rollups.types):
+            self._rollups.add(packet, ts)
+
+    def _save_packets(self, packets: list[dict]):
+        if self._writer is not None:
+            self._writer.submit_many(packets)
+
+
+def _filter_buffer(buffer, since: int, until: int | None, pkt_type: str | None) -> list[dict]:
+    return [
+        p for p in buffer
+        if p["rx_seq"] > since
+        and (until is None or p["rx_seq"] <= until)
+        and (pkt_type is None or p.get("type") == pkt_type)
+    ]
+
+
+def _seq_restarted(last_seq: int, seq: int) -> bool:
+    """True if *seq* after *last_seq* means the payload restarted counting.
+
+    Small backward steps are reordering or retransmits, and a drop from just
+    below 2**8 / 2**16 / 2**32 to just above zero is a counter wrap.
+    """
+    if seq >= last_seq - SEQ_REORDER_WINDOW:
+        return False
+    for bits in SEQ_WRAP_BITS:
+        modulus = 1 << bits
+        if modulus - SEQ_REORDER_WINDOW <= last_seq < modulus and seq < SEQ_REORDER_WINDOW:
+            return False
+    return True
@@ -0,0 +1,137 @@
+# receiver-server/rollups.py
+"""Time-bucketed telemetry rollups — min/max/mean per field per bucket.
+
+Packets are folded into fixed buckets (1 s, 10 s and 1 min by default) as
+they are ingested, so charting a whole flight reads O(buckets) instead of
+O(packets).  Buckets are keyed by receive time and each resolution keeps a
+bounded number of them.
+"""
+
+from __future__ import annotations
+
+import math
+from collections import deque
+
+# Packet types that get rolled up
+ROLLUP_TYPES = ("environment", "power", "motion")
+
+# Resolution (s) -> buckets kept per packet type: 1 h, 12 h and 7 days
+DEFAULT_RETENTION = {1: 3600, 10: 4320, 60: 10080}
+
+# Envelope fields that are numbers but not telemetry
+_SKIP_FIELDS = frozenset({"v", "seq", "rx_seq", "flight_id"})
+
+
+def numeric_fields(packet: dict, prefix: str = ""):
+    """Yield ``(name, value)`` for every numeric field, nested dicts dotted
+    (``att_deg.roll``).  Booleans and envelope fields are skipped."""
+    for key, value in packet.items():
+        if not prefix and key in _SKIP_FIELDS:
+            continue
+        if isinstance(value, bool):
+            continue
+        if isinstance(value, (int, float)):
+            if math.isfinite(value):
+                yield prefix + key, value
+        elif isinstance(value, dict):
+            yield from numeric_fields(value, f"{prefix}{key}.")
+
+
+class _Bucket:
+    __slots__ = ("start", "stats")
+
+    def __init__(self, start: int):
+        self.start = start
+        # field -> [count, sum, min, max]
+        self.stats: dict[str, list] = {}
+
+    def add(self, field: str, value: float):
+        s = self.stats.get(field)
+        if s is None:
+            self.stats[field] = [1, value, value, value]
+        else:
+            s[0] += 1
+            s[1] += value
+            if value < s[2]:
+                s[2] = value
+            if value > s[3]:
+                s[3] = value
+
+    def summary(self, fields: set[str] | None) -> dict:
+        return {
+            field: {"n": n, "min": lo, "max": hi, "mean": total / n}
+            for field, (n, total, lo, hi) in self.stats.items()
+            if fields is None or field in fields
+        }
+
+
+class RollupEngine:
+    """Per-type, per-resolution ring of time buckets."""
+
+    def __init__(self, retention: dict[int, int] | None = None,
+                 types: tuple[str, ...] = ROLLUP_TYPES):
+        self._retention = dict(retention or DEFAULT_RETENTION)
+        self._types = types
+        self._buckets: dict[tuple[str, int], deque[_Bucket]] = {}
+        self.clear()
+
+    @property
+    def resolutions(self) -> list[int]:
+        return sorted(self._retention)
+
+    @property
+    def types(self) -> tuple[str, ...]:
+        return self._types
+
+    def clear(self):
+        self._buckets = {
+            (pkt_type, res): deque(maxlen=keep)
+            for pkt_type in self._types
+            for res, keep in self._retention.items()
+        }
+
+    def add(self, packet: dict, ts: float):
+        """Fold *packet* (received at unix time *ts*) into every resolution."""
+        pkt_type = packet.get("type")
+        if pkt_type not in self._types:
+            return
+        values = list(numeric_fields(packet))
+        if not values:
+            return
+        for res in self._retention:
+            bucket = self._bucket_for(self._buckets[(pkt_type, res)], int(ts // res) * res)
+            if bucket is not None:
+                for field, value in values:
+                    bucket.add(field, value)
+
+    def query(self, pkt_type: str, resolution: int, since: float | None = None,
+              until: float | None = None, fields: set[str] | None = None) -> list[dict]:
+        """Buckets of *pkt_type* at *resolution* overlapping [since, until],
+        oldest first, each as ``{"t": start, "fields": {name: {n, min, max, mean}}}``.
+
+        Raises KeyError for an unknown type or resolution.
+        """
+        buckets = self._buckets[(pkt_type, resolution)]
+        out = []
+        for bucket in buckets:
+            if since is not None and bucket.start + resolution <= since:
+                continue
+            if until is not None and bucket.start > until:
+                break
+            out.append({"t": bucket.start, "fields": bucket.summary(fields)})
+        return out
+
+    @staticmethod
+    def _bucket_for(buckets: deque, start: int) -> _Bucket | None:
+        if not buckets or buckets[-1].start < start:
+            bucket = _Bucket(start)
+            buckets.append(bucket)
+            return bucket
+        # Late packet: walk back to its bucket (normally the last one); it is
+        # dropped if that bucket was never opened or has aged out
+        for bucket in reversed(buckets):
+            if bucket.start == start:
+                return bucket
+            if bucket.start < start:
+                break
+        return None
@@ -2,10 +2,20 @@
 """REST endpoints — health check, packet query, device enumeration."""
 
 import json
-import sqlite3
 from typing import Optional
 
-from fastapi import APIRouter, Body, HTTPException, Query
+from fastapi import APIRouter, Body, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+
+from models import TELEMETRY_BATCH_ADAPTER, TELEMETRY_PACKET_ADAPTER
+
+# Largest page /api/packets returns as a JSON array; use NDJSON for exports
+MAX_PAGE = 1000
+# Most packets accepted by one POST /api/packets/batch
+MAX_BATCH = 10_000
+# Largest body accepted there; checked while reading, before anything is parsed
+MAX_BATCH_BYTES = 8 * 1024 * 1024
 
 
 def create_rest_router(receiver_manager=None, ws_manager=None):
@@ -16,13 +26,37 @@ def create_rest_router(receiver_manager=None, ws_manager=None):
         return {"status": "ok"}
 
     @router.get("/api/packets")
-    async def get_packets(since: Optional[int] = Query(None)):
+    async def get_packets(
+        since: int = Query(0, ge=0),
+        until: Optional[int] = Query(None, ge=0),
+        type: Optional[str] = Query(None),
+        limit: Optional[int] = Query(None, ge=1),
+        flight: Optional[int] = Query(None),
+        format: str = Query("json", pattern="^(json|ndjson)$"),
+    ):
+        """Logged packets of the current flight (or *flight*), oldest first.
+
+        Keyset-paginated on rx_seq: pass the last ``rx_seq`` of a page as
+        *since* to get the next one.  ``format=json`` returns one page of at
+        most *limit* (default and cap: MAX_PAGE) packets; ``format=ndjson``
+        streams every match (or the first *limit*) without buffering.
+        """
         if receiver_manager is None:
             return []
-        packets = receiver_manager.packet_buffer
-        if since is not None:
-            packets = [p for p in packets if p.get("seq", 0) > since]
-        return packets
+        if format == "ndjson":
+            return StreamingResponse(
+                receiver_manager.iter_packet_lines(
+                    since=since, until=until, pkt_type=type, limit=limit, flight_id=flight,
+                ),
+                media_type="application/x-ndjson",
+            )
+        return receiver_manager.packets(
+            since=since,
+            until=until,
+            pkt_type=type,
+            limit=min(limit or MAX_PAGE, MAX_PAGE),
+            flight_id=flight,
+        )
 
     @router.post("/api/packet")
     async def post_packet(body: dict = Body(...)):
@@ -34,49 +68,135 @@ def create_rest_router(receiver_manager=None, ws_manager=None):
         if data is None:
             raise HTTPException(status_code=400, detail="Missing 'data' field")
 
-        # Validate required fields
-        pkt_type = data.get("type")
-        pkt_seq = data.get("seq")
-        if pkt_type not in ("position", "motion", "environment", "power"):
-            raise HTTPException(
-                status_code=400,
-                detail=f"Invalid or missing packet type: {pkt_type!r}",
-            )
-        if pkt_seq is None:
-            raise HTTPException(status_code=400, detail="Missing 'seq' in packet data")
+        try:
+            packet = TELEMETRY_PACKET_ADAPTER.validate_python(data)
+        except ValidationError as e:
+            raise HTTPException(status_code=422, detail=json.loads(e.json(include_url=False)))
 
         if receiver_manager is not None:
-            await receiver_manager.ingest_packet(data)
+            await receiver_manager.ingest_packet(packet.model_dump(exclude_unset=True))
+
+        return {"status": "ok", "seq": packet.seq}
 
-        return {"status": "ok", "seq": pkt_seq}
+    @router.post("/api/packets/batch")
+    async def post_packet_batch(request: Request):
+        """Validate and ingest many packets in one request.
+
+        The body is a JSON array of packets, or NDJSON (one packet per line)
+        when sent as ``application/x-ndjson``.  Every packet is validated
+        against the telemetry models first; if any fails, nothing is ingested.
+        Accepted packets are committed in one transaction and broadcast in
+        one frame.  Bodies over MAX_BATCH_BYTES, and NDJSON bodies of more
+        than MAX_BATCH lines, are refused with 413 before validation.
+        """
+        body = await _read_limited(request, MAX_BATCH_BYTES)
+        content_type = request.headers.get("content-type", "")
+        try:
+            if "ndjson" in content_type:
+                if sum(1 for line in body.splitlines() if line.strip()) > MAX_BATCH:
+                    raise HTTPException(
+                        status_code=413, detail=f"At most {MAX_BATCH} packets per batch"
+                    )
+                packets = _validate_ndjson(body)
+            else:
+                packets = TELEMETRY_BATCH_ADAPTER.validate_json(body)
+        except ValidationError as e:
+            raise HTTPException(status_code=422, detail=json.loads(e.json(include_url=False)))
+        if len(packets) > MAX_BATCH:
+            raise HTTPException(
+                status_code=413, detail=f"At most {MAX_BATCH} packets per batch"
+            )
+        data = [p.model_dump(exclude_unset=True) for p in packets]
+        if receiver_manager is None or not data:
+            return {"status": "ok", "count": len(data)}
+        stamped = await receiver_manager.ingest_packets(data)
+        return {
+            "status": "ok",
+            "count": len(stamped),
+            "first_rx_seq": stamped[0]["rx_seq"],
+            "last_rx_seq": stamped[-1]["rx_seq"],
+        }
 
     @router.get("/api/positions")
-    async def get_positions(since: int = Query(0), limit: int = Query(5000)):
-        """Return position packets from SQLite for map trail rendering."""
-        if receiver_manager is None or receiver_manager._db_conn is None:
+    async def get_positions(
+        since: int = Query(0),
+        limit: int = Query(5000),
+        flight: Optional[int] = Query(None),
+    ):
+        """Return position packets from SQLite for map trail rendering.
+
+        Scoped to the current flight unless *flight* is given; *since* is an
+        rx_seq cursor.
+        """
+        if receiver_manager is None:
             return []
         try:
-            conn = receiver_manager._db_conn
-            rows = conn.execute(
-                "SELECT seq, received_at, payload FROM packets "
-                "WHERE type = 'position' AND seq > ? "
-                "ORDER BY seq ASC LIMIT ?",
-                (since, limit),
-            ).fetchall()
-            result = []
-            for seq, received_at, payload_str in rows:
-                payload = json.loads(payload_str)
-                result.append({
-                    "seq": seq,
-                    "received_at": received_at,
-                    "lat": payload.get("lat", 0),
-                    "lon": payload.get("lon", 0),
-                    "alt_m": payload.get("alt_m", 0),
-                })
-            return result
+            return receiver_manager.positions(since=since, limit=limit, flight_id=flight)
         except Exception:
             return []
 
+    @router.get("/api/trajectory")
+    async def get_trajectory(
+        zoom: Optional[float] = Query(None, ge=0, le=24),
+        tolerance_m: Optional[float] = Query(None, ge=0),
+    ):
+        """Simplified track of the current flight for the map trail.
+
+        Picks the precomputed level matching one pixel at *zoom* (or an
+        explicit *tolerance_m*), so the payload stays bounded however long
+        the flight runs.
+        """
+        if receiver_manager is None:
+            return {"tolerance_m": 0.0, "raw_count": 0, "last_rx_seq": 0, "points": []}
+        return receiver_manager.trajectory(zoom=zoom, tolerance_m=tolerance_m)
+
+    @router.get("/api/rollups")
+    async def get_rollups(
+        type: str = Query(...),
+        resolution: int = Query(10),
+        since: Optional[float] = Query(None),
+        until: Optional[float] = Query(None),
+        fields: Optional[str] = Query(None),
+    ):
+        """Min/max/mean per field per time bucket for the current flight.
+
+        *since*/*until* are unix times; *fields* is a comma-separated list
+        (default: every numeric field, nested ones dotted like ``att_deg.roll``).
+        """
+        if receiver_manager is None:
+            return {"type": type, "resolution": resolution, "buckets": []}
+        wanted = {f for f in fields.split(",") if f} if fields else None
+        try:
+            buckets = receiver_manager.rollups(type, resolution, since, until, wanted)
+        except KeyError:
+            raise HTTPException(
+                status_code=400,
+                detail=(
+                    f"No rollups for type={type!r} resolution={resolution}; "
+                    f"types: {list(receiver_manager.rollup_types)}, "
+                    f"resolutions: {receiver_manager.rollup_resolutions}"
+                ),
+            )
+        return {"type": type, "resolution": resolution, "buckets": buckets}
+
+    @router.get("/api/flights")
+    async def list_flights():
+        """Logged flights, newest first, with packet counts."""
+        if receiver_manager is None:
+            return {"current": None, "flights": []}
+        return {
+            "current": receiver_manager.flight_id,
+            "flights": receiver_manager.flights(),
+        }
+
+    @router.post("/api/flights")
+    async def start_flight(body: dict = Body(default={})):
+        """Start a new flight (e.g. before a launch that reuses seq numbers)."""
+        if receiver_manager is None:
+            raise HTTPException(status_code=503, detail="Receiver not available")
+        reason = body.get("reason", "manual") if isinstance(body, dict) else "manual"
+        return {"status": "ok", "flight_id": receiver_manager.new_flight(str(reason))}
+
     @router.get("/api/devices")
     async def list_devices():
         """Enumerate SDR devices via SoapySDR (supports HackRF, RTL-SDR, etc.)."""
@@ -98,3 +218,33 @@ def create_rest_router(receiver_manager=None, ws_manager=None):
             return []
 
     return router
+
+
+async def _read_limited(request: Request, limit: int) -> bytes:
+    """The request body, or 413 as soon as it is known to exceed *limit* bytes."""
+    too_large = HTTPException(status_code=413, detail=f"Request body over {limit} bytes")
+    length = request.headers.get("content-length", "")
+    if length.isdigit() and int(length) > limit:
+        raise too_large
+    body = bytearray()
+    async for chunk in request.stream():
+        body += chunk
+        if len(body) > limit:
+            raise too_large
+    return bytes(body)
+
+
+def _validate_ndjson(body: bytes) -> list:
+    packets = []
+    for lineno, line in enumerate(body.splitlines(), start=1):
+        if not line.strip():
+            continue
+        try:
+            packets.append(TELEMETRY_PACKET_ADAPTER.validate_json(line))
+        except ValidationError as e:
+            # Report errors against the line they came from
+            errors = json.loads(e.json(include_url=False))
+            for err in errors:
+                err["loc"] = [f"line {lineno}", *err.get("loc", [])]
+            raise HTTPException(status_code=422, detail=errors)
+    return packets
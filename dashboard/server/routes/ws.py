@@ -3,8 +3,10 @@
 
 import json
 import asyncio
+from functools import partial
+from typing import Optional
 
-from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+from fastapi import APIRouter, Query, WebSocket, WebSocketDisconnect
 
 from ws_manager import WebSocketManager
 from receiver_manager import ReceiverManager, InvalidStateError
@@ -18,8 +20,12 @@ def create_ws_router(
     router = APIRouter()
 
     @router.websocket("/ws")
-    async def websocket_endpoint(ws: WebSocket):
-        await ws_manager.connect(ws)
+    async def websocket_endpoint(ws: WebSocket, last_seq: Optional[int] = Query(None)):
+        # ?last_seq=<rx_seq> asks for a status + backlog before live data
+        backlog = None
+        if last_seq is not None:
+            backlog = partial(receiver_manager.sync_frames, last_seq)
+        await ws_manager.connect(ws, backlog=backlog)
         try:
             recv_task = asyncio.create_task(_recv_loop(ws, ws_manager, receiver_manager))
             await recv_task
@@ -41,9 +47,7 @@ async def _recv_loop(
         try:
             message = json.loads(raw)
         except json.JSONDecodeError:
-            await ws_mgr.broadcast_error(
-                "HARDWARE_ERR", "Invalid JSON in command"
-            )
+            await _reply_error(ws_mgr, ws, "Invalid JSON in command")
             continue
 
         msg_type = message.get("type", "")
@@ -56,11 +60,26 @@ async def _recv_loop(
                 await receiver_mgr.stop()
             elif msg_type == "cmd:configure":
                 await receiver_mgr.configure(data)
+            elif msg_type in ("cmd:subscribe", "cmd:unsubscribe"):
+                # Subscriptions concern only this client, so do their errors
+                try:
+                    if msg_type == "cmd:subscribe":
+                        # {"topics": [...], "rates": {"spectrum": 2}} — both optional
+                        subscription = ws_mgr.subscribe(ws, data.get("topics"), data.get("rates"))
+                    else:
+                        subscription = ws_mgr.unsubscribe(ws, data.get("topics", []))
+                except (TypeError, ValueError) as e:
+                    await _reply_error(ws_mgr, ws, str(e))
+                    continue
+                await ws_mgr.send(ws, {"type": "subscribed", "data": subscription})
             else:
-                await ws_mgr.broadcast_error(
-                    "HARDWARE_ERR", f"Unknown command type: {msg_type}"
-                )
+                await _reply_error(ws_mgr, ws, f"Unknown command type: {msg_type}")
         except InvalidStateError as e:
             await ws_mgr.broadcast_error("HARDWARE_ERR", str(e))
         except Exception as e:
             await ws_mgr.broadcast_error("HARDWARE_ERR", str(e))
+
+
+async def _reply_error(ws_mgr: WebSocketManager, ws: WebSocket, message: str):
+    """Report a bad command to the client that sent it, not to every client."""
+    await ws_mgr.send(ws, {"type": "error", "data": {"code": "HARDWARE_ERR", "message": message}})
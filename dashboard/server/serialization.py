@@ -0,0 +1,29 @@
+# receiver-server/serialization.py
+"""JSON encoding shared by WebSocket broadcasts and REST exports.
+
+Uses orjson when it is installed and falls back to the stdlib encoder,
+so the server still runs from a bare ``pip install fastapi uvicorn``.
+"""
+
+from __future__ import annotations
+
+import json
+
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+if HAS_ORJSON:
+    _ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+
+def dumps(obj) -> str:
+    """Serialize *obj* to a compact JSON string."""
+    if HAS_ORJSON:
+        try:
+            return orjson.dumps(obj, option=_ORJSON_OPTIONS).decode("utf-8")
+        except TypeError:
+            pass  # e.g. integers wider than 64 bits — let the stdlib handle it
+    return json.dumps(obj, separators=(",", ":"))
@@ -0,0 +1,440 @@
+# receiver-server/storage.py
+"""SQLite packet storage — schema setup and a batched background writer."""
+
+from __future__ import annotations
+
+import json
+import logging
+import math
+import queue
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+
+logger = logging.getLogger("storage")
+
+SCHEMA_VERSION = 3
+
+_STOP = object()
+
+_PACKETS_DDL = (
+    "CREATE TABLE IF NOT EXISTS packets ("
+    "  rx_seq INTEGER PRIMARY KEY,"
+    "  flight_id INTEGER NOT NULL,"
+    "  seq INTEGER NOT NULL,"
+    "  received_at TEXT NOT NULL,"
+    "  type TEXT NOT NULL,"
+    "  payload TEXT NOT NULL"
+    ")"
+)
+
+_POSITIONS_DDL = (
+    "CREATE TABLE IF NOT EXISTS positions ("
+    "  rx_seq INTEGER PRIMARY KEY,"
+    "  flight_id INTEGER NOT NULL,"
+    "  seq INTEGER NOT NULL,"
+    "  received_at TEXT NOT NULL,"
+    "  ts REAL NOT NULL,"
+    "  lat REAL NOT NULL,"
+    "  lon REAL NOT NULL,"
+    "  alt_m REAL NOT NULL"
+    ")"
+)
+
+
+def open_database(path: str) -> sqlite3.Connection:
+    """Open *path* in WAL mode and bring its schema up to date.
+
+    WAL lets the REST handlers read while the writer thread commits, and
+    ``synchronous=NORMAL`` drops the per-commit fsync (a crash can lose the
+    last batch, never corrupt the file).
+    """
+    conn = sqlite3.connect(str(path), check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    with conn:
+        _migrate(conn)
+    return conn
+
+
+def _migrate(conn: sqlite3.Connection):
+    """Upgrade the schema in place, tracked by ``PRAGMA user_version``.
+
+    v1: ``packets`` — every packet as a JSON blob keyed by seq.
+    v2: typed ``positions`` table for map trails, plus indexes on
+        ``packets(type, seq)`` and ``packets(received_at)``.
+    v3: ``flights`` table; packets and positions keyed by the server-side
+        ingest sequence ``rx_seq`` and partitioned by ``flight_id``, so a
+        payload reboot that resets ``seq`` no longer overwrites rows.
+    """
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    legacy = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'packets'"
+    ).fetchone()
+    if version == 0 and legacy is None:
+        # Fresh database — create the current schema directly
+        _create_v3(conn)
+        conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        return
+    if version < 2:
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS positions ("
+            "  seq INTEGER PRIMARY KEY,"
+            "  received_at TEXT NOT NULL,"
+            "  ts REAL NOT NULL,"
+            "  lat REAL NOT NULL,"
+            "  lon REAL NOT NULL,"
+            "  alt_m REAL NOT NULL"
+            ")"
+        )
+        # Backfill from the JSON blobs logged before the typed table existed;
+        # packets without a numeric fix are skipped, as position_coords does
+        conn.execute(
+            "INSERT OR REPLACE INTO positions (seq, received_at, ts, lat, lon, alt_m) "
+            "SELECT seq, received_at,"
+            "  (julianday(received_at) - 2440587.5) * 86400.0,"
+            "  json_extract(payload, '$.lat'),"
+            "  json_extract(payload, '$.lon'),"
+            "  json_extract(payload, '$.alt_m') "
+            "FROM packets WHERE type = 'position'"
+            "  AND json_type(payload, '$.lat') IN ('integer', 'real')"
+            "  AND json_type(payload, '$.lon') IN ('integer', 'real')"
+            "  AND json_type(payload, '$.alt_m') IN ('integer', 'real')"
+        )
+    if version < 3:
+        # Everything logged so far becomes flight 1; rx_seq keeps the old order
+        conn.execute("ALTER TABLE packets RENAME TO packets_v2")
+        conn.execute("ALTER TABLE positions RENAME TO positions_v2")
+        conn.execute("DROP INDEX IF EXISTS idx_packets_type_seq")
+        conn.execute("DROP INDEX IF EXISTS idx_packets_received_at")
+        _create_v3(conn)
+        conn.execute(
+            "INSERT INTO flights (id, started_at, reason) "
+            "SELECT 1, COALESCE(MIN(received_at), ?), 'migrated' FROM packets_v2",
+            (datetime.now(timezone.utc).isoformat(),),
+        )
+        conn.execute(
+            "INSERT INTO packets (rx_seq, flight_id, seq, received_at, type, payload) "
+            "SELECT seq, 1, seq, received_at, type, payload FROM packets_v2"
+        )
+        conn.execute(
+            "INSERT INTO positions (rx_seq, flight_id, seq, received_at, ts, lat, lon, alt_m) "
+            "SELECT seq, 1, seq, received_at, ts, lat, lon, alt_m FROM positions_v2"
+        )
+        conn.execute("DROP TABLE packets_v2")
+        conn.execute("DROP TABLE positions_v2")
+    if version != SCHEMA_VERSION:
+        conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+
+def _create_v3(conn: sqlite3.Connection):
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS flights ("
+        "  id INTEGER PRIMARY KEY,"
+        "  started_at TEXT NOT NULL,"
+        "  reason TEXT NOT NULL"
+        ")"
+    )
+    conn.execute(_PACKETS_DDL)
+    conn.execute(_POSITIONS_DDL)
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_packets_flight_type "
+        "ON packets (flight_id, type, rx_seq)"
+    )
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_packets_flight_rx_seq ON packets (flight_id, rx_seq)"
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_packets_received_at ON packets (received_at)")
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_positions_flight ON positions (flight_id, rx_seq)"
+    )
+
+
+def create_flight(conn: sqlite3.Connection, reason: str = "manual") -> int:
+    """Start a new flight and return its id."""
+    with conn:
+        cur = conn.execute(
+            "INSERT INTO flights (started_at, reason) VALUES (?, ?)",
+            (datetime.now(timezone.utc).isoformat(), reason),
+        )
+    return cur.lastrowid
+
+
+def latest_flight(conn: sqlite3.Connection) -> int | None:
+    """Id of the most recent flight, or None for an empty database."""
+    return conn.execute("SELECT MAX(id) FROM flights").fetchone()[0]
+
+
+def last_packet(conn: sqlite3.Connection) -> tuple[int, int, int] | None:
+    """``(rx_seq, flight_id, seq)`` of the newest logged packet, if any."""
+    return conn.execute(
+        "SELECT rx_seq, flight_id, seq FROM packets ORDER BY rx_seq DESC LIMIT 1"
+    ).fetchone()
+
+
+def fetch_flights(conn: sqlite3.Connection) -> list[dict]:
+    """All flights with their packet counts and rx_seq range, newest first."""
+    rows = conn.execute(
+        "SELECT f.id, f.started_at, f.reason,"
+        "  (SELECT COUNT(*) FROM packets p WHERE p.flight_id = f.id),"
+        "  (SELECT MIN(rx_seq) FROM packets p WHERE p.flight_id = f.id),"
+        "  (SELECT MAX(rx_seq) FROM packets p WHERE p.flight_id = f.id) "
+        "FROM flights f ORDER BY f.id DESC"
+    ).fetchall()
+    return [
+        {
+            "id": flight_id, "started_at": started_at, "reason": reason,
+            "packets": count, "first_rx_seq": first, "last_rx_seq": last,
+        }
+        for flight_id, started_at, reason, count, first, last in rows
+    ]
+
+
+def position_coords(packet: dict) -> tuple[float, float, float] | None:
+    """(lat, lon, alt_m) of a position packet, or None unless all are finite numbers."""
+    coords = (packet.get("lat"), packet.get("lon"), packet.get("alt_m"))
+    if not all(
+        isinstance(v, (int, float)) and not isinstance(v, bool) and math.isfinite(v)
+        for v in coords
+    ):
+        return None
+    return coords
+
+
+def fetch_positions(conn: sqlite3.Connection, flight_id: int | None, since: int = 0,
+                    limit: int = 5000) -> list[dict]:
+    """Position rows of *flight_id* with rx_seq > *since*, oldest first."""
+    rows = conn.execute(
+        "SELECT rx_seq, seq, received_at, lat, lon, alt_m FROM positions "
+        "WHERE flight_id = ? AND rx_seq > ? ORDER BY rx_seq ASC LIMIT ?",
+        (flight_id, since, limit),
+    ).fetchall()
+    return [
+        {
+            "rx_seq": rx_seq, "seq": seq, "received_at": received_at,
+            "lat": lat, "lon": lon, "alt_m": alt_m,
+        }
+        for rx_seq, seq, received_at, lat, lon, alt_m in rows
+    ]
+
+
+def fetch_packets(conn: sqlite3.Connection, flight_id: int | None, since: int = 0,
+                  until: int | None = None, pkt_type: str | None = None,
+                  limit: int = 1000) -> list[tuple[int, str]]:
+    """One keyset page of ``(rx_seq, payload_json)`` rows, oldest first.
+
+    Returns packets of *flight_id* with ``since < rx_seq <= until``,
+    optionally of a single type.  Pass the last rx_seq back as *since* to
+    fetch the next page.
+    """
+    sql = "SELECT rx_seq, payload FROM packets WHERE flight_id = ? AND rx_seq > ?"
+    params: list = [flight_id, since]
+    if until is not None:
+        sql += " AND rx_seq <= ?"
+        params.append(until)
+    if pkt_type is not None:
+        sql += " AND type = ?"
+        params.append(pkt_type)
+    sql += " ORDER BY rx_seq ASC LIMIT ?"
+    params.append(limit)
+    return conn.execute(sql, params).fetchall()
+
+
+def iter_packets(db_path: str, flight_id: int | None, since: int = 0,
+                 until: int | None = None, pkt_type: str | None = None,
+                 limit: int | None = None, page_size: int = 1000):
+    """Yield packet payloads (JSON text) page by page for large exports.
+
+    Opens its own read-only connection so a long export neither holds the
+    shared read connection nor buffers more than one page in memory.
+    """
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True, check_same_thread=False)
+    try:
+        remaining = limit
+        while remaining is None or remaining > 0:
+            page = page_size if remaining is None else min(page_size, remaining)
+            rows = fetch_packets(conn, flight_id, since, until, pkt_type, page)
+            for _, payload in rows:
+                yield payload
+            if len(rows) < page:
+                return
+            since = rows[-1][0]
+            if remaining is not None:
+                remaining -= len(rows)
+    finally:
+        conn.close()
+
+
+def iter_flight_packets(conn: sqlite3.Connection, flight_id: int | None,
+                        types: tuple[str, ...], page_size: int = 5000):
+    """Yield ``(received_ts, packet)`` for every packet of *flight_id* whose
+    type is in *types*, in rx_seq order — used to rebuild in-memory views."""
+    marks = ", ".join("?" * len(types))
+    since = 0
+    while True:
+        rows = conn.execute(
+            "SELECT rx_seq, (julianday(received_at) - 2440587.5) * 86400.0, payload "
+            f"FROM packets WHERE flight_id = ? AND rx_seq > ? AND type IN ({marks}) "
+            "ORDER BY rx_seq ASC LIMIT ?",
+            (flight_id, since, *types, page_size),
+        ).fetchall()
+        for _, ts, payload in rows:
+            yield ts, json.loads(payload)
+        if len(rows) < page_size:
+            return
+        since = rows[-1][0]
+
+
+class PacketWriter:
+    """Background thread that drains a queue of packets into SQLite.
+
+    Packets are committed in one transaction per batch — every *batch_size*
+    packets or *flush_interval_sec* after the first queued packet, whichever
+    comes first — so the event loop never waits on a commit.  Each packet
+    must already carry its ``rx_seq`` and ``flight_id``.
+    """
+
+    def __init__(self, db_path: str, batch_size: int = 100,
+                 flush_interval_sec: float = 0.25):
+        self._conn = open_database(db_path)
+        self._queue: queue.Queue = queue.Queue()
+        self._batch_size = batch_size
+        self._flush_interval = flush_interval_sec
+        self._rows_written = 0
+        self._commits = 0
+        self._errors = 0
+        self._last_commit_ms = 0.0
+        self._max_commit_ms = 0.0
+        self._closed = False
+        self._thread = threading.Thread(
+            target=self._run, name="packet-writer", daemon=True
+        )
+        self._thread.start()
+
+    @property
+    def backlog(self) -> int:
+        """Packets queued but not yet committed (approximate)."""
+        return self._queue.qsize()
+
+    def submit(self, packet: dict):
+        """Queue *packet* for the next batch.  Never blocks."""
+        if self._closed:
+            return
+        self._queue.put((time.time(), packet))
+
+    def submit_many(self, packets: list[dict]):
+        """Queue *packets* so they are committed together in one transaction."""
+        if self._closed or not packets:
+            return
+        now = time.time()
+        self._queue.put([(now, packet) for packet in packets])
+
+    def flush(self, timeout: float | None = None) -> bool:
+        """Block until every packet submitted so far has been committed."""
+        if self._closed:
+            return True
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def close(self):
+        """Commit whatever is queued, stop the thread and close the database."""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_STOP)
+        self._thread.join()
+        self._conn.close()
+
+    def stats(self) -> dict:
+        return {
+            "backlog": self.backlog,
+            "rows_written": self._rows_written,
+            "commits": self._commits,
+            "errors": self._errors,
+            "last_commit_ms": round(self._last_commit_ms, 3),
+            "max_commit_ms": round(self._max_commit_ms, 3),
+        }
+
+    def _run(self):
+        batch: list[tuple[float, dict]] = []
+        waiters: list[threading.Event] = []
+        deadline = 0.0
+        while True:
+            timeout = max(0.0, deadline - time.monotonic()) if batch else None
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+
+            if item is _STOP:
+                self._commit(batch)
+                for event in waiters:
+                    event.set()
+                return
+            if isinstance(item, threading.Event):
+                waiters.append(item)
+            elif item is not None:
+                if not batch:
+                    deadline = time.monotonic() + self._flush_interval
+                if isinstance(item, list):
+                    # submit_many() — never split across transactions
+                    batch.extend(item)
+                else:
+                    batch.append(item)
+                if len(batch) < self._batch_size:
+                    continue
+
+            self._commit(batch)
+            batch = []
+            for event in waiters:
+                event.set()
+            waiters = []
+
+    def _commit(self, batch: list[tuple[float, dict]]):
+        if not batch:
+            return
+        t0 = time.perf_counter()
+        packet_rows = []
+        position_rows = []
+        for ts, packet in batch:
+            rx_seq = packet["rx_seq"]
+            flight_id = packet["flight_id"]
+            # An explicit null would break the NOT NULL columns and roll back the batch
+            seq = packet.get("seq") or 0
+            received_at = datetime.fromtimestamp(ts, timezone.utc).isoformat()
+            pkt_type = packet.get("type") or "unknown"
+            packet_rows.append(
+                (rx_seq, flight_id, seq, received_at, pkt_type, json.dumps(packet))
+            )
+            coords = position_coords(packet) if pkt_type == "position" else None
+            if coords is not None:
+                # A fix without usable coordinates is kept in packets only; a
+                # NULL in the typed table would abort the whole transaction
+                position_rows.append((rx_seq, flight_id, seq, received_at, ts, *coords))
+        try:
+            with self._conn:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO packets "
+                    "(rx_seq, flight_id, seq, received_at, type, payload) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    packet_rows,
+                )
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO positions "
+                    "(rx_seq, flight_id, seq, received_at, ts, lat, lon, alt_m) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    position_rows,
+                )
+        except Exception:
+            self._errors += 1
+            logger.warning(
+                "Failed to write %d packets to database", len(batch), exc_info=True
+            )
+            return
+        elapsed_ms = (time.perf_counter() - t0) * 1000.0
+        self._rows_written += len(batch)
+        self._commits += 1
+        self._last_commit_ms = elapsed_ms
+        self._max_commit_ms = max(self._max_commit_ms, elapsed_ms)
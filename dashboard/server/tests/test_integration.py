@@ -57,6 +57,31 @@ class TestWebSocket:
             ws.send_json({"type": "cmd:stop", "data": {}})
             # stop when IDLE is a no-op, no response message required
 
+    def test_ws_last_seq_gets_status_and_sync(self, client):
+        with client.websocket_connect("/ws?last_seq=0") as ws:
+            assert ws.receive_json()["type"] == "status"
+            sync = ws.receive_json()
+            assert sync["type"] == "sync"
+            assert sync["data"]["last_seq"] == 0
+
+    def test_ws_subscribe_reply(self, client):
+        with client.websocket_connect("/ws") as ws:
+            ws.send_json({"type": "cmd:subscribe",
+                          "data": {"topics": ["status", "telemetry.position"], "rates": {"status": 1}}})
+            data = ws.receive_json()
+            assert data["type"] == "subscribed"
+            assert data["data"]["topics"] == ["status", "telemetry.position"]
+            assert data["data"]["rates"] == {"status": 1.0}
+
+    def test_ws_bad_subscribe_answers_sender_only(self, client):
+        with client.websocket_connect("/ws") as ws1, client.websocket_connect("/ws") as ws2:
+            ws1.send_json({"type": "cmd:subscribe", "data": {"rates": {"status": -1}}})
+            data = ws1.receive_json()
+            assert data["type"] == "error"
+            assert "positive" in data["data"]["message"]
+            ws2.send_json({"type": "cmd:subscribe", "data": {}})
+            assert ws2.receive_json()["type"] == "subscribed"
+
     def test_ws_handles_invalid_json(self, client):
         with client.websocket_connect("/ws") as ws:
             ws.send_text("not json")
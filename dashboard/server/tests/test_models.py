@@ -5,6 +5,7 @@ from models import (
     EnvironmentPayload, MotionPayload, PositionPayload, PowerPayload,
     AccelData, GyroData, AttData,
     ReceiverStatus, ReceiverState, SpectrumFrame, ErrorInfo, ErrorCode,
+    PowerPacket, TELEMETRY_BATCH_ADAPTER,
 )
 
 
@@ -112,3 +113,20 @@ class TestErrorModels:
         assert ErrorCode.DEVICE_LOST.value == "DEVICE_LOST"
         assert ErrorCode.SIGNAL_LOST.value == "SIGNAL_LOST"
         assert ErrorCode.HARDWARE_ERR.value == "HARDWARE_ERR"
+
+
+class TestTelemetryPacketUnion:
+    def test_discriminator_selects_model(self):
+        packets = TELEMETRY_BATCH_ADAPTER.validate_json(
+            '[{"type": "power", "seq": 4, "mid": "SIM", "bat_v": 8.1, "bat_a": 0.7,'
+            ' "bat_w": 5.7, "bat_pct": 90, "bat_temp_c": 9.0, "extra": 1}]'
+        )
+        assert isinstance(packets[0], PowerPacket)
+        assert packets[0].model_dump(exclude_unset=True)["extra"] == 1
+
+    def test_seq_required(self):
+        with pytest.raises(ValidationError):
+            TELEMETRY_BATCH_ADAPTER.validate_python([{
+                "type": "power", "bat_v": 8.1, "bat_a": 0.7, "bat_w": 5.7,
+                "bat_pct": 90, "bat_temp_c": 9.0,
+            }])
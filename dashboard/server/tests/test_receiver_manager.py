@@ -128,3 +128,200 @@ class TestReceiverStateMachine:
     @pytest.mark.asyncio
     async def test_packet_buffer(self, manager):
         assert manager.packet_buffer == []
+
+
+class TestPacketStorage:
+
+    @pytest.mark.asyncio
+    async def test_ingested_packets_reach_database(self, tmp_path):
+        mgr = ReceiverManager(WebSocketManager(), ReceiverConfig(), db_path=str(tmp_path / "hab.db"))
+        await mgr.ingest_packet({"type": "position", "seq": 1, "lat": 38.5, "lon": -121.5, "alt_m": 10.0})
+        await mgr.ingest_packet({"type": "power", "seq": 2, "bat_v": 7.9})
+        await mgr.flush_storage()
+        rows = mgr._db_conn.execute("SELECT rx_seq, seq, type FROM packets ORDER BY rx_seq").fetchall()
+        assert rows == [(1, 1, "position"), (2, 2, "power")]
+        assert mgr._build_status()["storage"]["rows_written"] == 2
+        await mgr.shutdown()
+        assert mgr._db_conn is None
+
+
+class TestFlightPartitioning:
+
+    @pytest.mark.asyncio
+    async def test_packets_stamped_with_rx_seq_and_flight(self):
+        mgr = ReceiverManager(WebSocketManager(), ReceiverConfig())
+        await mgr.ingest_packet({"type": "power", "seq": 7})
+        await mgr.ingest_packet({"type": "power", "seq": 8})
+        assert [(p["rx_seq"], p["flight_id"], p["seq"]) for p in mgr.packet_buffer] == [
+            (1, 1, 7), (2, 1, 8),
+        ]
+
+    @pytest.mark.asyncio
+    async def test_seq_reset_starts_new_flight(self):
+        mgr = ReceiverManager(WebSocketManager(), ReceiverConfig())
+        for seq in range(1, 101):
+            await mgr.ingest_packet({"type": "power", "seq": seq})
+        await mgr.ingest_packet({"type": "power", "seq": 1})
+        assert mgr.flight_id == 2
+        # The buffer only holds the current flight; rx_seq keeps counting
+        assert [(p["rx_seq"], p["seq"]) for p in mgr.packet_buffer] == [(101, 1)]
+
+    @pytest.mark.asyncio
+    async def test_reordering_and_wrap_stay_in_flight(self):
+        mgr = ReceiverManager(WebSocketManager(), ReceiverConfig())
+        for seq in (10, 12, 11, 65534, 65535, 0, 1):
+            await mgr.ingest_packet({"type": "power", "seq": seq})
+        assert mgr.flight_id == 1
+
+    @pytest.mark.asyncio
+    async def test_mission_change_starts_new_flight(self):
+        mgr = ReceiverManager(WebSocketManager(), ReceiverConfig())
+        await mgr.ingest_packet({"type": "power", "seq": 1, "mid": "SIM"})
+        await mgr.ingest_packet({"type": "power", "seq": 2, "mid": "HAB-2"})
+        assert mgr.flight_id == 2
+
+    @pytest.mark.asyncio
+    async def test_positions_scoped_to_current_flight(self, tmp_path):
+        mgr = ReceiverManager(WebSocketManager(), ReceiverConfig(), db_path=str(tmp_path / "hab.db"))
+        for seq in (1, 2):
+            await mgr.ingest_packet({"type": "position", "seq": seq, "lat": 1.0, "lon": 1.0, "alt_m": 0})
+        mgr.new_flight()
+        await mgr.ingest_packet({"type": "position", "seq": 1, "lat": 2.0, "lon": 2.0, "alt_m": 0})
+        await mgr.flush_storage()
+        assert [(p["rx_seq"], p["lat"]) for p in mgr.positions()] == [(3, 2.0)]
+        assert [p["rx_seq"] for p in mgr.positions(flight_id=1)] == [1, 2]
+        assert [f["packets"] for f in mgr.flights()] == [1, 2]
+        await mgr.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_restart_resumes_rx_seq_and_flight(self, tmp_path):
+        path = str(tmp_path / "hab.db")
+        mgr = ReceiverManager(WebSocketManager(), ReceiverConfig(), db_path=path)
+        for seq in (5, 6):
+            await mgr.ingest_packet({"type": "power", "seq": seq})
+        await mgr.shutdown()
+
+        mgr = ReceiverManager(WebSocketManager(), ReceiverConfig(), db_path=path)
+        await mgr.ingest_packet({"type": "power", "seq": 7})
+        assert (mgr.packet_buffer[-1]["rx_seq"], mgr.flight_id) == (3, 1)
+        await mgr.shutdown()
+
+
+class TestTrajectory:
+
+    @pytest.mark.asyncio
+    async def test_positions_feed_trajectory(self):
+        mgr = ReceiverManager(WebSocketManager(), ReceiverConfig())
+        for seq in range(1, 11):
+            await mgr.ingest_packet({"type": "position", "seq": seq,
+                                     "lat": 38.5, "lon": -121.5 + seq * 0.01, "alt_m": seq})
+        await mgr.ingest_packet({"type": "power", "seq": 11})
+        result = mgr.trajectory(zoom=12)
+        assert result["raw_count"] == 10
+        # A straight eastward leg collapses to its endpoints
+        assert [p[2] for p in result["points"]] == [1, 10]
+        mgr.new_flight()
+        assert mgr.trajectory()["points"] == []
+
+    @pytest.mark.asyncio
+    async def test_bad_fix_skipped(self):
+        mgr = ReceiverManager(WebSocketManager(), ReceiverConfig())
+        for seq in range(1, 6):
+            lat = None if seq == 3 else 38.5 + seq * 0.01
+            await mgr.ingest_packet({"type": "position", "seq": seq,
+                                     "lat": lat, "lon": -121.5, "alt_m": seq})
+        await mgr.ingest_packet({"type": "position", "seq": 6, "lat": 38.6,
+                                 "lon": float("inf"), "alt_m": 6})
+        await mgr.ingest_packet({"type": "position", "seq": 7, "lat": 38.6, "lon": -121.5})
+        result = mgr.trajectory(zoom=12)
+        assert result["raw_count"] == 4
+        assert result["last_rx_seq"] == 5
+        assert [p[2] for p in result["points"]] == [1, 5]
+        # The bad fixes are still logged as packets
+        assert len(mgr.packet_buffer) == 7
+
+    @pytest.mark.asyncio
+    async def test_trajectory_rebuilt_after_restart(self, tmp_path):
+        path = str(tmp_path / "hab.db")
+        mgr = ReceiverManager(WebSocketManager(), ReceiverConfig(), db_path=path)
+        for seq in range(1, 4):
+            await mgr.ingest_packet({"type": "position", "seq": seq,
+                                     "lat": 38.5 + seq * 0.01, "lon": -121.5, "alt_m": seq})
+        await mgr.shutdown()
+
+        mgr = ReceiverManager(WebSocketManager(), ReceiverConfig(), db_path=path)
+        assert mgr.trajectory()["raw_count"] == 3
+        assert mgr.trajectory()["last_rx_seq"] == 3
+        await mgr.shutdown()
+
+
+class TestRollups:
+
+    @pytest.mark.asyncio
+    async def test_rollups_rebuilt_after_restart(self, tmp_path):
+        path = str(tmp_path / "hab.db")
+        mgr = ReceiverManager(WebSocketManager(), ReceiverConfig(), db_path=path)
+        for seq in range(1, 4):
+            await mgr.ingest_packet({"type": "power", "seq": seq, "bat_v": 8.0 - seq * 0.1})
+        await mgr.ingest_packet({"type": "position", "seq": 4, "lat": 1.0, "lon": 1.0, "alt_m": 0})
+        await mgr.shutdown()
+
+        mgr = ReceiverManager(WebSocketManager(), ReceiverConfig(), db_path=path)
+        after = mgr.rollups("power", 60)
+        assert sum(b["fields"]["bat_v"]["n"] for b in after) == 3
+        mgr.new_flight()
+        assert mgr.rollups("power", 60) == []
+        await mgr.shutdown()
+
+
+class TestSyncFrames:
+
+    @pytest.mark.asyncio
+    async def test_backlog_since_last_seq(self):
+        mgr = ReceiverManager(WebSocketManager(), ReceiverConfig())
+        for seq in range(1, 6):
+            await mgr.ingest_packet({"type": "power", "seq": seq})
+        frames, floor = mgr.sync_frames(3)
+        assert [f["type"] for f in frames] == ["status", "sync", "telemetry_batch"]
+        assert frames[1]["data"]["complete"] is True
+        assert frames[1]["data"]["count"] == 2
+        assert [p["rx_seq"] for p in frames[2]["data"]] == [4, 5]
+        assert floor == 5
+
+    @pytest.mark.asyncio
+    async def test_incomplete_when_buffer_does_not_reach_back(self):
+        mgr = ReceiverManager(WebSocketManager(), ReceiverConfig())
+        for seq in range(1, 1206):
+            await mgr.ingest_packet({"type": "power", "seq": seq})
+        frames, _ = mgr.sync_frames(10)
+        assert frames[1]["data"]["complete"] is False
+        assert frames[1]["data"]["count"] == 1000
+        assert [len(f["data"]) for f in frames[2:]] == [500, 500]
+        # A client ahead of the server (e.g. fresh database) must reset too
+        frames, _ = mgr.sync_frames(5000)
+        assert frames[1]["data"]["complete"] is False
+
+    @pytest.mark.asyncio
+    async def test_caught_up_client(self):
+        mgr = ReceiverManager(WebSocketManager(), ReceiverConfig())
+        frames, floor = mgr.sync_frames(0)
+        assert [f["type"] for f in frames] == ["status", "sync"]
+        assert frames[1]["data"]["complete"] is True
+        assert floor == 0
+
+
+class TestBulkIngest:
+
+    @pytest.mark.asyncio
+    async def test_batch_goes_out_in_one_frame(self):
+        ws_mgr = WebSocketManager(batch_window_sec=60)
+        ws = MockWebSocket()
+        await ws_mgr.connect(ws)
+        mgr = ReceiverManager(ws_mgr, ReceiverConfig())
+        stamped = await mgr.ingest_packets([{"type": "power", "seq": s} for s in range(1, 201)])
+        assert [p["rx_seq"] for p in stamped] == list(range(1, 201))
+        await ws_mgr.flush()
+        assert len(ws.sent) == 1
+        frame = json.loads(ws.sent[0])
+        assert frame["type"] == "telemetry_batch"
+        assert len(frame["data"]) == 200
@@ -0,0 +1,73 @@
+# receiver-server/tests/test_rollups.py
+import pytest
+from rollups import RollupEngine, numeric_fields
+
+
+class TestNumericFields:
+
+    def test_flattens_nested_and_skips_envelope(self):
+        packet = {
+            "v": 1, "seq": 9, "rx_seq": 10, "flight_id": 1, "type": "motion",
+            "t": "2026-06-05T12:00:00Z", "vs_mps": 5.0, "fix": True,
+            "att_deg": {"roll": 1.5, "pitch": -0.5},
+        }
+        assert dict(numeric_fields(packet)) == {
+            "vs_mps": 5.0, "att_deg.roll": 1.5, "att_deg.pitch": -0.5,
+        }
+
+    def test_skips_non_finite(self):
+        assert dict(numeric_fields({"a": float("nan"), "b": 2})) == {"b": 2}
+
+
+class TestRollupEngine:
+
+    def test_min_max_mean_per_bucket(self):
+        engine = RollupEngine()
+        for i, temp in enumerate([-40.0, -42.0, -41.0]):
+            engine.add({"type": "environment", "temp_ext_c": temp}, 1000.2 + i * 0.3)
+        engine.add({"type": "environment", "temp_ext_c": -50.0}, 1001.5)
+
+        one_s = engine.query("environment", 1)
+        assert [b["t"] for b in one_s] == [1000, 1001]
+        assert one_s[0]["fields"]["temp_ext_c"] == {
+            "n": 3, "min": -42.0, "max": -40.0, "mean": pytest.approx(-41.0),
+        }
+        ten_s = engine.query("environment", 10)
+        assert len(ten_s) == 1
+        assert ten_s[0]["fields"]["temp_ext_c"]["n"] == 4
+        assert ten_s[0]["fields"]["temp_ext_c"]["min"] == -50.0
+
+    def test_since_until_and_fields(self):
+        engine = RollupEngine()
+        for t in range(0, 120):
+            engine.add({"type": "power", "bat_v": 8.0, "bat_a": 0.5}, float(t))
+        buckets = engine.query("power", 10, since=35, until=60, fields={"bat_v"})
+        assert [b["t"] for b in buckets] == [30, 40, 50, 60]
+        assert set(buckets[0]["fields"]) == {"bat_v"}
+
+    def test_retention_bounds_buckets(self):
+        engine = RollupEngine(retention={1: 5})
+        for t in range(20):
+            engine.add({"type": "motion", "vs_mps": 1.0}, float(t))
+        assert [b["t"] for b in engine.query("motion", 1)] == [15, 16, 17, 18, 19]
+
+    def test_late_packet_joins_open_bucket(self):
+        engine = RollupEngine(retention={10: 10})
+        engine.add({"type": "motion", "vs_mps": 1.0}, 25.0)
+        engine.add({"type": "motion", "vs_mps": 3.0}, 31.0)
+        engine.add({"type": "motion", "vs_mps": 5.0}, 29.0)
+        assert [b["fields"]["vs_mps"]["n"] for b in engine.query("motion", 10)] == [2, 1]
+
+    def test_ignores_other_types_and_unknown_query(self):
+        engine = RollupEngine()
+        engine.add({"type": "position", "lat": 38.5}, 0.0)
+        with pytest.raises(KeyError):
+            engine.query("position", 1)
+        with pytest.raises(KeyError):
+            engine.query("power", 5)
+
+    def test_clear(self):
+        engine = RollupEngine()
+        engine.add({"type": "power", "bat_v": 8.0}, 0.0)
+        engine.clear()
+        assert engine.query("power", 1) == []
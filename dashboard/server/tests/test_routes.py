@@ -1,8 +1,15 @@
 # receiver-server/tests/test_routes.py
+import json
+
 import pytest
+import pytest_asyncio
 from fastapi import FastAPI
 from httpx import AsyncClient, ASGITransport
-from routes.rest import create_rest_router
+from config import ReceiverConfig
+from receiver_manager import ReceiverManager
+from routes import rest
+from routes.rest import MAX_PAGE, create_rest_router
+from ws_manager import WebSocketManager
 
 
 def build_app(receiver_manager=None, ws_manager=None):
@@ -26,10 +33,7 @@ class TestPacketsEndpoint:
 
     @pytest.mark.asyncio
     async def test_empty_buffer(self):
-        class FakeMgr:
-            packet_buffer = []
-
-        app = build_app(receiver_manager=FakeMgr())
+        app = build_app(receiver_manager=ReceiverManager(WebSocketManager(), ReceiverConfig()))
         async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
             resp = await client.get("/api/packets")
         assert resp.status_code == 200
@@ -37,27 +41,25 @@ class TestPacketsEndpoint:
 
     @pytest.mark.asyncio
     async def test_returns_all_packets(self):
-        class FakeMgr:
-            packet_buffer = [{"type": "environment", "temp_ext_c": -42.6}]
+        mgr = ReceiverManager(WebSocketManager(), ReceiverConfig())
+        await mgr.ingest_packet({"type": "environment", "seq": 1, "temp_ext_c": -42.6})
 
-        app = build_app(receiver_manager=FakeMgr())
+        app = build_app(receiver_manager=mgr)
         async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
             resp = await client.get("/api/packets")
         assert resp.status_code == 200
         data = resp.json()
         assert len(data) == 1
         assert data[0]["type"] == "environment"
+        assert data[0]["rx_seq"] == 1
 
     @pytest.mark.asyncio
     async def test_since_filter(self):
-        class FakeMgr:
-            packet_buffer = [
-                {"type": "environment", "seq": 1},
-                {"type": "motion", "seq": 2},
-                {"type": "power", "seq": 3},
-            ]
+        mgr = ReceiverManager(WebSocketManager(), ReceiverConfig())
+        for seq, pkt_type in ((1, "environment"), (2, "motion"), (3, "power")):
+            await mgr.ingest_packet({"type": pkt_type, "seq": seq})
 
-        app = build_app(receiver_manager=FakeMgr())
+        app = build_app(receiver_manager=mgr)
         async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
             resp = await client.get("/api/packets?since=1")
         assert resp.status_code == 200
@@ -67,6 +69,243 @@ class TestPacketsEndpoint:
         assert data[1]["seq"] == 3
 
 
+class TestPacketsFromDatabase:
+
+    @pytest_asyncio.fixture
+    async def manager(self, tmp_path):
+        mgr = ReceiverManager(WebSocketManager(), ReceiverConfig(), db_path=str(tmp_path / "hab.db"))
+        types = ("position", "motion", "environment", "power")
+        for seq in range(1, 2501):
+            await mgr.ingest_packet({"type": types[seq % 4], "seq": seq})
+        await mgr.flush_storage()
+        yield mgr
+        await mgr.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_keyset_pages_cover_older_packets(self, manager):
+        app = build_app(receiver_manager=manager)
+        seen = []
+        since = 0
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            while True:
+                resp = await client.get(f"/api/packets?since={since}&limit=1000")
+                page = resp.json()
+                if not page:
+                    break
+                seen.extend(p["rx_seq"] for p in page)
+                since = page[-1]["rx_seq"]
+        # Reaches past the 1000-packet in-memory buffer
+        assert seen == list(range(1, 2501))
+
+    @pytest.mark.asyncio
+    async def test_until_and_type_filters(self, manager):
+        app = build_app(receiver_manager=manager)
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            resp = await client.get("/api/packets?since=10&until=30&type=power")
+        data = resp.json()
+        assert [p["rx_seq"] for p in data] == [11, 15, 19, 23, 27]
+        assert {p["type"] for p in data} == {"power"}
+
+    @pytest.mark.asyncio
+    async def test_page_size_capped(self, manager):
+        app = build_app(receiver_manager=manager)
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            resp = await client.get("/api/packets?limit=100000")
+        assert len(resp.json()) == MAX_PAGE
+
+    @pytest.mark.asyncio
+    async def test_ndjson_streams_everything(self, manager):
+        app = build_app(receiver_manager=manager)
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            resp = await client.get("/api/packets?format=ndjson")
+        assert resp.status_code == 200
+        assert resp.headers["content-type"].startswith("application/x-ndjson")
+        lines = resp.text.splitlines()
+        assert len(lines) == 2500
+        assert json.loads(lines[-1])["rx_seq"] == 2500
+
+    @pytest.mark.asyncio
+    async def test_ndjson_respects_limit_and_type(self, manager):
+        app = build_app(receiver_manager=manager)
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            resp = await client.get("/api/packets?format=ndjson&type=motion&limit=1500")
+        rows = [json.loads(line) for line in resp.text.splitlines()]
+        assert len(rows) == 625
+        assert {r["type"] for r in rows} == {"motion"}
+
+    @pytest.mark.asyncio
+    async def test_rejects_unknown_format(self, manager):
+        app = build_app(receiver_manager=manager)
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            resp = await client.get("/api/packets?format=csv")
+        assert resp.status_code == 422
+
+
+def _power(seq):
+    return {"v": 1, "id": "HAB-001", "mid": "SIM", "seq": seq, "t": "2026-06-05T12:00:00Z",
+            "type": "power", "bat_v": 8.1, "bat_a": 0.7, "bat_w": 5.7, "bat_pct": 90,
+            "bat_temp_c": 9.0}
+
+
+def _position(seq):
+    return {"seq": seq, "type": "position", "lat": 38.5, "lon": -121.5, "alt_m": 100.0,
+            "agl_m": 90.0, "fix": True, "fix_type": "3d", "sats": 12, "hdop": 0.9, "vdop": 1.1}
+
+
+class TestPacketEndpoint:
+
+    @pytest.mark.asyncio
+    async def test_valid_packet_ingested(self):
+        mgr = ReceiverManager(WebSocketManager(), ReceiverConfig())
+
+        app = build_app(receiver_manager=mgr)
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            resp = await client.post("/api/packet", json={"data": _position(7)})
+        assert resp.status_code == 200
+        assert resp.json() == {"status": "ok", "seq": 7}
+        assert mgr.packet_buffer[0]["lat"] == 38.5
+
+    @pytest.mark.asyncio
+    async def test_null_coordinate_rejected(self):
+        mgr = ReceiverManager(WebSocketManager(), ReceiverConfig())
+        bad = {**_position(2), "lat": None}
+
+        app = build_app(receiver_manager=mgr)
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            resp = await client.post("/api/packet", json={"data": bad})
+            missing = await client.post("/api/packet", json={"data": {"type": "power", "seq": 1}})
+        assert resp.status_code == 422
+        assert resp.json()["detail"][0]["loc"][:2] == ["position", "lat"]
+        assert missing.status_code == 422
+        assert mgr.packet_buffer == []
+
+
+class TestPacketBatchEndpoint:
+
+    @pytest.mark.asyncio
+    async def test_json_array_ingested_in_one_commit(self, tmp_path):
+        mgr = ReceiverManager(WebSocketManager(), ReceiverConfig(), db_path=str(tmp_path / "hab.db"))
+        batch = [_position(1), _power(2), _power(3)]
+
+        app = build_app(receiver_manager=mgr)
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            resp = await client.post("/api/packets/batch", json=batch)
+        assert resp.status_code == 200
+        assert resp.json() == {"status": "ok", "count": 3, "first_rx_seq": 1, "last_rx_seq": 3}
+        await mgr.flush_storage()
+        assert mgr._build_status()["storage"]["commits"] == 1
+        # Envelope and payload fields survive validation unchanged
+        assert mgr.packet_buffer[1] == {**_power(2), "rx_seq": 2, "flight_id": 1}
+        await mgr.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_ndjson_body(self):
+        mgr = ReceiverManager(WebSocketManager(), ReceiverConfig())
+        body = "\n".join(json.dumps(_power(seq)) for seq in range(1, 6)) + "\n"
+
+        app = build_app(receiver_manager=mgr)
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            resp = await client.post(
+                "/api/packets/batch", content=body,
+                headers={"content-type": "application/x-ndjson"},
+            )
+        assert resp.status_code == 200
+        assert resp.json()["count"] == 5
+        assert [p["seq"] for p in mgr.packet_buffer] == [1, 2, 3, 4, 5]
+
+    @pytest.mark.asyncio
+    async def test_invalid_packet_rejects_whole_batch(self):
+        mgr = ReceiverManager(WebSocketManager(), ReceiverConfig())
+        bad = {**_power(2)}
+        del bad["bat_v"]
+
+        app = build_app(receiver_manager=mgr)
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            resp = await client.post("/api/packets/batch", json=[_power(1), bad])
+            unknown = await client.post("/api/packets/batch", json=[{"type": "video", "seq": 1}])
+        assert resp.status_code == 422
+        assert resp.json()["detail"][0]["loc"][:2] == [1, "power"]
+        assert unknown.status_code == 422
+        assert mgr.packet_buffer == []
+
+    @pytest.mark.asyncio
+    async def test_ndjson_error_reports_line(self):
+        body = json.dumps(_power(1)) + "\n" + '{"type": "power", "seq": 2}\n'
+
+        app = build_app(receiver_manager=ReceiverManager(WebSocketManager(), ReceiverConfig()))
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            resp = await client.post(
+                "/api/packets/batch", content=body,
+                headers={"content-type": "application/x-ndjson"},
+            )
+        assert resp.status_code == 422
+        assert resp.json()["detail"][0]["loc"][0] == "line 2"
+
+
+    @pytest.mark.asyncio
+    async def test_oversized_batch_refused_before_validation(self, monkeypatch):
+        mgr = ReceiverManager(WebSocketManager(), ReceiverConfig())
+        monkeypatch.setattr(rest, "MAX_BATCH", 2)
+        monkeypatch.setattr(rest, "MAX_BATCH_BYTES", 1000)
+        # The third line is invalid, but the count is checked first
+        lines = "\n".join([json.dumps(_power(1)), json.dumps(_power(2)), "{}"])
+
+        app = build_app(receiver_manager=mgr)
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            too_many = await client.post(
+                "/api/packets/batch", content=lines,
+                headers={"content-type": "application/x-ndjson"},
+            )
+            too_big = await client.post("/api/packets/batch", content=b"[" + b" " * 1000 + b"]")
+        assert too_many.status_code == 413
+        assert too_big.status_code == 413
+        assert "bytes" in too_big.json()["detail"]
+        assert mgr.packet_buffer == []
+
+
+class TestTrajectoryEndpoint:
+
+    @pytest.mark.asyncio
+    async def test_zoom_selects_level(self):
+        mgr = ReceiverManager(WebSocketManager(), ReceiverConfig())
+        for seq in range(1, 51):
+            await mgr.ingest_packet({"type": "position", "seq": seq,
+                                     "lat": 38.5, "lon": -121.5 + seq * 0.001, "alt_m": 0})
+
+        app = build_app(receiver_manager=mgr)
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            fine = (await client.get("/api/trajectory?zoom=16")).json()
+            coarse = (await client.get("/api/trajectory?zoom=6")).json()
+        assert fine["tolerance_m"] < coarse["tolerance_m"]
+        assert coarse["raw_count"] == 50
+        assert len(coarse["points"]) == 2
+
+
+class TestRollupsEndpoint:
+
+    @pytest.mark.asyncio
+    async def test_returns_buckets(self):
+        mgr = ReceiverManager(WebSocketManager(), ReceiverConfig())
+        for seq in range(1, 6):
+            await mgr.ingest_packet({"type": "environment", "seq": seq, "temp_ext_c": -40.0 - seq})
+
+        app = build_app(receiver_manager=mgr)
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            resp = await client.get("/api/rollups?type=environment&resolution=60&fields=temp_ext_c")
+        assert resp.status_code == 200
+        body = resp.json()
+        stats = [b["fields"]["temp_ext_c"] for b in body["buckets"]]
+        assert sum(s["n"] for s in stats) == 5
+        assert min(s["min"] for s in stats) == -45.0
+
+    @pytest.mark.asyncio
+    async def test_unknown_resolution_is_400(self):
+        app = build_app(receiver_manager=ReceiverManager(WebSocketManager(), ReceiverConfig()))
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            resp = await client.get("/api/rollups?type=environment&resolution=7")
+        assert resp.status_code == 400
+
+
 class TestDevicesEndpoint:
 
     @pytest.mark.asyncio
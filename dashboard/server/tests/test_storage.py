@@ -0,0 +1,241 @@
+# receiver-server/tests/test_storage.py
+import json
+import sqlite3
+
+import pytest
+from storage import (
+    SCHEMA_VERSION,
+    PacketWriter,
+    create_flight,
+    fetch_flights,
+    fetch_positions,
+    last_packet,
+    latest_flight,
+    open_database,
+)
+
+
+def _rows(path):
+    conn = sqlite3.connect(str(path))
+    try:
+        return conn.execute("SELECT rx_seq, type, payload FROM packets ORDER BY rx_seq").fetchall()
+    finally:
+        conn.close()
+
+
+def _pkt(rx_seq, flight_id=1, **fields):
+    return {"rx_seq": rx_seq, "flight_id": flight_id, "seq": rx_seq, **fields}
+
+
+class TestOpenDatabase:
+
+    def test_wal_mode_and_schema(self, tmp_path):
+        conn = open_database(tmp_path / "hab.db")
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+        conn.execute(
+            "SELECT rx_seq, flight_id, seq, received_at, type, payload FROM packets"
+        ).fetchall()
+        assert latest_flight(conn) is None
+        assert last_packet(conn) is None
+        assert conn.execute("PRAGMA user_version").fetchone()[0] == SCHEMA_VERSION
+        conn.close()
+
+    def test_migrates_legacy_blob_table(self, tmp_path):
+        path = tmp_path / "legacy.db"
+        legacy = sqlite3.connect(str(path))
+        legacy.execute(
+            "CREATE TABLE packets (seq INTEGER PRIMARY KEY, received_at TEXT NOT NULL,"
+            " type TEXT NOT NULL, payload TEXT NOT NULL)"
+        )
+        legacy.executemany(
+            "INSERT INTO packets VALUES (?, ?, ?, ?)",
+            [
+                (1, "2026-06-05T12:00:00+00:00", "position",
+                 json.dumps({"type": "position", "seq": 1, "lat": 38.5, "lon": -121.5, "alt_m": 120.0})),
+                (2, "2026-06-05T12:00:01+00:00", "power",
+                 json.dumps({"type": "power", "seq": 2, "bat_v": 7.9})),
+            ],
+        )
+        legacy.commit()
+        legacy.close()
+
+        conn = open_database(path)
+        # Legacy rows become flight 1 with rx_seq = their old seq
+        assert latest_flight(conn) == 1
+        assert fetch_positions(conn, 1) == [{
+            "rx_seq": 1, "seq": 1, "received_at": "2026-06-05T12:00:00+00:00",
+            "lat": 38.5, "lon": -121.5, "alt_m": 120.0,
+        }]
+        ts = conn.execute("SELECT ts FROM positions").fetchone()[0]
+        assert ts == pytest.approx(1780660800.0, abs=0.01)
+        assert last_packet(conn) == (2, 1, 2)
+        indexes = {r[1] for r in conn.execute("PRAGMA index_list(packets)")}
+        assert {"idx_packets_flight_type", "idx_packets_received_at"} <= indexes
+        tables = {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        assert tables == {"flights", "packets", "positions"}
+        assert conn.execute("PRAGMA user_version").fetchone()[0] == SCHEMA_VERSION
+        conn.close()
+
+    def test_migration_skips_positions_without_fix(self, tmp_path):
+        path = tmp_path / "legacy.db"
+        legacy = sqlite3.connect(str(path))
+        legacy.execute(
+            "CREATE TABLE packets (seq INTEGER PRIMARY KEY, received_at TEXT NOT NULL,"
+            " type TEXT NOT NULL, payload TEXT NOT NULL)"
+        )
+        legacy.executemany(
+            "INSERT INTO packets VALUES (?, ?, ?, ?)",
+            [
+                (1, "2026-06-05T12:00:00+00:00", "position",
+                 json.dumps({"type": "position", "seq": 1})),
+                (2, "2026-06-05T12:00:01+00:00", "position",
+                 json.dumps({"type": "position", "seq": 2, "lat": None, "lon": None, "alt_m": 0})),
+                (3, "2026-06-05T12:00:02+00:00", "position",
+                 json.dumps({"type": "position", "seq": 3, "lat": 38.5, "lon": -121.5, "alt_m": 120.0})),
+            ],
+        )
+        legacy.commit()
+        legacy.close()
+
+        conn = open_database(path)
+        # No (0, 0, 0) rows for the packets without a fix; the packets themselves stay
+        assert [p["seq"] for p in fetch_positions(conn, 1)] == [3]
+        assert conn.execute("SELECT COUNT(*) FROM packets").fetchone()[0] == 3
+        conn.close()
+
+    def test_flight_scoped_queries_use_index(self, tmp_path):
+        conn = open_database(tmp_path / "hab.db")
+        plan = conn.execute(
+            "EXPLAIN QUERY PLAN SELECT rx_seq FROM packets "
+            "WHERE flight_id = 2 AND type = 'power' AND rx_seq > 10"
+        ).fetchall()
+        assert "idx_packets_flight_type" in " ".join(str(row) for row in plan)
+        plan = conn.execute(
+            "EXPLAIN QUERY PLAN SELECT rx_seq FROM positions WHERE flight_id = 2 AND rx_seq > 10"
+        ).fetchall()
+        assert "idx_positions_flight" in " ".join(str(row) for row in plan)
+        conn.close()
+
+    def test_create_and_list_flights(self, tmp_path):
+        conn = open_database(tmp_path / "hab.db")
+        first = create_flight(conn, "first packet")
+        second = create_flight(conn, "manual")
+        assert second == first + 1
+        assert latest_flight(conn) == second
+        flights = fetch_flights(conn)
+        assert [(f["id"], f["reason"], f["packets"]) for f in flights] == [
+            (second, "manual", 0), (first, "first packet", 0),
+        ]
+        conn.close()
+
+
+class TestPacketWriter:
+
+    def test_flush_commits_submitted_packets(self, tmp_path):
+        writer = PacketWriter(tmp_path / "hab.db", batch_size=1000, flush_interval_sec=60)
+        for seq in range(1, 6):
+            writer.submit(_pkt(seq, type="power"))
+        assert writer.flush(timeout=5)
+        rows = _rows(tmp_path / "hab.db")
+        assert [r[0] for r in rows] == [1, 2, 3, 4, 5]
+        assert json.loads(rows[0][2]) == _pkt(1, type="power")
+        stats = writer.stats()
+        assert stats["rows_written"] == 5
+        assert stats["commits"] == 1
+        assert stats["backlog"] == 0
+        writer.close()
+
+    def test_positions_written_to_typed_table(self, tmp_path):
+        writer = PacketWriter(tmp_path / "hab.db", batch_size=1000, flush_interval_sec=60)
+        writer.submit(_pkt(3, type="position", lat=38.6, lon=-121.4, alt_m=950.5))
+        writer.submit(_pkt(4, type="motion", vs_mps=5.1))
+        writer.flush(timeout=5)
+        conn = open_database(tmp_path / "hab.db")
+        rows = fetch_positions(conn, 1, since=0)
+        assert [(r["rx_seq"], r["lat"], r["lon"], r["alt_m"]) for r in rows] == [(3, 38.6, -121.4, 950.5)]
+        assert fetch_positions(conn, 1, since=3) == []
+        conn.close()
+        writer.close()
+
+    def test_null_coordinates_do_not_abort_batch(self, tmp_path):
+        writer = PacketWriter(tmp_path / "hab.db", batch_size=1000, flush_interval_sec=60)
+        writer.submit_many([
+            _pkt(1, type="power"),
+            _pkt(2, type="position", lat=None, lon=-121.4, alt_m=950.5),
+            _pkt(3, type="position", lat=38.6, lon=float("nan"), alt_m=950.5),
+            _pkt(4, type="power"),
+        ])
+        writer.flush(timeout=5)
+        assert [r[0] for r in _rows(tmp_path / "hab.db")] == [1, 2, 3, 4]
+        assert writer.stats()["errors"] == 0
+        conn = open_database(tmp_path / "hab.db")
+        assert fetch_positions(conn, 1) == []
+        conn.close()
+        writer.close()
+
+    def test_null_seq_and_type_do_not_abort_batch(self, tmp_path):
+        writer = PacketWriter(tmp_path / "hab.db", batch_size=1000, flush_interval_sec=60)
+        writer.submit_many([
+            _pkt(1, type="power"),
+            {"rx_seq": 2, "flight_id": 1, "seq": None, "type": None},
+            _pkt(3, type="power"),
+        ])
+        writer.flush(timeout=5)
+        assert writer.stats()["errors"] == 0
+        assert [r[:2] for r in _rows(tmp_path / "hab.db")] == [(1, "power"), (2, "unknown"), (3, "power")]
+        conn = open_database(tmp_path / "hab.db")
+        assert conn.execute("SELECT seq FROM packets WHERE rx_seq = 2").fetchone()[0] == 0
+        conn.close()
+        writer.close()
+
+    def test_reused_seq_in_new_flight_keeps_old_rows(self, tmp_path):
+        writer = PacketWriter(tmp_path / "hab.db", batch_size=1000, flush_interval_sec=60)
+        writer.submit({"rx_seq": 1, "flight_id": 1, "seq": 1, "type": "position",
+                       "lat": 1.0, "lon": 1.0, "alt_m": 1.0})
+        writer.submit({"rx_seq": 2, "flight_id": 2, "seq": 1, "type": "position",
+                       "lat": 2.0, "lon": 2.0, "alt_m": 2.0})
+        writer.flush(timeout=5)
+        conn = open_database(tmp_path / "hab.db")
+        assert [r["lat"] for r in fetch_positions(conn, 1)] == [1.0]
+        assert [r["lat"] for r in fetch_positions(conn, 2)] == [2.0]
+        assert last_packet(conn) == (2, 2, 1)
+        conn.close()
+        writer.close()
+
+    def test_batch_size_triggers_commit(self, tmp_path):
+        writer = PacketWriter(tmp_path / "hab.db", batch_size=3, flush_interval_sec=60)
+        for seq in range(1, 7):
+            writer.submit(_pkt(seq, type="motion"))
+        writer.flush(timeout=5)
+        assert writer.stats()["commits"] == 2
+        writer.close()
+
+    def test_submit_many_is_one_transaction(self, tmp_path):
+        writer = PacketWriter(tmp_path / "hab.db", batch_size=10, flush_interval_sec=60)
+        writer.submit_many([_pkt(seq, type="power") for seq in range(1, 36)])
+        writer.flush(timeout=5)
+        assert writer.stats()["commits"] == 1
+        assert writer.stats()["rows_written"] == 35
+        writer.close()
+
+    def test_interval_triggers_commit(self, tmp_path):
+        import time
+
+        writer = PacketWriter(tmp_path / "hab.db", batch_size=1000, flush_interval_sec=0.01)
+        writer.submit(_pkt(1, type="position"))
+        for _ in range(100):
+            if writer.stats()["rows_written"]:
+                break
+            time.sleep(0.01)
+        assert writer.stats()["rows_written"] == 1
+        writer.close()
+
+    def test_close_flushes_queue(self, tmp_path):
+        writer = PacketWriter(tmp_path / "hab.db", batch_size=1000, flush_interval_sec=60)
+        writer.submit(_pkt(42, type="environment"))
+        writer.close()
+        assert [r[0] for r in _rows(tmp_path / "hab.db")] == [42]
+        # Submitting after close is a silent no-op
+        writer.submit(_pkt(43, type="environment"))
+        assert writer.flush() is True
@@ -0,0 +1,101 @@
+# receiver-server/tests/test_trajectory.py
+import math
+
+import numpy as np
+import pytest
+from trajectory import Trajectory, simplify, tolerance_for_zoom
+
+
+def _spiral(n):
+    """A drifting balloon track: slow circles carried east by the wind."""
+    t = np.arange(n)
+    lat = 38.5 + 0.002 * np.sin(t / 40.0)
+    lon = -121.5 + 0.00005 * t + 0.002 * np.cos(t / 40.0)
+    return lat, lon
+
+
+class TestSimplify:
+
+    def test_straight_line_keeps_endpoints(self):
+        pts = np.column_stack([np.linspace(38.0, 38.1, 50), np.full(50, -121.0)])
+        assert simplify(pts, 1.0).tolist() == [0, 49]
+
+    def test_keeps_corner(self):
+        pts = np.array([[0.0, 0.0], [0.0, 0.01], [0.0, 0.02], [0.01, 0.02], [0.02, 0.02]])
+        assert simplify(pts, 1.0).tolist() == [0, 2, 4]
+
+    def test_short_inputs(self):
+        assert simplify(np.zeros((0, 2)), 1.0).tolist() == []
+        assert simplify(np.zeros((2, 2)), 1.0).tolist() == [0, 1]
+
+
+class TestTrajectory:
+
+    def test_levels_shrink_with_tolerance(self):
+        traj = Trajectory(chunk_size=128)
+        lat, lon = _spiral(5000)
+        for i in range(5000):
+            traj.add(i + 1, lat[i], lon[i], 100.0 + i)
+        sizes = [len(traj.query(t)["points"]) for t in traj.tolerances]
+        assert sizes == sorted(sizes, reverse=True)
+        assert sizes[0] < 5000
+        assert sizes[-1] < 200
+
+    def test_endpoints_and_order_preserved(self):
+        traj = Trajectory(chunk_size=64)
+        lat, lon = _spiral(1000)
+        for i in range(1000):
+            traj.add(i + 1, lat[i], lon[i], float(i))
+        result = traj.query(80.0)
+        assert result["tolerance_m"] == 80.0
+        assert result["raw_count"] == 1000
+        assert result["last_rx_seq"] == 1000
+        alts = [p[2] for p in result["points"]]
+        assert alts[0] == 0.0 and alts[-1] == 999.0
+        assert alts == sorted(alts)
+
+    def test_points_within_tolerance_of_track(self):
+        traj = Trajectory(tolerances_m=(20.0,), chunk_size=100)
+        lat, lon = _spiral(600)
+        for i in range(600):
+            traj.add(i + 1, lat[i], lon[i], 0.0)
+        kept = {p[2] for p in traj.query(20.0)["points"]}
+        assert len(kept) < 600
+        # Every raw point lies within the tolerance of the simplified polyline
+        simplified = np.array(traj.query(20.0)["points"])[:, :2]
+        coslat = math.cos(math.radians(38.5))
+        sx = simplified[:, 1] * 111_320.0 * coslat
+        sy = simplified[:, 0] * 110_540.0
+        for la, lo in zip(lat, lon):
+            px, py = lo * 111_320.0 * coslat, la * 110_540.0
+            best = min(
+                _segment_distance(px, py, sx[j], sy[j], sx[j + 1], sy[j + 1])
+                for j in range(len(sx) - 1)
+            )
+            assert best <= 20.5
+
+    def test_query_below_finest_uses_finest(self):
+        traj = Trajectory()
+        traj.add(1, 38.5, -121.5, 0.0)
+        assert traj.query(0.0)["tolerance_m"] == traj.tolerances[0]
+
+    def test_clear(self):
+        traj = Trajectory()
+        traj.add(1, 38.5, -121.5, 0.0)
+        traj.clear()
+        assert traj.query()["points"] == []
+        assert traj.count == 0
+
+
+def test_tolerance_for_zoom():
+    assert tolerance_for_zoom(0, 0.0) == pytest.approx(156_543.03)
+    assert tolerance_for_zoom(10, 60.0) == pytest.approx(156_543.03 * 0.5 / 1024)
+
+
+def _segment_distance(px, py, ax, ay, bx, by):
+    dx, dy = bx - ax, by - ay
+    length2 = dx * dx + dy * dy
+    if length2 == 0:
+        return math.hypot(px - ax, py - ay)
+    t = max(0.0, min(1.0, ((px - ax) * dx + (py - ay) * dy) / length2))
+    return math.hypot(px - (ax + t * dx), py - (ay + t * dy))
@@ -116,3 +116,220 @@ class TestWebSocketManager:
         mgr.push_command(cmd)
         received = await mgr.get_command()
         assert received == cmd
+
+
+class TestCoalescedBroadcast:
+
+    @pytest.mark.asyncio
+    async def test_queued_telemetry_sent_as_one_batch_frame(self):
+        mgr = WebSocketManager(batch_window_sec=60)
+        ws = MockWebSocket()
+        await mgr.connect(ws)
+        for seq in range(1, 4):
+            mgr.queue_telemetry({"type": "power", "seq": seq})
+        assert ws.sent == []
+        await mgr.flush()
+        assert len(ws.sent) == 1
+        payload = json.loads(ws.sent[0])
+        assert payload["type"] == "telemetry_batch"
+        assert [p["seq"] for p in payload["data"]] == [1, 2, 3]
+        await mgr.close()
+
+    @pytest.mark.asyncio
+    async def test_single_queued_packet_keeps_telemetry_frame(self):
+        mgr = WebSocketManager(batch_window_sec=0.01)
+        ws = MockWebSocket()
+        await mgr.connect(ws)
+        mgr.queue_telemetry({"type": "position", "seq": 7})
+        await asyncio.sleep(0.05)
+        assert len(ws.sent) == 1
+        payload = json.loads(ws.sent[0])
+        assert payload["type"] == "telemetry"
+        assert payload["data"]["seq"] == 7
+
+    @pytest.mark.asyncio
+    async def test_superseded_status_collapsed(self):
+        mgr = WebSocketManager(batch_window_sec=60)
+        ws = MockWebSocket()
+        await mgr.connect(ws)
+        mgr.queue_status({"state": "running", "uptime_sec": 1.0})
+        mgr.queue_status({"state": "running", "uptime_sec": 2.0})
+        await mgr.close()
+        assert len(ws.sent) == 1
+        assert json.loads(ws.sent[0])["data"]["uptime_sec"] == 2.0
+
+    @pytest.mark.asyncio
+    async def test_immediate_status_drops_queued_status(self):
+        mgr = WebSocketManager(batch_window_sec=60)
+        ws = MockWebSocket()
+        await mgr.connect(ws)
+        mgr.queue_status({"state": "running"})
+        await mgr.broadcast_status({"state": "idle"})
+        await mgr.close()
+        assert [json.loads(m)["data"]["state"] for m in ws.sent] == ["idle"]
+
+
+class TestReconnectBacklog:
+
+    @pytest.mark.asyncio
+    async def test_backlog_sent_before_live_frames(self):
+        mgr = WebSocketManager(batch_window_sec=60)
+        ws = MockWebSocket()
+        frames = [{"type": "sync", "data": {"complete": True}},
+                  {"type": "telemetry_batch", "data": [{"rx_seq": 1}, {"rx_seq": 2}]}]
+        await mgr.connect(ws, backlog=lambda: (frames, 2))
+        await mgr.broadcast({"type": "status", "data": {}})
+        assert [json.loads(m)["type"] for m in ws.sent] == ["sync", "telemetry_batch", "status"]
+
+    @pytest.mark.asyncio
+    async def test_queued_packets_in_backlog_not_repeated(self):
+        mgr = WebSocketManager(batch_window_sec=60)
+        old = MockWebSocket()
+        await mgr.connect(old)
+        # Packets 1-2 are queued but not flushed when the new client syncs
+        mgr.queue_telemetry({"rx_seq": 1})
+        mgr.queue_telemetry({"rx_seq": 2})
+        new = MockWebSocket()
+        await mgr.connect(new, backlog=lambda: ([{"type": "telemetry_batch",
+                                                   "data": [{"rx_seq": 1}, {"rx_seq": 2}]}], 2))
+        mgr.queue_telemetry({"rx_seq": 3})
+        await mgr.close()
+        assert json.loads(old.sent[-1])["data"] == [{"rx_seq": 1}, {"rx_seq": 2}, {"rx_seq": 3}]
+        sent = [json.loads(m) for m in new.sent]
+        assert sent[-1] == {"type": "telemetry", "data": {"rx_seq": 3}}
+        assert len(sent) == 2
+        # The floor only applies to the first flush after connecting
+        mgr.queue_telemetry({"rx_seq": 4})
+        await mgr.flush()
+        assert json.loads(new.sent[-1])["data"] == {"rx_seq": 4}
+
+
+class TestTopicSubscriptions:
+
+    @pytest.mark.asyncio
+    async def test_default_receives_everything(self):
+        mgr = WebSocketManager()
+        ws = MockWebSocket()
+        await mgr.connect(ws)
+        await mgr.broadcast_spectrum(SpectrumFrame(fc_hz=0, span_hz=0, points=[0.0], ts=0.0))
+        await mgr.broadcast_error("X", "y")
+        assert [json.loads(m)["type"] for m in ws.sent] == ["spectrum", "error"]
+
+    @pytest.mark.asyncio
+    async def test_unsubscribed_topic_not_sent(self):
+        mgr = WebSocketManager(batch_window_sec=60)
+        phone = MockWebSocket()
+        desk = MockWebSocket()
+        await mgr.connect(phone)
+        await mgr.connect(desk)
+        mgr.subscribe(phone, ["telemetry.position", "status"])
+        await mgr.broadcast_spectrum(SpectrumFrame(fc_hz=0, span_hz=0, points=[0.0], ts=0.0))
+        mgr.queue_telemetry({"type": "position", "seq": 1})
+        mgr.queue_telemetry({"type": "power", "seq": 2})
+        await mgr.flush()
+        assert [json.loads(m) for m in phone.sent] == [
+            {"type": "telemetry", "data": {"type": "position", "seq": 1}},
+        ]
+        assert [json.loads(m)["type"] for m in desk.sent] == ["spectrum", "telemetry_batch"]
+
+    @pytest.mark.asyncio
+    async def test_rate_cap_drops_excess(self):
+        mgr = WebSocketManager()
+        ws = MockWebSocket()
+        await mgr.connect(ws)
+        mgr.subscribe(ws, rates={"status": 1})
+        for _ in range(5):
+            await mgr.broadcast_status({"running": True})
+        assert len(ws.sent) == 1
+        await mgr.close()
+
+    @pytest.mark.asyncio
+    async def test_rate_cap_sends_latest_on_trailing_edge(self):
+        mgr = WebSocketManager()
+        ws = MockWebSocket()
+        await mgr.connect(ws)
+        mgr.subscribe(ws, rates={"status": 20})
+        for state in ("starting", "running", "idle"):
+            await mgr.broadcast_status({"state": state})
+        assert [json.loads(m)["data"]["state"] for m in ws.sent] == ["starting"]
+        await asyncio.sleep(0.1)
+        # The last suppressed status goes out once the interval has passed
+        assert [json.loads(m)["data"]["state"] for m in ws.sent] == ["starting", "idle"]
+        await asyncio.sleep(0.1)
+        assert len(ws.sent) == 2
+
+    @pytest.mark.asyncio
+    async def test_trailing_telemetry_is_latest_per_topic(self):
+        mgr = WebSocketManager(batch_window_sec=60)
+        ws = MockWebSocket()
+        await mgr.connect(ws)
+        mgr.subscribe(ws, rates={"telemetry.position": 20})
+        for seq in range(1, 4):
+            mgr.queue_telemetry({"type": "position", "seq": seq})
+        mgr.queue_telemetry({"type": "power", "seq": 4})
+        await mgr.flush()
+        assert json.loads(ws.sent[0])["data"] == [
+            {"type": "position", "seq": 1}, {"type": "power", "seq": 4},
+        ]
+        await asyncio.sleep(0.1)
+        assert [json.loads(m) for m in ws.sent[1:]] == [
+            {"type": "telemetry", "data": {"type": "position", "seq": 3}},
+        ]
+
+    @pytest.mark.asyncio
+    async def test_held_frame_dropped_on_unsubscribe(self):
+        mgr = WebSocketManager()
+        ws = MockWebSocket()
+        await mgr.connect(ws)
+        mgr.subscribe(ws, rates={"status": 20})
+        await mgr.broadcast_status({"state": "running"})
+        await mgr.broadcast_status({"state": "idle"})
+        mgr.unsubscribe(ws, ["status"])
+        await asyncio.sleep(0.1)
+        assert len(ws.sent) == 1
+
+    @pytest.mark.asyncio
+    async def test_telemetry_wildcard_and_unsubscribe(self):
+        mgr = WebSocketManager()
+        ws = MockWebSocket()
+        await mgr.connect(ws)
+        sub = mgr.subscribe(ws, ["telemetry"])
+        assert sub["topics"] == sorted(
+            ["telemetry.position", "telemetry.motion", "telemetry.environment", "telemetry.power"]
+        )
+        sub = mgr.unsubscribe(ws, ["telemetry.motion"])
+        assert "telemetry.motion" not in sub["topics"]
+        with pytest.raises(ValueError):
+            mgr.subscribe(ws, ["video"])
+
+    @pytest.mark.asyncio
+    async def test_invalid_subscribe_changes_nothing(self):
+        mgr = WebSocketManager()
+        ws = MockWebSocket()
+        await mgr.connect(ws)
+        before = mgr.subscribe(ws, ["status"], {"status": 2})
+        for topics, rates in ((["spectrum"], {"video": 1}), (["spectrum"], {"status": -1}),
+                              (None, {"status": 0}), (None, {"status": "fast"}),
+                              (None, {"status": float("inf")})):
+            with pytest.raises(ValueError):
+                mgr.subscribe(ws, topics, rates)
+            assert mgr.subscribe(ws) == before
+        # None still removes a cap
+        assert mgr.subscribe(ws, rates={"status": None})["rates"] == {}
+
+    @pytest.mark.asyncio
+    async def test_same_selection_serialized_once(self, monkeypatch):
+        import ws_manager
+
+        calls = []
+        real_dumps = ws_manager.dumps
+        monkeypatch.setattr(ws_manager, "dumps", lambda obj: calls.append(obj) or real_dumps(obj))
+        mgr = WebSocketManager(batch_window_sec=60)
+        clients = [MockWebSocket() for _ in range(4)]
+        for ws in clients:
+            await mgr.connect(ws)
+        mgr.subscribe(clients[0], ["telemetry.position"])
+        mgr.queue_telemetry({"type": "position", "seq": 1})
+        mgr.queue_telemetry({"type": "power", "seq": 2})
+        await mgr.flush()
+        assert len(calls) == 2
@@ -0,0 +1,154 @@
+# receiver-server/trajectory.py
+"""Multi-resolution flight track for map trails.
+
+Each level keeps a Douglas–Peucker simplification of the track at a fixed
+tolerance (metres).  Points are simplified incrementally in chunks: once a
+level's open tail reaches ``chunk_size`` points it is simplified and the
+result committed, with the last kept point anchoring the next chunk.  A query
+only simplifies the open tail, so its cost is bounded by the chunk size, not
+the flight length.
+"""
+
+from __future__ import annotations
+
+import math
+
+import numpy as np
+
+# Tolerances in metres, finest first — roughly one screen pixel at map zoom
+# levels 15, 13, 11, 9 and 7
+DEFAULT_TOLERANCES_M = (5.0, 20.0, 80.0, 300.0, 1200.0)
+
+_M_PER_DEG_LAT = 110_540.0
+_M_PER_DEG_LON = 111_320.0
+# Web-Mercator metres per pixel at zoom 0 on the equator (256 px tiles)
+_M_PER_PX_ZOOM0 = 156_543.03
+
+
+def simplify(points: np.ndarray, tolerance_m: float) -> np.ndarray:
+    """Indices of the points Douglas–Peucker keeps at *tolerance_m*.
+
+    *points* is an ``(n, 2)`` array of ``(lat, lon)``.  The first and last
+    points are always kept.
+    """
+    n = len(points)
+    if n <= 2:
+        return np.arange(n)
+    # Local equirectangular projection to metres around the chunk's mean
+    # latitude — accurate to well under a pixel over one chunk
+    coslat = math.cos(math.radians(float(points[:, 0].mean())))
+    xy = np.empty((n, 2))
+    xy[:, 0] = points[:, 1] * (_M_PER_DEG_LON * coslat)
+    xy[:, 1] = points[:, 0] * _M_PER_DEG_LAT
+
+    keep = np.zeros(n, dtype=bool)
+    keep[0] = keep[-1] = True
+    stack = [(0, n - 1)]
+    while stack:
+        first, last = stack.pop()
+        if last - first < 2:
+            continue
+        seg = xy[first + 1:last]
+        a = xy[first]
+        d = xy[last] - a
+        norm = math.hypot(d[0], d[1])
+        rel = seg - a
+        if norm == 0.0:
+            dist = np.hypot(rel[:, 0], rel[:, 1])
+        else:
+            dist = np.abs(d[0] * rel[:, 1] - d[1] * rel[:, 0]) / norm
+        i = int(dist.argmax())
+        if dist[i] > tolerance_m:
+            split = first + 1 + i
+            keep[split] = True
+            stack.append((first, split))
+            stack.append((split, last))
+    return np.flatnonzero(keep)
+
+
+def tolerance_for_zoom(zoom: float, lat: float) -> float:
+    """Ground size of one map pixel (metres) at *zoom* and latitude *lat*."""
+    return _M_PER_PX_ZOOM0 * math.cos(math.radians(lat)) / (2.0 ** zoom)
+
+
+class _Level:
+    def __init__(self, tolerance_m: float, chunk_size: int):
+        self.tolerance_m = tolerance_m
+        self.chunk_size = chunk_size
+        self.committed: list[tuple] = []
+        self.tail: list[tuple] = []
+
+    def add(self, point: tuple):
+        self.tail.append(point)
+        if len(self.tail) >= self.chunk_size:
+            kept = self._simplify_tail()
+            self.committed.extend(kept[:-1])
+            # The last kept point stays as the anchor of the next chunk
+            self.tail = [kept[-1]]
+
+    def points(self) -> list[tuple]:
+        return self.committed + self._simplify_tail()
+
+    def _simplify_tail(self) -> list[tuple]:
+        if len(self.tail) <= 2:
+            return list(self.tail)
+        coords = np.array([(p[1], p[2]) for p in self.tail])
+        return [self.tail[i] for i in simplify(coords, self.tolerance_m)]
+
+
+class Trajectory:
+    """Track of one flight, kept at several simplification levels.
+
+    Points are ``(rx_seq, lat, lon, alt_m)`` tuples and must be added in
+    rx_seq order.
+    """
+
+    def __init__(self, tolerances_m=DEFAULT_TOLERANCES_M, chunk_size: int = 256):
+        self._levels = [_Level(t, chunk_size) for t in sorted(tolerances_m)]
+        self._count = 0
+        self._last: tuple | None = None
+
+    @property
+    def count(self) -> int:
+        """Raw position fixes added so far."""
+        return self._count
+
+    @property
+    def last_point(self) -> tuple | None:
+        """The most recent ``(rx_seq, lat, lon, alt_m)``, if any."""
+        return self._last
+
+    @property
+    def tolerances(self) -> list[float]:
+        return [level.tolerance_m for level in self._levels]
+
+    def add(self, rx_seq: int, lat: float, lon: float, alt_m: float):
+        point = (rx_seq, lat, lon, alt_m)
+        for level in self._levels:
+            level.add(point)
+        self._count += 1
+        self._last = point
+
+    def clear(self):
+        for level in self._levels:
+            level.committed = []
+            level.tail = []
+        self._count = 0
+        self._last = None
+
+    def query(self, tolerance_m: float = 0.0) -> dict:
+        """Simplified track at the coarsest level not exceeding *tolerance_m*.
+
+        Falls back to the finest level when *tolerance_m* is below it.
+        """
+        level = self._levels[0]
+        for candidate in self._levels:
+            if candidate.tolerance_m <= tolerance_m:
+                level = candidate
+        points = level.points()
+        return {
+            "tolerance_m": level.tolerance_m,
+            "raw_count": self._count,
+            "last_rx_seq": self._last[0] if self._last else 0,
+            "points": [[lat, lon, alt_m] for _, lat, lon, alt_m in points],
+        }
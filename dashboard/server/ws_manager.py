@@ -1,45 +1,249 @@
 # receiver-server/ws_manager.py
-"""WebSocket connection manager — multiplexed broadcast to all clients."""
+"""WebSocket connection manager — multiplexed broadcast to all clients.
+
+Every outgoing message is serialized once and the same text frame is fanned
+out to all connections.  Telemetry and periodic status updates can also be
+queued: queued telemetry packets arriving within ``batch_window_sec`` are sent
+as a single ``telemetry_batch`` frame, and a queued status replaces any status
+that has not been sent yet.
+
+A reconnecting client can pass a backlog callback to ``connect``: its frames
+are sent before any live frame, and queued telemetry already covered by the
+backlog is not sent to that client again.
+
+Clients receive every topic (see ``TOPICS``) until they subscribe to a
+subset, optionally with a per-topic rate cap in messages per second.  Frames
+over a client's cap are held back rather than sent; the latest held frame
+per topic goes out once the interval has passed (trailing edge), so a capped
+client never keeps a stale status.  Each distinct frame is still serialized
+only once.
+"""
 
 from __future__ import annotations
 
 import asyncio
-import json
+import math
+import time
+from typing import Callable
 
 from fastapi import WebSocket
 from models import ReceiverStatus, SpectrumFrame
+from serialization import dumps
+
+
+TELEMETRY_TOPICS = (
+    "telemetry.position",
+    "telemetry.motion",
+    "telemetry.environment",
+    "telemetry.power",
+)
+TOPICS = ("status", "spectrum", "logs") + TELEMETRY_TOPICS
+
+# Message type -> topic; types not listed (e.g. sync) always go out
+_MESSAGE_TOPICS = {"status": "status", "spectrum": "spectrum", "error": "logs"}
+
+
+class _Client:
+    """Per-connection state.  ``send_lock`` keeps each client's frames in
+    order; ``floor_seq`` is the last rx_seq its reconnect backlog covered;
+    ``topics`` and ``min_interval`` hold its subscriptions and rate caps;
+    ``held`` is the latest frame per capped topic still waiting to go out."""
+
+    __slots__ = ("ws", "send_lock", "floor_seq", "topics", "min_interval", "last_sent",
+                 "held", "trailing")
+
+    def __init__(self, ws):
+        self.ws = ws
+        self.send_lock = asyncio.Lock()
+        self.floor_seq = 0
+        self.topics: set[str] = set(TOPICS)
+        self.min_interval: dict[str, float] = {}
+        self.last_sent: dict[str, float] = {}
+        self.held: dict[str, str] = {}
+        self.trailing: dict[str, asyncio.Task] = {}
+
+    def accepts(self, topic: str | None, now: float) -> bool:
+        """True if a message on *topic* should go out now (records the send)."""
+        if topic is None:
+            return True
+        if topic not in self.topics:
+            return False
+        interval = self.min_interval.get(topic)
+        if interval is not None:
+            if now - self.last_sent.get(topic, float("-inf")) < interval:
+                return False
+            self.last_sent[topic] = now
+            # Whatever was held back is older than this frame
+            self.held.pop(topic, None)
+        return True
+
+    def capped(self, topic: str | None) -> bool:
+        """True if *topic* is subscribed but was refused by its rate cap."""
+        return topic is not None and topic in self.topics and topic in self.min_interval
+
+    def cancel_trailing(self):
+        for task in self.trailing.values():
+            task.cancel()
+        self.trailing.clear()
+        self.held.clear()
 
 
 class WebSocketManager:
-    def __init__(self):
-        self._connections: list[WebSocket | object] = []
+    def __init__(self, batch_window_sec: float = 0.05):
+        self._clients: dict[WebSocket | object, _Client] = {}
         self._command_queue: asyncio.Queue = asyncio.Queue()
         self._lock = asyncio.Lock()
+        self._batch_window = batch_window_sec
+        self._pending_telemetry: list[dict] = []
+        self._pending_status: dict | None = None
+        self._flush_task: asyncio.Task | None = None
 
     @property
     def connection_count(self) -> int:
-        return len(self._connections)
+        return len(self._clients)
+
+    async def connect(self, ws, backlog: Callable[[], tuple[list[dict], int]] | None = None):
+        """Accept *ws* and start sending it broadcasts.
 
-    async def connect(self, ws):
+        *backlog* is called at the instant the client is registered and
+        returns ``(frames, floor_seq)``: the frames are sent before any live
+        frame, and queued telemetry with ``rx_seq <= floor_seq`` is skipped
+        for this client since the backlog already carried it.
+        """
         await ws.accept()
-        async with self._lock:
-            self._connections.append(ws)
+        client = _Client(ws)
+        frames: list[dict] = []
+        async with client.send_lock:
+            async with self._lock:
+                self._clients[ws] = client
+                if backlog is not None:
+                    frames, client.floor_seq = backlog()
+            for frame in frames:
+                try:
+                    await ws.send_text(dumps(frame))
+                except Exception:
+                    break
 
     async def disconnect(self, ws):
         async with self._lock:
-            if ws in self._connections:
-                self._connections.remove(ws)
+            client = self._clients.pop(ws, None)
+        if client is not None:
+            client.cancel_trailing()
+
+    # ── Subscriptions ──────────────────────────────────────────────────
+
+    def subscribe(self, ws, topics: list[str] | None = None,
+                  rates: dict[str, float] | None = None) -> dict:
+        """Limit *ws* to *topics* (``None`` keeps the current set) and set
+        per-topic rate caps in messages/s (``None`` removes a cap).
+
+        ``"telemetry"`` expands to every ``telemetry.*`` topic.  Returns the
+        client's resulting subscription; raises ValueError for unknown topics
+        or a rate that is not a positive number, leaving the subscription
+        unchanged.
+        """
+        client = self._clients.get(ws)
+        if client is None:
+            raise ValueError("Not connected")
+        new_topics = _expand_topics(topics) if topics is not None else None
+        intervals: dict[str, float | None] = {}
+        for topic, rate in (rates or {}).items():
+            interval = None
+            if rate is not None:
+                try:
+                    rate = float(rate)
+                except (TypeError, ValueError):
+                    raise ValueError(f"Invalid rate for {topic!r}: {rate!r}") from None
+                if not rate > 0 or math.isinf(rate):
+                    raise ValueError(f"Rate for {topic!r} must be positive, got {rate!r}")
+                interval = 1.0 / rate
+            for name in _expand_topics([topic]):
+                intervals[name] = interval
+
+        if new_topics is not None:
+            client.topics = new_topics
+        for name, interval in intervals.items():
+            if interval is None:
+                client.min_interval.pop(name, None)
+            else:
+                client.min_interval[name] = interval
+        return _subscription(client)
+
+    def unsubscribe(self, ws, topics: list[str]) -> dict:
+        """Stop sending *topics* to *ws*; returns the resulting subscription."""
+        client = self._clients.get(ws)
+        if client is None:
+            raise ValueError("Not connected")
+        client.topics -= _expand_topics(topics)
+        return _subscription(client)
+
+    async def send(self, ws, message: dict):
+        """Send *message* to one client only (e.g. a command reply)."""
+        client = self._clients.get(ws)
+        if client is not None:
+            await self._send_text(dumps(message), [client])
 
     async def broadcast(self, message: dict):
-        dead = []
-        text = json.dumps(message)
+        topic = _MESSAGE_TOPICS.get(message.get("type"))
+        if message.get("type") == "packet":
+            topic = _telemetry_topic(message.get("data", {}))
         async with self._lock:
-            conns = list(self._connections)
-        for ws in conns:
+            clients = list(self._clients.values())
+        held: list[_Client] = []
+        if topic is not None:
+            now = time.monotonic()
+            accepted = []
+            for client in clients:
+                if client.accepts(topic, now):
+                    accepted.append(client)
+                elif client.capped(topic):
+                    held.append(client)
+            clients = accepted
+        if not clients and not held:
+            return
+        text = dumps(message)
+        for client in held:
+            self._hold(client, topic, text)
+        if clients:
+            await self._send_text(text, clients)
+
+    def _hold(self, client: _Client, topic: str, text: str):
+        """Keep *text* as *client*'s latest capped frame on *topic* and make
+        sure it is sent when the topic's interval runs out."""
+        client.held[topic] = text
+        task = client.trailing.get(topic)
+        if task is None or task.done():
+            client.trailing[topic] = asyncio.create_task(self._send_trailing(client, topic))
+
+    async def _send_trailing(self, client: _Client, topic: str):
+        while True:
+            interval = client.min_interval.get(topic, 0.0)
+            wait = client.last_sent.get(topic, float("-inf")) + interval - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            now = time.monotonic()
+            text = client.held.get(topic)
+            if text is None:
+                break
+            if client.accepts(topic, now) or not client.capped(topic):
+                # Sent now, or the cap/subscription changed meanwhile
+                client.held.pop(topic, None)
+                if topic in client.topics:
+                    await self._send_text(text, [client])
+                break
+        client.trailing.pop(topic, None)
+
+    async def _send_text(self, text: str, clients: list[_Client] | None = None):
+        if clients is None:
+            async with self._lock:
+                clients = list(self._clients.values())
+        dead = []
+        for client in clients:
             try:
-                await ws.send_text(text)
+                async with client.send_lock:
+                    await client.ws.send_text(text)
             except Exception:
-                dead.append(ws)
+                dead.append(client.ws)
         for ws in dead:
             await self.disconnect(ws)
 
@@ -47,11 +251,9 @@ class WebSocketManager:
         await self.broadcast({"type": "packet", "data": packet})
 
     async def broadcast_status(self, status: ReceiverStatus | dict):
-        if isinstance(status, ReceiverStatus):
-            data = status.model_dump()
-        else:
-            data = status
-        await self.broadcast({"type": "status", "data": data})
+        # An immediate status supersedes whatever periodic status is queued
+        self._pending_status = None
+        await self.broadcast({"type": "status", "data": _status_data(status)})
 
     async def broadcast_spectrum(self, spectrum: SpectrumFrame):
         await self.broadcast({"type": "spectrum", "data": spectrum.model_dump()})
@@ -59,8 +261,119 @@ class WebSocketManager:
     async def broadcast_error(self, code: str, message: str):
         await self.broadcast({"type": "error", "data": {"code": code, "message": message}})
 
+    # ── Coalesced broadcasts ───────────────────────────────────────────
+
+    def queue_telemetry(self, packet: dict):
+        """Queue a telemetry packet for the next coalesced frame."""
+        self._pending_telemetry.append(packet)
+        self._schedule_flush()
+
+    def queue_status(self, status: ReceiverStatus | dict):
+        """Queue a status update, replacing any status not yet sent."""
+        self._pending_status = _status_data(status)
+        self._schedule_flush()
+
+    def _schedule_flush(self):
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self):
+        await asyncio.sleep(self._batch_window)
+        self._flush_task = None
+        await self.flush()
+
+    async def flush(self):
+        """Send everything queued so far (status first, then telemetry)."""
+        status, self._pending_status = self._pending_status, None
+        packets, self._pending_telemetry = self._pending_telemetry, []
+        if status is not None:
+            await self.broadcast({"type": "status", "data": status})
+        if not packets:
+            return
+        async with self._lock:
+            clients = list(self._clients.values())
+        now = time.monotonic()
+        topics = [_telemetry_topic(p) for p in packets]
+        # Clients that see the same subset of the batch share one frame
+        groups: dict[tuple[int, ...], list[_Client]] = {}
+        held_frames: dict[int, str] = {}
+        for client in clients:
+            # Freshly synced clients already got part of this batch
+            floor, client.floor_seq = client.floor_seq, 0
+            selected = []
+            latest_capped: dict[str, int] = {}
+            for i, packet in enumerate(packets):
+                if floor and packet.get("rx_seq", 0) <= floor:
+                    continue
+                if client.accepts(topics[i], now):
+                    selected.append(i)
+                elif client.capped(topics[i]):
+                    latest_capped[topics[i]] = i
+            for topic, i in latest_capped.items():
+                if i not in held_frames:
+                    held_frames[i] = dumps(_telemetry_frame([packets[i]]))
+                self._hold(client, topic, held_frames[i])
+            if selected:
+                groups.setdefault(tuple(selected), []).append(client)
+        for selected, members in groups.items():
+            frame = _telemetry_frame([packets[i] for i in selected])
+            await self._send_text(dumps(frame), members)
+
+    async def close(self):
+        """Cancel the pending flush timer and send anything still queued.
+
+        Frames held back by rate caps are discarded.
+        """
+        task, self._flush_task = self._flush_task, None
+        if task is not None and not task.done():
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        await self.flush()
+        for client in list(self._clients.values()):
+            client.cancel_trailing()
+
     def push_command(self, message: dict):
         self._command_queue.put_nowait(message)
 
     async def get_command(self) -> dict:
         return await self._command_queue.get()
+
+
+def _telemetry_topic(packet: dict) -> str | None:
+    topic = f"telemetry.{packet.get('type')}"
+    # Packets of an unknown type are not filterable and always go out
+    return topic if topic in TELEMETRY_TOPICS else None
+
+
+def _expand_topics(topics: list[str]) -> set[str]:
+    expanded = set()
+    for topic in topics:
+        if topic == "telemetry":
+            expanded.update(TELEMETRY_TOPICS)
+        elif topic in TOPICS:
+            expanded.add(topic)
+        else:
+            raise ValueError(f"Unknown topic: {topic!r}")
+    return expanded
+
+
+def _subscription(client: _Client) -> dict:
+    return {
+        "topics": sorted(client.topics),
+        "rates": {t: round(1.0 / i, 3) for t, i in sorted(client.min_interval.items())},
+    }
+
+
+def _telemetry_frame(packets: list[dict]) -> dict:
+    if len(packets) == 1:
+        return {"type": "telemetry", "data": packets[0]}
+    return {"type": "telemetry_batch", "data": packets}
+
+
+def _status_data(status: ReceiverStatus | dict) -> dict:
+    if isinstance(status, ReceiverStatus):
+        return status.model_dump()
+    return status
@@ -22,7 +22,7 @@ export function App() {
     lastPacketAge,
     metricHistory,
     newLinkStatus,
-    loadPositions,
+    loadTrajectory,
   } = useHabApi();
 
   useEffect(() => {
@@ -62,7 +62,7 @@ export function App() {
           packetRate={packetRate}
           logEntries={logEntries}
           metricHistory={metricHistory}
-          loadPositions={loadPositions}
+          loadTrajectory={loadTrajectory}
         />
       )}
 
@@ -1,22 +1,18 @@
 import { useEffect, useRef, useState, useMemo } from 'react';
-import { MapContainer, TileLayer, Polyline, CircleMarker, Popup, useMap } from 'react-leaflet';
+import { MapContainer, TileLayer, Polyline, CircleMarker, Popup, useMap, useMapEvents } from 'react-leaflet';
 import type { LatLngTuple } from 'leaflet';
 import L from 'leaflet';
-
-interface PositionPoint {
-  seq: number;
-  lat: number;
-  lon: number;
-  alt_m: number;
-}
+import { TrajectoryResult } from '../types';
 
 interface MapCardProps {
   lat: number;
   lon: number;
   alt_m: number;
-  loadPositions: (since: number) => Promise<PositionPoint[]>;
+  loadTrajectory: (zoom: number) => Promise<TrajectoryResult>;
 }
 
+const INITIAL_ZOOM = 5;
+
 const DARK_TILE_URL = 'https://{s}.basemaps.cartocdn.com/dark_all/{z}/{x}/{y}{r}.png';
 const DARK_TILE_ATTR = '&copy; <a href="https://www.openstreetmap.org/copyright">OpenStreetMap</a> contributors &copy; <a href="https://carto.com/">CARTO</a>';
 
@@ -67,24 +63,38 @@ function LocateButton({ lat, lon }: { lat: number; lon: number }) {
   return null;
 }
 
-export function MapCard({ lat, lon, alt_m, loadPositions }: MapCardProps) {
+/** Reports the map zoom level whenever the user zooms. */
+function ZoomWatcher({ onZoom }: { onZoom: (zoom: number) => void }) {
+  const map = useMapEvents({
+    zoomend: () => onZoom(map.getZoom()),
+  });
+  return null;
+}
+
+export function MapCard({ lat, lon, alt_m, loadTrajectory }: MapCardProps) {
   const [trail, setTrail] = useState<LatLngTuple[]>([]);
-  const [lastLoadedSeq, setLastLoadedSeq] = useState(0);
+  const [zoom, setZoom] = useState(INITIAL_ZOOM);
   const mapRef = useRef<L.Map | null>(null);
   const prevPositionRef = useRef<LatLngTuple | null>(null);
 
+  // The server returns the track simplified to ~1 pixel at this zoom, so the
+  // polyline stays small however long the flight runs.  Reload on zoom and
+  // every 10 s; live fixes are appended in between.
   useEffect(() => {
     let cancelled = false;
-    loadPositions(0).then((positions) => {
-      if (cancelled) return;
-      if (positions.length > 0) {
-        const points: LatLngTuple[] = positions.map((p) => [p.lat, p.lon]);
-        setTrail(points);
-        setLastLoadedSeq(positions[positions.length - 1].seq);
-      }
-    });
-    return () => { cancelled = true; };
-  }, []); // eslint-disable-line react-hooks/exhaustive-deps
+    const load = () => {
+      loadTrajectory(zoom).then((result) => {
+        if (cancelled || result.points.length === 0) return;
+        setTrail(result.points.map(([pLat, pLon]) => [pLat, pLon] as LatLngTuple));
+      });
+    };
+    load();
+    const interval = setInterval(load, 10000);
+    return () => {
+      cancelled = true;
+      clearInterval(interval);
+    };
+  }, [zoom, loadTrajectory]);
 
   useEffect(() => {
     const pos: LatLngTuple = [lat, lon];
@@ -99,21 +109,6 @@ export function MapCard({ lat, lon, alt_m, loadPositions }: MapCardProps) {
     setTrail((prev) => [...prev, pos]);
   }, [lat, lon]);
 
-  useEffect(() => {
-    const interval = setInterval(() => {
-      loadPositions(lastLoadedSeq).then((positions) => {
-        if (positions.length > 0) {
-          setTrail((prev) => {
-            const newPoints: LatLngTuple[] = positions.map((p) => [p.lat, p.lon]);
-            return [...prev, ...newPoints];
-          });
-          setLastLoadedSeq(positions[positions.length - 1].seq);
-        }
-      });
-    }, 10000);
-    return () => clearInterval(interval);
-  }, [lastLoadedSeq, loadPositions]);
-
   useEffect(() => {
     if (mapRef.current) {
       mapRef.current.panTo([lat, lon], { animate: true, duration: 1 });
@@ -136,7 +131,7 @@ export function MapCard({ lat, lon, alt_m, loadPositions }: MapCardProps) {
       <div className="flex-1 relative overflow-hidden">
         <MapContainer
           center={center}
-          zoom={5}
+          zoom={INITIAL_ZOOM}
           className="h-full w-full"
           zoomControl={true}
           ref={mapRef}
@@ -159,6 +154,7 @@ export function MapCard({ lat, lon, alt_m, loadPositions }: MapCardProps) {
             </Popup>
           </CircleMarker>
           <LocateButton lat={lat} lon={lon} />
+          <ZoomWatcher onZoom={setZoom} />
         </MapContainer>
         <div className="absolute bottom-2 left-2 right-2 bg-surface/80 p-2 text-[10px] font-mono card-border border border-outline-variant/50 rounded z-[1000] pointer-events-none">
           {formatLatLng(lat, lon)} | Alt: {alt_m.toFixed(0)}m
@@ -7,6 +7,7 @@ import {
   TelemetrySample, FlightPhase, Packet, LinkStatus,
   PositionData, MotionData, EnvironmentData, PowerData,
   LogEntry, TelemetryMessage, MetricPoint, ConnectionLogEntry,
+  TrajectoryResult,
 } from '../types';
 import { EngineStatus } from '../types';
 
@@ -115,6 +116,9 @@ export function useHabApi() {
   const prevEngineStatusRef = useRef<EngineStatus | null>(null);
   const addLogEntryRef = useRef<(message: string, type: ConnectionLogEntry['type']) => void>(() => {});
   const missionStartRef = useRef<number | null>(null);
+  // Server-side ingest sequence of the newest packet seen, sent as ?last_seq=
+  // on reconnect so the server replays only what was missed
+  const lastRxSeqRef = useRef(0);
 
   addLogEntryRef.current = useCallback((message: string, type: ConnectionLogEntry['type']) => {
     setConnectionLog((prev) => {
@@ -140,12 +144,13 @@ export function useHabApi() {
       if (isDisposed) return;
       setConnecting(true);
       try {
-        const ws = new WebSocket(WS_URL);
+        const ws = new WebSocket(`${WS_URL}?last_seq=${lastRxSeqRef.current}`);
 
         ws.onopen = () => {
           setConnected(true);
           setConnecting(false);
           addLogEntryRef.current('WebSocket connected', 'info');
+          seedMetricHistory();
         };
 
         ws.onmessage = (event) => {
@@ -157,93 +162,112 @@ export function useHabApi() {
               setMissionTime((prev) => prev + 1);
             } else if (msg.type === 'spectrum') {
               setSpectrum(msg.data);
-            } else if (msg.type === 'telemetry') {
-              const data: TelemetryMessage = msg.data;
-              // Start mission timer on first telemetry packet
-              if (missionStartRef.current === null) {
-                missionStartRef.current = Date.now();
+            } else if (msg.type === 'sync') {
+              // Reconnect handshake: a backlog of msg.data.count packets follows
+              if (msg.data.last_seq > msg.data.rx_seq) {
+                // Server log was reset — start counting from its sequence
+                lastRxSeqRef.current = msg.data.rx_seq;
               }
-              setPacketSeq(data.seq);
-
-              const time = data.t.split('T')[1]?.substring(0, 8) || new Date().toISOString().substring(11, 19);
-
-              if (data.type === 'position') {
-                setPosition(data);
-                pushMetric('altitude', data.alt_m);
-                addLogEntry(time, 'POS', `lat:${data.lat.toFixed(5)} lon:${data.lon.toFixed(5)} alt:${data.alt_m.toFixed(0)}m sats:${data.sats} fix:${data.fix_type}`);
-              } else if (data.type === 'motion') {
-                setMotion(data);
-                pushMetric('verticalSpeed', data.vs_mps);
-                pushMetric('roll', data.att_deg.roll);
-                pushMetric('pitch', data.att_deg.pitch);
-                pushMetric('yaw', data.att_deg.yaw);
-                addLogEntry(time, 'MOT', `gs:${data.gs_mps.toFixed(1)} vs:${data.vs_mps.toFixed(1)} hdg:${data.heading_deg.toFixed(1)}`);
-              } else if (data.type === 'environment') {
-                setEnvironment(data);
-                pushMetric('externalTemp', data.temp_ext_c);
-                pushMetric('internalTemp', data.temp_int_c);
-                pushMetric('pressure', data.pressure_hpa);
-                pushMetric('humidity', data.humidity_pct);
-                addLogEntry(time, 'ENV', `ext:${data.temp_ext_c.toFixed(1)}°C int:${data.temp_int_c.toFixed(1)}°C pres:${data.pressure_hpa.toFixed(1)}hPa hum:${data.humidity_pct.toFixed(1)}%`);
-              } else if (data.type === 'power') {
-                setPower(data);
-                addLogEntry(time, 'PWR', `v:${data.bat_v.toFixed(2)}V a:${data.bat_a.toFixed(2)}A w:${data.bat_w.toFixed(1)}W ${data.bat_pct.toFixed(0)}%`);
+              if (msg.data.count > 0 || !msg.data.complete) {
+                addLogEntryRef.current(
+                  `Resynced ${msg.data.count} packets${msg.data.complete ? '' : ' (partial backlog)'}`,
+                  msg.data.complete ? 'info' : 'warning',
+                );
               }
-
-              // Update TelemetrySample from incoming telemetry
-              if (data.type === 'position') {
-                setCurrent((prev) => ({
-                  ...prev,
-                  timestamp: Date.now(),
-                  lat: data.lat,
-                  lng: data.lon,
-                  altitude: data.alt_m,
-                  gpsSats: data.sats,
-                }));
-                setHistory((prev) => {
-                  const sample: TelemetrySample = {
+            } else if (msg.type === 'telemetry' || msg.type === 'telemetry_batch') {
+              // The server coalesces packets that arrive close together into one batch frame
+              const batch: TelemetryMessage[] = msg.type === 'telemetry_batch' ? msg.data : [msg.data];
+              for (const data of batch) {
+                if (data.rx_seq !== undefined) {
+                  if (data.rx_seq <= lastRxSeqRef.current) continue;
+                  lastRxSeqRef.current = data.rx_seq;
+                }
+                // Start mission timer on first telemetry packet
+                if (missionStartRef.current === null) {
+                  missionStartRef.current = Date.now();
+                }
+                setPacketSeq(data.seq);
+
+                const time = data.t.split('T')[1]?.substring(0, 8) || new Date().toISOString().substring(11, 19);
+
+                if (data.type === 'position') {
+                  setPosition(data);
+                  pushMetric('altitude', data.alt_m);
+                  addLogEntry(time, 'POS', `lat:${data.lat.toFixed(5)} lon:${data.lon.toFixed(5)} alt:${data.alt_m.toFixed(0)}m sats:${data.sats} fix:${data.fix_type}`);
+                } else if (data.type === 'motion') {
+                  setMotion(data);
+                  pushMetric('verticalSpeed', data.vs_mps);
+                  pushMetric('roll', data.att_deg.roll);
+                  pushMetric('pitch', data.att_deg.pitch);
+                  pushMetric('yaw', data.att_deg.yaw);
+                  addLogEntry(time, 'MOT', `gs:${data.gs_mps.toFixed(1)} vs:${data.vs_mps.toFixed(1)} hdg:${data.heading_deg.toFixed(1)}`);
+                } else if (data.type === 'environment') {
+                  setEnvironment(data);
+                  pushMetric('externalTemp', data.temp_ext_c);
+                  pushMetric('internalTemp', data.temp_int_c);
+                  pushMetric('pressure', data.pressure_hpa);
+                  pushMetric('humidity', data.humidity_pct);
+                  addLogEntry(time, 'ENV', `ext:${data.temp_ext_c.toFixed(1)}°C int:${data.temp_int_c.toFixed(1)}°C pres:${data.pressure_hpa.toFixed(1)}hPa hum:${data.humidity_pct.toFixed(1)}%`);
+                } else if (data.type === 'power') {
+                  setPower(data);
+                  addLogEntry(time, 'PWR', `v:${data.bat_v.toFixed(2)}V a:${data.bat_a.toFixed(2)}A w:${data.bat_w.toFixed(1)}W ${data.bat_pct.toFixed(0)}%`);
+                }
+
+                // Update TelemetrySample from incoming telemetry
+                if (data.type === 'position') {
+                  setCurrent((prev) => ({
+                    ...prev,
                     timestamp: Date.now(),
-                    altitude: data.alt_m,
-                    verticalSpeed: 0,
-                    groundSpeed: 0,
-                    heading: 0,
-                    internalTemp: 0,
-                    externalTemp: 0,
-                    pressure: 0,
-                    battery: 0,
-                    gpsSats: data.sats,
                     lat: data.lat,
                     lng: data.lon,
-                  };
-                  const next = [...prev, sample];
-                  return next.length > 300 ? next.slice(next.length - 300) : next;
+                    altitude: data.alt_m,
+                    gpsSats: data.sats,
+                  }));
+                  setHistory((prev) => {
+                    const sample: TelemetrySample = {
+                      timestamp: Date.now(),
+                      altitude: data.alt_m,
+                      verticalSpeed: 0,
+                      groundSpeed: 0,
+                      heading: 0,
+                      internalTemp: 0,
+                      externalTemp: 0,
+                      pressure: 0,
+                      battery: 0,
+                      gpsSats: data.sats,
+                      lat: data.lat,
+                      lng: data.lon,
+                    };
+                    const next = [...prev, sample];
+                    return next.length > 300 ? next.slice(next.length - 300) : next;
+                  });
+                }
+                if (data.type === 'environment') {
+                  setCurrent((prev) => ({
+                    ...prev,
+                    externalTemp: data.temp_ext_c,
+                    internalTemp: data.temp_int_c,
+                    pressure: data.pressure_hpa,
+                  }));
+                }
+                if (data.type === 'motion') {
+                  setCurrent((prev) => ({
+                    ...prev,
+                    verticalSpeed: data.vs_mps,
+                    groundSpeed: data.gs_mps,
+                    heading: data.heading_deg,
+                  }));
+                }
+                if (data.type === 'power') {
+                  setCurrent((prev) => ({ ...prev, battery: data.bat_pct }));
+                }
+
+                const now = Date.now();
+                setPackets((prev) => {
+                  const next = [...prev, { id: `PKT-${data.seq}`, timestamp: now, type: 'TELEMETRY', payload: JSON.stringify(data) }];
+                  return next.length > 200 ? next.slice(next.length - 200) : next;
                 });
               }
-              if (data.type === 'environment') {
-                setCurrent((prev) => ({
-                  ...prev,
-                  externalTemp: data.temp_ext_c,
-                  internalTemp: data.temp_int_c,
-                  pressure: data.pressure_hpa,
-                }));
-              }
-              if (data.type === 'motion') {
-                setCurrent((prev) => ({
-                  ...prev,
-                  verticalSpeed: data.vs_mps,
-                  groundSpeed: data.gs_mps,
-                  heading: data.heading_deg,
-                }));
-              }
-              if (data.type === 'power') {
-                setCurrent((prev) => ({ ...prev, battery: data.bat_pct }));
-              }
-
-              const now = Date.now();
-              setPackets((prev) => {
-                const next = [...prev, { id: `PKT-${data.seq}`, timestamp: now, type: 'TELEMETRY', payload: JSON.stringify(data) }];
-                return next.length > 200 ? next.slice(next.length - 200) : next;
-              });
 
               flushMetricHistory();
             }
@@ -397,7 +421,37 @@ export function useHabApi() {
     setMetricHistory({ ...metricHistoryRef.current });
   }
 
-  const loadPositions = useCallback(async (since: number = 0): Promise<Array<{seq: number; lat: number; lon: number; alt_m: number}>> => {
+  // Sparkline keys backfilled from the server's 1 s rollups on (re)connect
+  const ROLLUP_SEED: Record<string, Array<[string, keyof typeof metricHistoryRef.current]>> = {
+    motion: [['vs_mps', 'verticalSpeed'], ['att_deg.roll', 'roll'], ['att_deg.pitch', 'pitch'], ['att_deg.yaw', 'yaw']],
+    environment: [['temp_ext_c', 'externalTemp'], ['temp_int_c', 'internalTemp'], ['pressure_hpa', 'pressure'], ['humidity_pct', 'humidity']],
+  };
+
+  async function seedMetricHistory() {
+    const host = window.location.hostname;
+    const since = (Date.now() - ROLLING_WINDOW_MS) / 1000;
+    await Promise.all(Object.entries(ROLLUP_SEED).map(async ([type, mapping]) => {
+      try {
+        const fields = mapping.map(([field]) => field).join(',');
+        const res = await fetch(`http://${host}:8000/api/rollups?type=${type}&resolution=1&since=${since}&fields=${fields}`);
+        if (!res.ok) return;
+        const body: { buckets: Array<{ t: number; fields: Record<string, { mean: number }> }> } = await res.json();
+        const buf = metricHistoryRef.current;
+        for (const [field, key] of mapping) {
+          // Only fill empty histories so live points are never duplicated
+          if (buf[key].length > 0) continue;
+          buf[key] = body.buckets
+            .filter((b) => b.fields[field])
+            .map((b) => ({ timestamp: b.t * 1000, value: b.fields[field].mean }));
+        }
+      } catch {
+        // History is a nicety; live telemetry fills it in anyway
+      }
+    }));
+    flushMetricHistory();
+  }
+
+  const loadPositions = useCallback(async (since: number = 0): Promise<Array<{rx_seq: number; seq: number; lat: number; lon: number; alt_m: number}>> => {
     try {
       const host = window.location.hostname;
       const res = await fetch(`http://${host}:8000/api/positions?since=${since}&limit=5000`);
@@ -408,6 +462,18 @@ export function useHabApi() {
     }
   }, []);
 
+  const loadTrajectory = useCallback(async (zoom: number): Promise<TrajectoryResult> => {
+    const empty: TrajectoryResult = { tolerance_m: 0, raw_count: 0, last_rx_seq: 0, points: [] };
+    try {
+      const host = window.location.hostname;
+      const res = await fetch(`http://${host}:8000/api/trajectory?zoom=${zoom}`);
+      if (!res.ok) return empty;
+      return await res.json();
+    } catch {
+      return empty;
+    }
+  }, []);
+
   return {
     connected,
     connecting,
@@ -433,5 +499,6 @@ export function useHabApi() {
     packetSeq,
     metricHistory,
     loadPositions,
+    loadTrajectory,
   };
 }
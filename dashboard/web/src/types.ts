@@ -45,6 +45,9 @@ export interface TelemetryPacket {
   seq: number;
   t: string;
   type: 'position' | 'motion' | 'environment' | 'power';
+  /** Server-side ingest sequence, monotonic across payload reboots */
+  rx_seq?: number;
+  flight_id?: number;
 }
 
 export interface PositionPacket extends TelemetryPacket, PositionData { type: 'position'; }
@@ -143,3 +146,11 @@ export interface MetricPoint {
   timestamp: number;
   value: number;
 }
+
+/** Simplified flight track from /api/trajectory: [lat, lon, alt_m] points. */
+export interface TrajectoryResult {
+  tolerance_m: number;
+  raw_count: number;
+  last_rx_seq: number;
+  points: Array<[number, number, number]>;
+}
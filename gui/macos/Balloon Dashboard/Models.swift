@@ -39,6 +39,7 @@ struct PipelineStatus: Codable {
 enum WsMessageType: String {
     case spectrum
     case status
+    case statusDelta = "status_delta"
 }
 
 struct WsIncomingMessage: Codable {
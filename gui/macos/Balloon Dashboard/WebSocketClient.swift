@@ -112,6 +112,8 @@ class WebSocketClient: ObservableObject {
     
     private var serverURL = "ws://localhost:8765"
     private var actor: WebSocketActor?
+    /// Last full status as received, so status_delta fields can be merged into it
+    private var statusFields: [String: Any]?
     private var eventTask: Task<Void, Never>?
     
     func setServerURL(_ url: String) {
@@ -158,6 +160,7 @@ class WebSocketClient: ObservableObject {
         
         isConnected = false
         connectionError = nil
+        statusFields = nil
     }
     
     private func handleEvent(_ event: WebSocketEvent) {
@@ -193,16 +196,29 @@ class WebSocketClient: ObservableObject {
                 waterfallBuffer.addSpectrum(spectrum)
             }
         case "status":
-            if let dictData = rawData as? [String: Any],
-               let jsonData = try? JSONSerialization.data(withJSONObject: dictData),
-               let status = try? JSONDecoder().decode(EngineStatus.self, from: jsonData) {
-                engineStatus = status
+            if let dictData = rawData as? [String: Any] {
+                statusFields = dictData
+                applyStatus(dictData)
+            }
+        case "status_delta":
+            // Only the changed top-level fields; needs a full status to merge into
+            if let delta = rawData as? [String: Any], var fields = statusFields {
+                fields.merge(delta) { _, new in new }
+                statusFields = fields
+                applyStatus(fields)
             }
         default:
             break
         }
     }
     
+    private func applyStatus(_ fields: [String: Any]) {
+        if let jsonData = try? JSONSerialization.data(withJSONObject: fields),
+           let status = try? JSONDecoder().decode(EngineStatus.self, from: jsonData) {
+            engineStatus = status
+        }
+    }
+    
     // MARK: - Command Sending
     
     func sendCommand(_ command: String, data: [String: Any] = [:]) {
@@ -12,6 +12,13 @@
 # FIXED: set_frequency → set_frequency + set_sample_rate + set_gain via unified method
 # ADDED: Real FFT spectrum extraction blocks connected to a data queue
 # ADDED: Configurable frequency, symbol rate, gain from constructor
+# CHANGED: Spectrum tap is decimated (keep 1 in N), averaged and ends in a
+#          fixed-size probe instead of an ever-growing vector_sink
+# CHANGED: Modcod table, RRC taps and FFT window are module-level and cached,
+#          so a warm worker (see prewarm()) rebuilds the flowgraph quickly;
+#          modcod lookup now matches "QPSK 1/2" style names
+# ADDED: retune() swaps the encoder blocks for a new modcod/rolloff/pilots
+#          under lock()/unlock(), keeping the TS FIFO and SoapySDR sink open
 
 from gnuradio import blocks, dtv, fft, filter
 from gnuradio.fft import window as gr_window
@@ -23,9 +30,119 @@ import queue
 import numpy as np
 import time
 import logging
+from functools import lru_cache
 
 logger = logging.getLogger(__name__)
 
+# Modcod string → DVB-S2 constants, keyed by the normalized name
+# ("QPSK 1/4", "QPSK1/4" and "qpsk-1/4" all become "QPSK1/4")
+MODCOD_MAP = {
+    "QPSK1/4":  (dtv.C1_4, dtv.MOD_QPSK),
+    "QPSK1/3":  (dtv.C1_3, dtv.MOD_QPSK),
+    "QPSK2/5":  (dtv.C2_5, dtv.MOD_QPSK),
+    "QPSK1/2":  (dtv.C1_2, dtv.MOD_QPSK),
+    "QPSK3/5":  (dtv.C3_5, dtv.MOD_QPSK),
+    "QPSK2/3":  (dtv.C2_3, dtv.MOD_QPSK),
+    "QPSK3/4":  (dtv.C3_4, dtv.MOD_QPSK),
+    "QPSK4/5":  (dtv.C4_5, dtv.MOD_QPSK),
+    "QPSK5/6":  (dtv.C5_6, dtv.MOD_QPSK),
+    "QPSK8/9":  (dtv.C8_9, dtv.MOD_QPSK),
+    "QPSK9/10": (dtv.C9_10, dtv.MOD_QPSK),
+    "8PSK3/5":  (dtv.C3_5, dtv.MOD_8PSK),
+    "8PSK2/3":  (dtv.C2_3, dtv.MOD_8PSK),
+    "8PSK3/4":  (dtv.C3_4, dtv.MOD_8PSK),
+    "8PSK5/6":  (dtv.C5_6, dtv.MOD_8PSK),
+    "8PSK8/9":  (dtv.C8_9, dtv.MOD_8PSK),
+    "8PSK9/10": (dtv.C9_10, dtv.MOD_8PSK),
+}
+
+
+def normalize_modcod(modcod: str) -> str:
+    """Keep only letters, digits and '/': "QPSK 1/4" → "QPSK1/4"."""
+    return ''.join(c for c in modcod.upper() if c.isalnum() or c == '/')
+
+
+def modcod_params(modcod: str):
+    """(code_rate, constellation) for a modcod string; ValueError if it is not in MODCOD_MAP."""
+    try:
+        return MODCOD_MAP[normalize_modcod(modcod)]
+    except KeyError:
+        raise ValueError(f"Unknown MODCOD: {modcod!r}") from None
+
+
+ROLLOFF_MAP = {
+    0.2: dtv.RO_0_20,
+    0.25: dtv.RO_0_25,
+    0.35: dtv.RO_0_35,
+}
+
+TS_PACKET_SIZE = 188
+
+
+@lru_cache(maxsize=16)
+def rrc_taps(samp_rate: float, rolloff: float):
+    """Root-raised-cosine taps at 2 samples/symbol, designed once per config."""
+    return tuple(firdes.root_raised_cosine(1, samp_rate, samp_rate / 2, rolloff, 100))
+
+
+@lru_cache(maxsize=4)
+def fft_window(fft_size: int):
+    return tuple(gr_window.blackmanharris(fft_size))
+
+
+def prewarm(symbol_rate: float = 1e6, rolloff: float = 0.2, modcod: str = "QPSK1/4",
+            fft_size: int = 1024):
+    """
+    Precompute the config-dependent pieces of Dvbs2Flowgraph.
+
+    Importing this module already pays for GNU Radio itself; this also
+    designs the RRC taps and FFT window so the next construction with the
+    same symbol rate and rolloff only has to instantiate blocks.
+    """
+    modcod_params(modcod)
+    rrc_taps(float(symbol_rate) * 2, float(rolloff))
+    fft_window(fft_size)
+
+
+class SpectrumProbe(gr.sync_block):
+    """
+    Bounded sink for FFT power vectors.
+
+    Keeps only the most recent vector in one of two preallocated slots and
+    bumps a sequence number, so memory and per-read cost are constant no
+    matter how many vectors arrive or how late the reader is.  latest()
+    returns a read-only NumPy view of the published slot; it stays valid
+    until the probe has written two more frames.
+    """
+
+    def __init__(self, fft_size: int):
+        gr.sync_block.__init__(
+            self, name="spectrum_probe",
+            in_sig=[(np.float32, fft_size)], out_sig=None,
+        )
+        self._slots = np.zeros((2, fft_size), dtype=np.float32)
+        self._published = 0
+        self._seq = 0
+        self._lock = threading.Lock()
+
+    def work(self, input_items, output_items):
+        frames = input_items[0]
+        if len(frames):
+            slot = 1 - self._published
+            self._slots[slot] = frames[-1]
+            with self._lock:
+                self._published = slot
+                self._seq += 1
+        return len(frames)
+
+    def latest(self):
+        """(sequence number, read-only view of the newest frame); seq 0 = none yet."""
+        with self._lock:
+            view = self._slots[self._published].view()
+            seq = self._seq
+        view.flags.writeable = False
+        return seq, view
+
 
 class Dvbs2Flowgraph(gr.top_block):
     """
@@ -59,48 +176,15 @@ class Dvbs2Flowgraph(gr.top_block):
         # FFT parameters for spectrum display
         self.fft_size = 1024
         self.fft_update_interval = 0.05  # 20 Hz
+        # FFTs averaged per displayed frame; the tap keeps only enough
+        # vectors for that, so spectrum cost is independent of symbol rate
+        self.fft_averages = 4
+        self.fft_alpha = 1.0 / self.fft_averages
 
         # Spectrum data queue (thread-safe, drops stale frames)
         self.spectrum_queue = queue.Queue(maxsize=5)
 
-        # Map modcod string to DVB-S2 constants
-        # Normalizes: "QPSK 1/4" → "QPSK1/4", "8PSK 3/5" → "8PSK3/5", etc.
-        self._modcod_map = {
-            "QPSK1/4":  (dtv.C1_4, dtv.MOD_QPSK),
-            "QPSK1/3":  (dtv.C1_3, dtv.MOD_QPSK),
-            "QPSK2/5":  (dtv.C2_5, dtv.MOD_QPSK),
-            "QPSK1/2":  (dtv.C1_2, dtv.MOD_QPSK),
-            "QPSK3/5":  (dtv.C3_5, dtv.MOD_QPSK),
-            "QPSK2/3":  (dtv.C2_3, dtv.MOD_QPSK),
-            "QPSK3/4":  (dtv.C3_4, dtv.MOD_QPSK),
-            "QPSK4/5":  (dtv.C4_5, dtv.MOD_QPSK),
-            "QPSK5/6":  (dtv.C5_6, dtv.MOD_QPSK),
-            "QPSK8/9":  (dtv.C8_9, dtv.MOD_QPSK),
-            "QPSK9/10": (dtv.C9_10, dtv.MOD_QPSK),
-            "8PSK3/5":  (dtv.C3_5, dtv.MOD_8PSK),
-            "8PSK2/3":  (dtv.C2_3, dtv.MOD_8PSK),
-            "8PSK3/4":  (dtv.C3_4, dtv.MOD_8PSK),
-            "8PSK5/6":  (dtv.C5_6, dtv.MOD_8PSK),
-            "8PSK8/9":  (dtv.C8_9, dtv.MOD_8PSK),
-            "8PSK9/10": (dtv.C9_10, dtv.MOD_8PSK),
-        }
-
-        # Normalize modcod: remove spaces, hyphens, slashes — keep only letters and numbers
-        modcod_key = ''.join(c for c in modcod.upper() if c.isalnum() or c == '/')
-        modcod_key = modcod_key.replace('/', '')
-        code_rate, constellation = self._modcod_map.get(
-            modcod_key,
-            (dtv.C1_4, dtv.MOD_QPSK)  # default QPSK 1/4 (lowest code rate for robustness)
-        )
-
-        pilots_mode = dtv.PILOTS_ON if pilots else dtv.PILOTS_OFF
-        fec_frame = dtv.FECFRAME_NORMAL
-        _rolloff_map = {
-            0.2: dtv.RO_0_20,
-            0.25: dtv.RO_0_25,
-            0.35: dtv.RO_0_35,
-        }
-        rolloff_const = _rolloff_map.get(self.rolloff, dtv.RO_0_20)
+        self.modcod = normalize_modcod(modcod)
 
         ##################################################
         # Blocks
@@ -115,63 +199,11 @@ class Dvbs2Flowgraph(gr.top_block):
             0
         )
 
-        # DVBS-2 encoder chain
-        self.dtv_dvb_bbheader = dtv.dvb_bbheader_bb(
-            dtv.STANDARD_DVBS2,
-            fec_frame,
-            code_rate,
-            rolloff_const,
-            dtv.INPUTMODE_NORMAL,
-            dtv.INBAND_OFF,
-            168,
-            4000000
-        )
-
-        self.dtv_dvb_bbscrambler = dtv.dvb_bbscrambler_bb(
-            dtv.STANDARD_DVBS2,
-            fec_frame,
-            code_rate
-        )
-
-        self.dtv_dvb_bch = dtv.dvb_bch_bb(
-            dtv.STANDARD_DVBS2,
-            fec_frame,
-            code_rate
-        )
-
-        self.dtv_dvb_ldpc = dtv.dvb_ldpc_bb(
-            dtv.STANDARD_DVBS2,
-            fec_frame,
-            code_rate,
-            dtv.MOD_OTHER
-        )
-
-        self.dtv_dvbs2_interleaver = dtv.dvbs2_interleaver_bb(
-            fec_frame,
-            code_rate,
-            constellation
-        )
+        # DVBS-2 encoder chain (bbheader … physical), see _build_encoder
+        self._build_encoder()
 
-        self.dtv_dvbs2_modulator = dtv.dvbs2_modulator_bc(
-            fec_frame,
-            code_rate,
-            constellation,
-            dtv.INTERPOLATION_OFF
-        )
-
-        self.dtv_dvbs2_physical = dtv.dvbs2_physical_cc(
-            fec_frame,
-            code_rate,
-            constellation,
-            pilots_mode,
-            0
-        )
-
-        # Root raised cosine filter
-        rrc_taps = firdes.root_raised_cosine(
-            1, self.samp_rate, self.samp_rate / 2, self.rolloff, 100
-        )
-        self.fft_filter = filter.fft_filter_ccc(1, rrc_taps, 1)
+        # Root raised cosine filter (taps cached per samp_rate/rolloff)
+        self.fft_filter = filter.fft_filter_ccc(1, rrc_taps(self.samp_rate, self.rolloff), 1)
 
         # SoapySDR sink for HackRF
         self.soapy_sink = soapy.sink(
@@ -207,76 +239,173 @@ class Dvbs2Flowgraph(gr.top_block):
         self.spectrum_fft = fft.fft_vcc(
             self.fft_size,
             True,                                  # forward FFT
-            gr_window.blackmanharris(self.fft_size),  # window
+            fft_window(self.fft_size),             # window
             True,                                  # shift (center DC)
             1                                      # number of threads
         )
         self.spectrum_c2mag = blocks.complex_to_mag_squared(
             self.fft_size
         )
-        self.spectrum_vector_sink = blocks.vector_sink_f(
-            self.fft_size
+        # Keep 1 in N vectors (before the FFT), then average in power
+        self.spectrum_keep = blocks.keep_one_in_n(
+            gr.sizeof_gr_complex * self.fft_size, self._spectrum_decimation()
+        )
+        self.spectrum_avg = filter.single_pole_iir_filter_ff(
+            self.fft_alpha, self.fft_size
         )
+        self.spectrum_probe = SpectrumProbe(self.fft_size)
+        self._freq_axis = self._spectrum_freq_axis()
 
         ##################################################
         # Connections
         ##################################################
         # Main DVBS2 chain
-        self.connect((self.blocks_file_source, 0), (self.dtv_dvb_bbheader, 0))
-        self.connect((self.dtv_dvb_bbheader, 0), (self.dtv_dvb_bbscrambler, 0))
-        self.connect((self.dtv_dvb_bbscrambler, 0), (self.dtv_dvb_bch, 0))
-        self.connect((self.dtv_dvb_bch, 0), (self.dtv_dvb_ldpc, 0))
-        self.connect((self.dtv_dvb_ldpc, 0), (self.dtv_dvbs2_interleaver, 0))
-        self.connect((self.dtv_dvbs2_interleaver, 0), (self.dtv_dvbs2_modulator, 0))
-        self.connect((self.dtv_dvbs2_modulator, 0), (self.dtv_dvbs2_physical, 0))
-        self.connect((self.dtv_dvbs2_physical, 0), (self.fft_filter, 0))
+        self._ts_align = None
+        self.connect(self.blocks_file_source, *self._encoder_blocks(), self.fft_filter)
         self.connect((self.fft_filter, 0), (self.soapy_sink, 0))
 
         # Spectrum extraction chain (tap after RRC filter = transmitted spectrum)
         self.connect((self.fft_filter, 0), (self.spectrum_splitter, 0))
         self.connect((self.spectrum_splitter, 0), (self.spectrum_stream_to_vector, 0))
-        self.connect((self.spectrum_stream_to_vector, 0), (self.spectrum_fft, 0))
+        self.connect((self.spectrum_stream_to_vector, 0), (self.spectrum_keep, 0))
+        self.connect((self.spectrum_keep, 0), (self.spectrum_fft, 0))
         self.connect((self.spectrum_fft, 0), (self.spectrum_c2mag, 0))
-        self.connect((self.spectrum_c2mag, 0), (self.spectrum_vector_sink, 0))
+        self.connect((self.spectrum_c2mag, 0), (self.spectrum_avg, 0))
+        self.connect((self.spectrum_avg, 0), (self.spectrum_probe, 0))
 
         ##################################################
         # Threading
         ##################################################
         self._spectrum_thread = None
         self._spectrum_running = False
+        self._started_at = None
+        self._underrun_sec = 0.0
+        self._underruns = 0
+        # Underrun baseline, moved on every samp_rate change (see stats())
+        self._rate_since = None
+        self._rate_samples = 0
+        self._underrun_before = 0.0
+
+    # Encoder blocks in stream order, all recreated by _build_encoder()
+    _ENCODER_ATTRS = (
+        "dtv_dvb_bbheader", "dtv_dvb_bbscrambler", "dtv_dvb_bch", "dtv_dvb_ldpc",
+        "dtv_dvbs2_interleaver", "dtv_dvbs2_modulator", "dtv_dvbs2_physical",
+    )
+
+    def _encoder_blocks(self):
+        return [getattr(self, name) for name in self._ENCODER_ATTRS]
+
+    def _build_encoder(self):
+        """Create the encoder blocks for the current modcod/rolloff/pilots."""
+        code_rate, constellation = modcod_params(self.modcod)
+        fec_frame = dtv.FECFRAME_NORMAL
+        pilots_mode = dtv.PILOTS_ON if self.pilots else dtv.PILOTS_OFF
+        factories = (
+            lambda: dtv.dvb_bbheader_bb(
+                dtv.STANDARD_DVBS2, fec_frame, code_rate,
+                ROLLOFF_MAP.get(self.rolloff, dtv.RO_0_20),
+                dtv.INPUTMODE_NORMAL, dtv.INBAND_OFF, 168, 4000000),
+            lambda: dtv.dvb_bbscrambler_bb(dtv.STANDARD_DVBS2, fec_frame, code_rate),
+            lambda: dtv.dvb_bch_bb(dtv.STANDARD_DVBS2, fec_frame, code_rate),
+            lambda: dtv.dvb_ldpc_bb(dtv.STANDARD_DVBS2, fec_frame, code_rate, dtv.MOD_OTHER),
+            lambda: dtv.dvbs2_interleaver_bb(fec_frame, code_rate, constellation),
+            lambda: dtv.dvbs2_modulator_bc(fec_frame, code_rate, constellation,
+                                           dtv.INTERPOLATION_OFF),
+            lambda: dtv.dvbs2_physical_cc(fec_frame, code_rate, constellation,
+                                          pilots_mode, 0),
+        )
+        for name, make in zip(self._ENCODER_ATTRS, factories):
+            setattr(self, name, make())
+
+    def retune(self, modcod=None, rolloff=None, pilots=None) -> float:
+        """
+        Change modcod, rolloff and/or pilots without stopping the flowgraph.
+
+        Under lock(), the encoder chain from the BB header on is replaced
+        and the RRC taps are updated in place; a pilots-only change goes the
+        same way, so the new PL framer starts on a fresh XFECFRAME.  The file
+        source (TS FIFO) and SoapySDR sink stay open; samples already
+        buffered in the replaced blocks are dropped, so the receiver sees a
+        short gap.  Returns the time spent, in seconds.
+
+        Raises ValueError for an unknown modcod or rolloff, before the
+        flowgraph is touched.
+        """
+        new_modcod = normalize_modcod(modcod) if modcod is not None else self.modcod
+        new_rolloff = float(rolloff) if rolloff is not None else self.rolloff
+        new_pilots = bool(pilots) if pilots is not None else self.pilots
+        modcod_params(new_modcod)
+        if new_rolloff not in ROLLOFF_MAP:
+            raise ValueError(f"Unsupported rolloff: {rolloff!r}")
+        if (new_modcod, new_rolloff, new_pilots) == (self.modcod, self.rolloff, self.pilots):
+            return 0.0
+
+        t0 = time.monotonic()
+        self.lock()
+        try:
+            old = self._encoder_blocks()
+            if self._ts_align is not None:
+                self.disconnect(self.blocks_file_source, self._ts_align, *old, self.fft_filter)
+            else:
+                self.disconnect(self.blocks_file_source, *old, self.fft_filter)
+
+            self.modcod, self.rolloff, self.pilots = new_modcod, new_rolloff, new_pilots
+            self._build_encoder()
+            # The new BB header must start on a TS packet boundary; the
+            # FIFO is packet-aligned from byte 0, and the new reader
+            # starts at the source's current write position
+            offset = self.blocks_file_source.nitems_written(0) % TS_PACKET_SIZE
+            self._ts_align = blocks.skiphead(
+                gr.sizeof_char, (TS_PACKET_SIZE - offset) % TS_PACKET_SIZE)
+            self.connect(self.blocks_file_source, self._ts_align,
+                         *self._encoder_blocks(), self.fft_filter)
+            self.fft_filter.set_taps(rrc_taps(self.samp_rate, self.rolloff))
+        finally:
+            self.unlock()
+        elapsed = time.monotonic() - t0
+        logger.info(f"Retuned to {self.modcod} ro={self.rolloff} pilots={self.pilots} "
+                    f"in {elapsed * 1000:.0f} ms")
+        return elapsed
 
     def start(self):
         """Start the flowgraph and spectrum thread"""
         gr.top_block.start(self)
+        self._started_at = self._rate_since = time.monotonic()
+        self._rate_samples = 0
+        self._underrun_sec = self._underrun_before = 0.0
+        self._underruns = 0
         self._spectrum_running = True
         self._spectrum_thread = threading.Thread(
             target=self._spectrum_reader, daemon=True
         )
         self._spectrum_thread.start()
 
+    def _spectrum_decimation(self) -> int:
+        """Keep-1-in-N factor giving ~fft_averages vectors per display frame."""
+        vectors_per_sec = self.samp_rate / self.fft_size
+        wanted = self.fft_averages / self.fft_update_interval
+        return max(1, int(vectors_per_sec / wanted))
+
+    def _spectrum_freq_axis(self) -> np.ndarray:
+        return self.center_freq + np.fft.fftshift(
+            np.fft.fftfreq(self.fft_size, 1.0 / self.samp_rate)
+        )
+
     def _spectrum_reader(self):
-        """Background thread to read real FFT data from the vector sink"""
+        """Background thread: publish the probe's newest averaged FFT frame at ~20 Hz"""
+        last_seq = 0
+        probe = self.spectrum_probe
         while self._spectrum_running:
             time.sleep(self.fft_update_interval)
             try:
-                data = np.array(self.spectrum_vector_sink.data())
-                if len(data) < self.fft_size:
+                seq, fft_data = probe.latest()
+                if seq == last_seq:
                     continue
+                last_seq = seq
 
-                # Get the most recent FFT frame
-                fft_data = data[-self.fft_size:]
-
-                # Convert to dB with noise floor protection
+                # Convert to dB with noise floor protection (FFT already shifted)
                 power_db = 10.0 * np.log10(np.maximum(fft_data, 1e-15))
-
-                # FFT was already shifted, but generate frequency bins
-                freq_bins = np.fft.fftshift(
-                    np.fft.fftfreq(self.fft_size, 1.0 / self.samp_rate)
-                )
-                frequencies = self.center_freq + freq_bins
-
-                # Clear the vector sink to keep only the latest frame
-                self.spectrum_vector_sink.reset()
+                frequencies = self._freq_axis
 
                 try:
                     self.spectrum_queue.put_nowait((frequencies, power_db))
@@ -291,6 +420,50 @@ class Dvbs2Flowgraph(gr.top_block):
             except Exception as e:
                 logger.error(f"Spectrum reader error: {e}")
 
+    def stats(self) -> dict:
+        """
+        Throughput counters since start().
+
+        The sink drains samp_rate samples/s; any shortfall of samples produced
+        versus that is time the HackRF was starved (an underrun, usually the
+        TS FIFO running dry).  Each new shortfall of >10 ms counts as one event.
+        Only the time since the last samp_rate change is measured at the
+        current rate; earlier shortfall is carried in _underrun_before.
+        """
+        now = time.monotonic()
+        elapsed = now - self._started_at if self._started_at else 0.0
+        samples = self.fft_filter.nitems_written(0)
+        ts_bytes = self.blocks_file_source.nitems_written(0)
+        underrun_sec = self._underrun_total(now, samples)
+        if underrun_sec - self._underrun_sec > 0.01:
+            self._underruns += 1
+        self._underrun_sec = max(self._underrun_sec, underrun_sec)
+        return {
+            "elapsed_sec": round(elapsed, 3),
+            "samples": samples,
+            "ts_bytes": ts_bytes,
+            "ts_bitrate": ts_bytes * 8 / elapsed if elapsed else 0.0,
+            "underrun_sec": round(underrun_sec, 3),
+            "underruns": self._underruns,
+        }
+
+    def _underrun_total(self, now: float, samples: int) -> float:
+        """Seconds of sink starvation since start(), as of *now* and *samples* written."""
+        if self._rate_since is None:
+            return 0.0
+        expected = (now - self._rate_since) * self.samp_rate
+        shortfall = max(0.0, expected - (samples - self._rate_samples))
+        return self._underrun_before + shortfall / self.samp_rate
+
+    def _rebase_underruns(self):
+        """Close the current underrun interval at the current samp_rate."""
+        if self._rate_since is None:
+            return
+        now = time.monotonic()
+        samples = self.fft_filter.nitems_written(0)
+        self._underrun_before = self._underrun_total(now, samples)
+        self._rate_since, self._rate_samples = now, samples
+
     def get_spectrum_data(self):
         """Get latest spectrum data from queue (non-blocking)"""
         try:
@@ -332,16 +505,22 @@ class Dvbs2Flowgraph(gr.top_block):
             logger.warning("Flowgraph wait() timed out — device may be stuck. Using SIGTERM-style cleanup.")
 
     def reconfigure(self, center_freq=None, symbol_rate=None, tx_gain_vga=None,
-                    tx_gain_amp=None):
-        """Reconfigure parameters while running (where supported)"""
+                    tx_gain_amp=None, modcod=None, rolloff=None, pilots=None):
+        """Reconfigure parameters while running (modcod/rolloff/pilots via retune())"""
+        if modcod is not None or rolloff is not None or pilots is not None:
+            self.retune(modcod=modcod, rolloff=rolloff, pilots=pilots)
         if center_freq is not None:
             self.center_freq = center_freq
             self.soapy_sink.set_frequency(0, self.center_freq)
         if symbol_rate is not None:
+            self._rebase_underruns()
             self.symbol_rate = symbol_rate
             self.samp_rate = symbol_rate * 2
             self.soapy_sink.set_sample_rate(0, self.samp_rate)
+            self.spectrum_keep.set_n(self._spectrum_decimation())
             # Note: full reconfig would require lock
+        if center_freq is not None or symbol_rate is not None:
+            self._freq_axis = self._spectrum_freq_axis()
         if tx_gain_vga is not None:
             self.tx_gain_vga = tx_gain_vga
             self.soapy_sink.set_gain(0, 'VGA', min(max(tx_gain_vga, 0.0), 47.0))
@@ -2,13 +2,24 @@
 """
 DVB-S2 TX Worker — Runs as a subprocess managed by the server.
 Communicates via stdin/stdout JSON-RPC style messages.
+The process outlives start/stop cycles: "prewarm" imports GNU Radio and
+precomputes taps so the next "start" only builds blocks and opens the device.
+
+Protocol: each command line may carry an "id", which is echoed in its
+response so the parent can match replies to requests.  Unsolicited
+messages carry an "event" instead (e.g. "stats" once a second while
+transmitting).
+TX spectrum frames go to the parent through a shared-memory SpectrumRing
+(named by the "spectrum_shm" start option), not over stdout.
 """
 
 import json
 import logging
 import os
+import queue
 import signal
 import sys
+import threading
 import time
 import traceback
 from pathlib import Path
@@ -23,17 +34,91 @@ logging.basicConfig(
 )
 logger = logging.getLogger("dvbs2-worker")
 
+STATS_INTERVAL_SEC = 1.0
+
 _flowgraph = None
+_spectrum_ring = None
+_spectrum_thread = None
+_stats_thread = None
+_request_id = None
+_stdout_lock = threading.Lock()
+
+
+def _write(msg: dict):
+    with _stdout_lock:
+        print(json.dumps(msg), flush=True)
 
 
 def _send_response(response: dict):
-    """Send a JSON response to the parent process."""
-    print(json.dumps(response), flush=True)
+    """Send a JSON response to the command currently being handled."""
+    if _request_id is not None:
+        response = {"id": _request_id, **response}
+    _write(response)
+
+
+def _send_event(event: str, data: dict):
+    """Send an unsolicited message (not tied to a request)."""
+    _write({"event": event, "data": data})
+
+
+def _publish_stats(flowgraph):
+    """Stream throughput/underrun counters to the parent while TX runs."""
+    while _flowgraph is flowgraph:
+        time.sleep(STATS_INTERVAL_SEC)
+        if _flowgraph is not flowgraph:
+            return
+        try:
+            _send_event("stats", flowgraph.stats())
+        except Exception as e:
+            logger.error(f"Stats error: {e}")
+            return
+
+
+def _publish_spectrum(flowgraph, ring):
+    """Copy the flowgraph's spectrum frames into the shared ring until it stops."""
+    while _flowgraph is flowgraph:
+        try:
+            _, power_db = flowgraph.spectrum_queue.get(timeout=0.5)
+        except queue.Empty:
+            continue
+        try:
+            ring.write(power_db, flowgraph.center_freq, flowgraph.samp_rate)
+        except Exception as e:
+            logger.error(f"Spectrum ring write failed: {e}")
+            return
+
+
+def _start_spectrum(flowgraph, shm_name):
+    global _spectrum_ring, _spectrum_thread
+    if not shm_name:
+        return
+    try:
+        from hab_engine.spectrum_ring import SpectrumRing
+        if _spectrum_ring is None or _spectrum_ring.name != shm_name.lstrip("/"):
+            _stop_spectrum()
+            _spectrum_ring = SpectrumRing.attach(shm_name)
+    except Exception as e:
+        logger.error(f"Spectrum ring unavailable ({shm_name}): {e}")
+        return
+    _spectrum_thread = threading.Thread(
+        target=_publish_spectrum, args=(flowgraph, _spectrum_ring), daemon=True
+    )
+    _spectrum_thread.start()
+
+
+def _stop_spectrum():
+    global _spectrum_ring, _spectrum_thread
+    if _spectrum_thread is not None:
+        _spectrum_thread.join(timeout=1.0)
+        _spectrum_thread = None
+    if _spectrum_ring is not None:
+        _spectrum_ring.close()
+        _spectrum_ring = None
 
 
 def cmd_start(config: dict):
     """Create and start the DVB-S2 TX flowgraph."""
-    global _flowgraph
+    global _flowgraph, _stats_thread
 
     if _flowgraph is not None:
         _send_response({"error": "Flowgraph already running"})
@@ -59,6 +144,11 @@ def cmd_start(config: dict):
         )
         logger.info("Flowgraph created, starting...")
         _flowgraph.start()
+        _start_spectrum(_flowgraph, config.get("spectrum_shm"))
+        _stats_thread = threading.Thread(
+            target=_publish_stats, args=(_flowgraph,), daemon=True
+        )
+        _stats_thread.start()
         logger.info("Flowgraph started successfully")
         _send_response({"status": "started"})
 
@@ -69,6 +159,24 @@ def cmd_start(config: dict):
         _flowgraph = None
 
 
+def cmd_prewarm(config: dict):
+    """Import GNU Radio and precompute taps for *config* ahead of the next start."""
+    try:
+        t0 = time.monotonic()
+        import dvbs2_flowgraph
+        dvbs2_flowgraph.prewarm(
+            symbol_rate=float(config.get("symbol_rate", 1e6)),
+            rolloff=float(config.get("rolloff", 0.2)),
+            modcod=str(config.get("modcod", "QPSK1/4")),
+        )
+        elapsed = time.monotonic() - t0
+        logger.info(f"Prewarmed in {elapsed:.2f}s")
+        _send_response({"status": "warm", "elapsed_sec": round(elapsed, 3)})
+    except Exception as e:
+        logger.error(f"Prewarm failed: {e}")
+        _send_response({"error": f"Prewarm failed: {e}"})
+
+
 def cmd_stop(config: dict = None):
     """Stop the DVB-S2 TX flowgraph."""
     global _flowgraph
@@ -88,6 +196,8 @@ def cmd_stop(config: dict = None):
         _send_response({"error": str(e)})
     finally:
         _flowgraph = None
+        if _spectrum_thread is not None:
+            _spectrum_thread.join(timeout=1.0)
 
 
 def cmd_reconfigure(config: dict):
@@ -99,14 +209,17 @@ def cmd_reconfigure(config: dict):
         return
 
     try:
+        t0 = time.monotonic()
         _flowgraph.reconfigure(**config)
-        _send_response({"status": "reconfigured"})
+        elapsed_ms = (time.monotonic() - t0) * 1000
+        _send_response({"status": "reconfigured", "elapsed_ms": round(elapsed_ms, 1)})
     except Exception as e:
         logger.error(f"Reconfigure error: {e}")
         _send_response({"error": str(e)})
 
 
 _COMMANDS = {
+    "prewarm": cmd_prewarm,
     "start": cmd_start,
     "stop": cmd_stop,
     "reconfigure": cmd_reconfigure,
@@ -115,6 +228,7 @@ _COMMANDS = {
 
 def main():
     """Main loop: read JSON commands from stdin, execute, respond via stdout."""
+    global _request_id
     # Ignore SIGINT/SIGTERM — parent handles cleanup
     signal.signal(signal.SIGINT, signal.SIG_IGN)
     signal.signal(signal.SIGTERM, signal.SIG_IGN)
@@ -126,8 +240,10 @@ def main():
         line = line.strip()
         if not line:
             continue
+        _request_id = None
         try:
             msg = json.loads(line)
+            _request_id = msg.get("id")
             cmd = msg.get("command", "")
             data = msg.get("data", {})
             handler = _COMMANDS.get(cmd)
@@ -142,7 +258,9 @@ def main():
             _send_response({"error": str(e)})
 
     # Clean shutdown
+    _request_id = None
     cmd_stop()
+    _stop_spectrum()
 
 
 if __name__ == "__main__":
@@ -6,7 +6,11 @@ from .models import (
     TelemetryData, DeviceInfo, WSMessageType
 )
 from .pipeline_manager import PipelineManager
-from .flowgraph_manager import FlowgraphManager
+from .ts_pacer import TsPacer
+from .dvbs2_rate import ts_bitrate, link_rates
+from .encode_profiles import PROFILES as PIPELINE_PROFILES
+from .flowgraph_manager import FlowgraphManager, WorkerError, WorkerTimeout
+from .spectrum_ring import SpectrumRing
 
 __all__ = [
     "HabEngine",
@@ -17,5 +21,12 @@ __all__ = [
     "DeviceInfo",
     "WSMessageType",
     "PipelineManager",
+    "TsPacer",
+    "ts_bitrate",
+    "link_rates",
+    "PIPELINE_PROFILES",
     "FlowgraphManager",
+    "WorkerError",
+    "WorkerTimeout",
+    "SpectrumRing",
 ]
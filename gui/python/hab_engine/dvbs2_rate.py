@@ -0,0 +1,82 @@
+"""DVB-S2 link capacity — TS bitrate for a MODCOD, frame size, pilots and symbol rate."""
+
+import math
+from typing import Dict, Tuple
+
+# BCH input size (Kbch) per code rate, ETSI EN 302 307 tables 5a/5b
+KBCH_NORMAL = {
+    "1/4": 16008, "1/3": 21408, "2/5": 25728, "1/2": 32208, "3/5": 38688,
+    "2/3": 43040, "3/4": 48408, "4/5": 51648, "5/6": 53840, "8/9": 57472,
+    "9/10": 58192,
+}
+KBCH_SHORT = {
+    "1/4": 3072, "1/3": 5232, "2/5": 6312, "1/2": 7032, "3/5": 9552,
+    "2/3": 10632, "3/4": 11712, "4/5": 12432, "5/6": 13152, "8/9": 14232,
+}
+NLDPC = {"normal": 64800, "short": 16200}
+
+BITS_PER_SYMBOL = {"QPSK": 2, "8PSK": 3, "16APSK": 4, "32APSK": 5}
+
+BBHEADER_BITS = 80
+SLOT_SYMBOLS = 90           # one PLFRAME slot; the PLHEADER takes one slot too
+PILOT_BLOCK_SYMBOLS = 36    # after every 16 slots, when pilots are on
+PILOT_PERIOD_SLOTS = 16
+
+# Share of the TS rate left for elementary streams once PES/PSI/PCR overhead
+# and the muxer's own stuffing are taken out (700k + 128k in 965 kb/s).
+ES_SHARE = 0.86
+
+
+def parse_modcod(modcod: str) -> Tuple[str, str]:
+    """"QPSK 1/2", "qpsk1/2", "8PSK-3/5" → ("QPSK", "1/2"), ("8PSK", "3/5")."""
+    text = "".join(c for c in modcod.upper() if c.isalnum() or c == "/")
+    for mod in sorted(BITS_PER_SYMBOL, key=len, reverse=True):
+        if text.startswith(mod):
+            rate = text[len(mod):]
+            if rate in KBCH_NORMAL:
+                return mod, rate
+    raise ValueError(f"Unknown MODCOD: {modcod!r}")
+
+
+def plframe_symbols(modcod: str, pilots: bool = True, fec_frame: str = "normal") -> int:
+    """Symbols in one PLFRAME: PLHEADER + payload slots + pilot blocks."""
+    mod, _ = parse_modcod(modcod)
+    slots = NLDPC[fec_frame] // (BITS_PER_SYMBOL[mod] * SLOT_SYMBOLS)
+    pilot_blocks = (slots - 1) // PILOT_PERIOD_SLOTS if pilots else 0
+    return SLOT_SYMBOLS * (slots + 1) + PILOT_BLOCK_SYMBOLS * pilot_blocks
+
+
+def ts_bitrate(modcod: str, symbol_rate: float, pilots: bool = True,
+               fec_frame: str = "normal") -> int:
+    """
+    Useful MPEG-TS bitrate (b/s) the modulator consumes, for normal-mode
+    input: each PLFRAME carries Kbch - 80 bits of TS after the BBHEADER.
+
+    E.g. QPSK 1/2, pilots on, 1 Msym/s → 965326 b/s.
+    """
+    _, rate = parse_modcod(modcod)
+    kbch = (KBCH_NORMAL if fec_frame == "normal" else KBCH_SHORT).get(rate)
+    if kbch is None:
+        raise ValueError(f"Code rate {rate} not defined for {fec_frame} frames")
+    symbols = plframe_symbols(modcod, pilots, fec_frame)
+    return int(math.floor((kbch - BBHEADER_BITS) * symbol_rate / symbols))
+
+
+def link_rates(modcod: str, symbol_rate: float, pilots: bool = True,
+               fec_frame: str = "normal", audio_bitrate: int = 128_000) -> Dict[str, int]:
+    """
+    Mux, pacer and encoder rates that fill the link without overflowing it.
+
+    Returns ``{"ts_bitrate", "muxrate", "video_bitrate", "audio_bitrate"}`` in
+    b/s.  muxrate equals ts_bitrate so ffmpeg's CBR output matches the pacer
+    exactly; the video gets what is left of ES_SHARE after audio.
+    """
+    rate = ts_bitrate(modcod, symbol_rate, pilots, fec_frame)
+    audio = min(audio_bitrate, int(rate * ES_SHARE) // 4)
+    video = max(int(rate * ES_SHARE) - audio, 0)
+    return {
+        "ts_bitrate": rate,
+        "muxrate": rate,
+        "video_bitrate": video,
+        "audio_bitrate": audio,
+    }
@@ -0,0 +1,158 @@
+"""Encode Profiles — ffmpeg arguments for file playback and low-latency live camera."""
+
+import logging
+import subprocess
+import threading
+from functools import lru_cache
+from typing import List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+PROFILES = ("file", "live")
+
+# H.264 encoders in order of preference; hardware first, libx264 always last
+HW_ENCODERS = ("h264_rkmpp", "h264_v4l2m2m", "h264_vaapi", "h264_videotoolbox")
+SW_ENCODER = "libx264"
+
+# Live resolution ladder: (minimum video b/s, width, height, fps).  The first
+# rung the link can carry is used, so a thin link gets fewer pixels rather
+# than a blocky 1080p.  Sizes are common UVC capture modes, so the camera
+# delivers them directly instead of the encoder box scaling every frame.
+LIVE_LADDER = (
+    (2_500_000, 1280, 720, 30),
+    (1_200_000, 960, 540, 30),
+    (600_000, 848, 480, 25),
+    (300_000, 640, 360, 25),
+    (0, 424, 240, 15),
+)
+# Software x264 on the payload board cannot keep up above this rung
+SW_MAX_HEIGHT = 540
+
+
+_probe_lock = threading.Lock()
+
+
+def available_encoders() -> Tuple[str, ...]:
+    """
+    H.264 encoders this ffmpeg build offers (probed once).
+
+    The probe runs ffmpeg and can take seconds; HabEngine starts it on a
+    background thread at init.  Callers arriving meanwhile wait for that
+    probe instead of running a second one.
+    """
+    with _probe_lock:
+        return _probe_encoders()
+
+
+@lru_cache(maxsize=1)
+def _probe_encoders() -> Tuple[str, ...]:
+    try:
+        out = subprocess.run(["ffmpeg", "-hide_banner", "-encoders"],
+                             capture_output=True, text=True, timeout=10).stdout
+    except (OSError, subprocess.TimeoutExpired) as e:
+        logger.warning(f"Cannot probe ffmpeg encoders: {e}")
+        return (SW_ENCODER,)
+    # Encoder lines are " <flags> <name> <description>"
+    names = {fields[1] for fields in map(str.split, out.splitlines()) if len(fields) > 1}
+    return tuple(n for n in HW_ENCODERS + (SW_ENCODER,) if n in names) or (SW_ENCODER,)
+
+
+def select_encoder(requested: str = "auto") -> str:
+    """*requested* if ffmpeg has it, else the best available (hardware first)."""
+    encoders = available_encoders()
+    if requested != "auto":
+        if requested in encoders:
+            return requested
+        logger.warning(f"Encoder {requested} not available — falling back")
+    return encoders[0]
+
+
+def live_format(video_bps: int, encoder: str) -> Tuple[int, int, int]:
+    """(width, height, fps) for the live camera at *video_bps*."""
+    for min_bps, width, height, fps in LIVE_LADDER:
+        if encoder == SW_ENCODER and height > SW_MAX_HEIGHT:
+            continue
+        if video_bps >= min_bps:
+            return width, height, fps
+    return LIVE_LADDER[-1][1:]
+
+
+def file_input_args(input_file: str, resolution: str, framerate: int) -> List[str]:
+    """Real-time playback of a media file, scaled to *resolution*."""
+    return [
+        "-re", "-fflags", "+genpts",
+        "-i", input_file,
+        "-vf", f"scale={resolution},format=yuv420p",
+        "-r", str(framerate),
+    ]
+
+
+def live_input_args(device: str, width: int, height: int, fps: int) -> List[str]:
+    """V4L2 camera capture with minimal input buffering (no audio)."""
+    return [
+        "-fflags", "nobuffer", "-flags", "low_delay",
+        "-f", "v4l2", "-framerate", str(fps),
+        "-video_size", f"{width}x{height}",
+        "-i", device,
+        "-vf", f"scale={width}:{height},format=yuv420p",
+        "-an",
+    ]
+
+
+def video_encoder_args(encoder: str, bitrate_k: int, framerate: int,
+                       live: bool = False) -> List[str]:
+    """
+    H.264 rate control for *encoder*.
+
+    File playback keeps the original 1 s GOP.  Live uses a half-second GOP,
+    no B-frames and a VBV of a quarter second; on libx264 it also uses
+    sliced threads and periodic intra refresh instead of IDR frames, so no
+    single frame spikes the bitrate and a lost packet heals within a GOP.
+    """
+    gop = max(1, framerate // 2) if live else framerate
+    vbv_k = max(1, bitrate_k // 4) if live else bitrate_k * 3 // 4
+    args = ["-c:v", encoder, "-g", str(gop),
+            "-b:v", f"{bitrate_k}k", "-maxrate", f"{bitrate_k}k",
+            "-bufsize", f"{vbv_k}k"]
+    if encoder == SW_ENCODER:
+        args += ["-preset", "ultrafast" if live else "veryfast", "-tune", "zerolatency"]
+        if live:
+            args += ["-bf", "0", "-x264-params",
+                     "sliced-threads=1:slices=4:intra-refresh=1:rc-lookahead=0"]
+        else:
+            args += ["-keyint_min", str(framerate)]
+    else:
+        args += ["-bf", "0"]
+        if encoder == "h264_vaapi":
+            args = ["-vaapi_device", "/dev/dri/renderD128"] + args
+    return args
+
+
+def vaapi_filter(args: List[str]) -> List[str]:
+    """VAAPI needs frames uploaded to the GPU; extend the -vf chain."""
+    out = list(args)
+    if "-vf" in out:
+        i = out.index("-vf") + 1
+        out[i] = out[i].replace("format=yuv420p", "format=nv12,hwupload")
+    return out
+
+
+def build_video_args(profile: str, *, input_file: Optional[str] = None,
+                     device: str = "/dev/video0", encoder: str = "auto",
+                     video_bps: int, resolution: str = "1920:1080",
+                     framerate: int = 30) -> List[str]:
+    """ffmpeg input + video arguments for *profile* ("file" or "live")."""
+    if profile not in PROFILES:
+        raise ValueError(f"Unknown encode profile: {profile}")
+    bitrate_k = max(1, video_bps // 1000)
+    if profile == "file":
+        return (file_input_args(input_file, resolution, framerate)
+                + video_encoder_args(SW_ENCODER, bitrate_k, framerate))
+
+    chosen = select_encoder(encoder)
+    width, height, fps = live_format(video_bps, chosen)
+    logger.info(f"Live profile: {chosen} {width}x{height}@{fps} {bitrate_k}k")
+    inputs = live_input_args(device, width, height, fps)
+    if chosen == "h264_vaapi":
+        inputs = vaapi_filter(inputs)
+    return inputs + video_encoder_args(chosen, bitrate_k, fps, live=True)
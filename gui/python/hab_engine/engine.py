@@ -1,5 +1,6 @@
 """HabEngine — Core orchestrator for the HAB Ground Station."""
 
+import asyncio
 import logging
 import time
 import threading
@@ -9,11 +10,34 @@ from .models import (
     DeviceInfo, WSMessageType
 )
 from .pipeline_manager import PipelineManager
+from .encode_profiles import available_encoders
 from .flowgraph_manager import FlowgraphManager
 from .websocket_server import WebSocketServer
 
 logger = logging.getLogger(__name__)
 
+# Status publication: full status heartbeat, change coalescing window, and
+# pipeline metric sampling while it runs
+STATUS_HEARTBEAT_SEC = 5.0
+STATUS_COALESCE_SEC = 0.05
+PIPELINE_POLL_SEC = 1.0
+# Fields that change constantly and are only sent with the heartbeat
+_HEARTBEAT_ONLY = ("uptime_sec",)
+
+
+def _run_state(data: Dict[str, Any]) -> tuple:
+    """Engine, TX and pipeline run state from a status message's data.
+
+    A change here is always published as a full status, so clients that do
+    not merge status_delta still see TX and pipeline start/stop at once.
+    """
+    pipeline = data.get("pipeline") or {}
+    return (data.get("running"), data.get("tx_active"), data.get("rx_active"),
+            pipeline.get("running"), pipeline.get("file_path"))
+
+# DVB-S2 settings the running flowgraph can change without a restart
+LIVE_RETUNE_KEYS = ('modcod', 'rolloff', 'pilots')
+
 
 class HabEngine:
     """
@@ -21,7 +45,7 @@ class HabEngine:
 
     Manages:
     - DVBS2 TX flowgraph lifecycle
-    - ffmpeg → tsp encoding pipeline
+    - ffmpeg → TS pacer encoding pipeline
     - Telemetry RX (future)
     - Spectrum data collection
     - WebSocket broadcasting to macOS dashboard
@@ -34,7 +58,13 @@ class HabEngine:
             cls._instance = super().__new__(cls)
         return cls._instance
 
-    def __init__(self, enable_websocket: bool = True):
+    def __init__(self, enable_websocket: bool = True, prewarm: bool = False):
+        """Set up the managers and start the WebSocket server and broadcast loop.
+
+        *prewarm* also spawns the TX worker and probes ffmpeg's encoders, so
+        the first start_tx / live pipeline is fast.  The GUI sets it; tests
+        and tools leave it off and spawn neither.
+        """
         if hasattr(self, '_initialized') and self._initialized:
             return
         self._initialized = True
@@ -49,11 +79,14 @@ class HabEngine:
         self.ws_server = WebSocketServer() if enable_websocket else None
         if self.ws_server:
             self.ws_server.set_command_handler(self._handle_ws_command)
+            self.ws_server.set_connect_handler(self._status_snapshot)
 
         # Status — mark as running immediately on init
         self._status = EngineStatus()
         self._status.running = True
         self._status_lock = threading.Lock()
+        self._status_dirty = threading.Event()
+        self._published: Dict[str, Any] = {}
         self._error_count = 0
         self._last_error = ""
 
@@ -63,7 +96,7 @@ class HabEngine:
         # Auto-detect HackRF devices on startup
         self._detect_hackrf_devices()
 
-        # Status broadcast thread
+        # Status broadcast thread (event-driven, see _broadcast_loop)
         self._broadcast_thread = None
         self._broadcast_running = False
 
@@ -73,6 +106,17 @@ class HabEngine:
         # Connect flowgraph spectrum to our handler
         self.flowgraph.set_spectrum_callback(self._on_spectrum_data)
 
+        # TX state and counters come from the worker, not from our requests
+        self.flowgraph.set_state_callback(self._on_tx_state)
+        self.flowgraph.set_stats_callback(self._on_tx_stats)
+
+        if prewarm:
+            # Bring up the TX worker in warm standby (the launch runs on a
+            # background thread; this returns at once) and probe ffmpeg's
+            # encoders now rather than on the first live start
+            self.flowgraph.prewarm()
+            threading.Thread(target=available_encoders, name="encoder-probe", daemon=True).start()
+
         # Connect pipeline debug to log
         self.pipeline.set_debug_callback(
             lambda name, msg: logger.debug(f"[{name}] {msg}")
@@ -105,6 +149,7 @@ class HabEngine:
                 with self._status_lock:
                     self._status.device_connected = True
                     self._status.device_serial = serials[0]
+                self._mark_dirty()
                 logger.info(f"HackRF detected: {len(serials)} device(s), primary: {serials[0][:16]}...")
             else:
                 logger.warning("No HackRF devices found")
@@ -114,28 +159,73 @@ class HabEngine:
             logger.warning(f"HackRF detection failed: {e}")
 
     def _start_broadcast(self):
-        """Start periodic status broadcast."""
+        """Start the status broadcast thread."""
         self._broadcast_running = True
         self._broadcast_thread = threading.Thread(
             target=self._broadcast_loop, daemon=True
         )
         self._broadcast_thread.start()
 
+    def _mark_dirty(self):
+        """Note a status change; the broadcast thread publishes it right away."""
+        self._status_dirty.set()
+
     def _broadcast_loop(self):
-        """Broadcast engine status at 2 Hz."""
+        """
+        Publish status changes as they happen, plus a periodic heartbeat.
+
+        Changes (see _mark_dirty) are coalesced for STATUS_COALESCE_SEC and
+        sent as a status_delta holding only the fields that differ from the
+        last publication.  A full status goes out every STATUS_HEARTBEAT_SEC,
+        and whenever the run state changes (see _run_state).
+        While the pipeline runs, its metrics are sampled every
+        PIPELINE_POLL_SEC, and are sent only if they have changed.
+        """
+        next_heartbeat = 0.0
         while self._broadcast_running:
-            self._broadcast_status()
-            time.sleep(0.5)
+            now = time.monotonic()
+            timeout = max(0.0, next_heartbeat - now)
+            if self.pipeline.is_running:
+                timeout = min(timeout, PIPELINE_POLL_SEC)
+            if self._status_dirty.wait(timeout):
+                time.sleep(STATUS_COALESCE_SEC)
+            self._status_dirty.clear()
+            if not self._broadcast_running:
+                break
+            if time.monotonic() >= next_heartbeat:
+                self._broadcast_status(full=True)
+                next_heartbeat = time.monotonic() + STATUS_HEARTBEAT_SEC
+            else:
+                self._broadcast_status()
 
-    def _broadcast_status(self):
-        """Send current status to all WebSocket clients."""
-        if not self.ws_server:
-            return
+    def _status_snapshot(self) -> Dict[str, Any]:
         with self._status_lock:
+            if self.pipeline.is_running:
+                # Live encoder/pacer metrics
+                self._status.pipeline = self.pipeline.status
             self._status.uptime_sec = time.time() - self._start_time
             self._status.error_count = self._error_count
             self._status.last_error = self._last_error
-        self.ws_server.broadcast(self._status.to_message())
+            return self._status.to_message()
+
+    def _broadcast_status(self, full: bool = False):
+        """Send the full status, or just the fields changed since the last send."""
+        if not self.ws_server:
+            return
+        message = self._status_snapshot()
+        data = message["data"]
+        changed = {k: v for k, v in data.items()
+                   if k not in _HEARTBEAT_ONLY and self._published.get(k) != v}
+        if _run_state(data) != _run_state(self._published):
+            full = True
+        self._published = data
+        if full:
+            self.ws_server.broadcast(message)
+        elif changed:
+            self.ws_server.broadcast({
+                "type": WSMessageType.STATUS_DELTA.value,
+                "data": changed,
+            })
 
     def _on_spectrum_data(self, frame: SpectrumFrame):
         """Handle spectrum data from flowgraph."""
@@ -150,6 +240,30 @@ class HabEngine:
         if self.ws_server:
             self.ws_server.broadcast(frame.to_message())
 
+    def _on_tx_state(self, running: bool):
+        """Worker confirmed the flowgraph started or stopped."""
+        with self._status_lock:
+            self._status.tx_active = running
+            if not running:
+                self._status.tx_stats = {}
+        self._mark_dirty()
+
+    def _on_tx_stats(self, stats: Dict[str, Any]):
+        with self._status_lock:
+            self._status.tx_stats = stats
+        self._mark_dirty()
+
+    def _on_tx_start_result(self, future):
+        error = future.exception()
+        if error is not None:
+            logger.error(f"DVB-S2 TX failed to start: {error}")
+            with self._status_lock:
+                self._error_count += 1
+                self._last_error = str(error)
+            self._mark_dirty()
+        else:
+            logger.info("DVB-S2 TX running")
+
     def set_spectrum_callback(self, callback: Callable[[SpectrumFrame], None]):
         """Set callback for spectrum data (used by GUI tab)."""
         self._spectrum_callback = callback
@@ -163,10 +277,19 @@ class HabEngine:
 
         if cmd == WSMessageType.CMD_START_PIPELINE.value:
             file_path = data.get("file_path", self._device_info.serial)
-            await self.start_pipeline(file_path)
+            # Spawning ffmpeg (and waiting on the encoder probe) blocks;
+            # keep it off the event loop that serves every client
+            await asyncio.to_thread(
+                self.start_pipeline,
+                file_path,
+                profile=data.get("profile", "file"),
+                device=data.get("device", "/dev/video0"),
+                encoder=data.get("encoder", "auto"),
+            )
 
         elif cmd == WSMessageType.CMD_STOP_PIPELINE.value:
-            await self.stop_pipeline()
+            # Waits for ffmpeg/tsp to exit
+            await asyncio.to_thread(self.stop_pipeline)
 
         elif cmd == WSMessageType.CMD_START_TX.value:
             self.start_tx()
@@ -195,8 +318,8 @@ class HabEngine:
         elif cmd in ('set_modcod', 'set_pilots', 'set_rolloff', 'set_fec_frame',
                      'set_sps', 'set_rrc_delay', 'set_gold_code',
                      'set_fullscale', 'set_sink_type', 'set_device_args'):
-            # These parameters require a stop/start of TX to take effect.
-            # Store them in the flowgraph config for next start.
+            # Stored in the flowgraph config for the next start; modcod,
+            # rolloff and pilots are also retuned live if TX is running.
             param_map = {
                 'set_modcod': 'modcod',
                 'set_pilots': 'pilots',
@@ -222,6 +345,8 @@ class HabEngine:
             else:
                 val = data.get(key, data.get(cmd.replace('set_', ''), ''))
             self.flowgraph.update_config(**{key: val})
+            if key in LIVE_RETUNE_KEYS and self.flowgraph.is_running:
+                self.flowgraph.reconfigure(**{key: val})
 
     # ── Public API ──
 
@@ -231,6 +356,7 @@ class HabEngine:
         with self._status_lock:
             self._status.device_connected = device_info.connected
             self._status.device_serial = device_info.serial
+        self._mark_dirty()
 
     def update_params(self, frequency: float = None, symbol_rate: float = None):
         """Update radio parameters."""
@@ -238,17 +364,26 @@ class HabEngine:
             self._device_info.frequency = frequency
             with self._status_lock:
                 self._status.frequency = frequency
+            self._mark_dirty()
         if symbol_rate:
             self._device_info.sample_rate = symbol_rate * 2
             with self._status_lock:
                 self._status.symbol_rate = symbol_rate
+            self._mark_dirty()
 
-    def start_pipeline(self, input_file: str) -> bool:
-        """Start the ffmpeg → tsp encoding pipeline."""
-        success = self.pipeline.start(input_file)
+    def start_pipeline(self, input_file: str, profile: str = "file",
+                       device: str = "/dev/video0", encoder: str = "auto") -> bool:
+        """Start the ffmpeg → TS pacer encoding pipeline.
+
+        profile="live" encodes the V4L2 camera *device* instead of *input_file*.
+        """
+        # Size the mux and encoder to the TX link's modcod/symbol rate
+        success = self.pipeline.start(input_file, link=self.flowgraph.config,
+                                      profile=profile, device=device, encoder=encoder)
         if success:
             with self._status_lock:
                 self._status.pipeline = self.pipeline.status
+            self._mark_dirty()
         return success
 
     def stop_pipeline(self):
@@ -256,23 +391,22 @@ class HabEngine:
         self.pipeline.stop()
         with self._status_lock:
             self._status.pipeline = PipelineStatus()
+        self._mark_dirty()
 
     def start_tx(self, device_args: str = "driver=hackrf") -> bool:
         """Start DVB-S2 transmission.
         The flowgraph runs in a subprocess so this is truly non-blocking.
         Returns True if start was initiated, False if already running.
+        status.tx_active turns True only once the worker confirms the start.
         """
         if self.flowgraph.is_running:
             logger.warning("TX already running")
             return False
-        
+
         self.flowgraph.update_config(device_args=device_args)
         logger.info("Starting DVB-S2 TX...")
-        
-        # Fire-and-forget to subprocess worker
-        self.flowgraph.start()
-        with self._status_lock:
-            self._status.tx_active = True
+
+        self.flowgraph.start().add_done_callback(self._on_tx_start_result)
         logger.info("DVB-S2 TX initiated")
         return True
 
@@ -282,6 +416,7 @@ class HabEngine:
         self.flowgraph.stop()
         with self._status_lock:
             self._status.tx_active = False
+        self._mark_dirty()
         logger.info("DVB-S2 TX stopped")
 
     def set_pipeline_debug_callback(self, callback: Callable[[str, str], None]):
@@ -296,7 +431,9 @@ class HabEngine:
         """Full cleanup — stop all operations."""
         logger.info("HabEngine cleanup")
         self._broadcast_running = False
+        self._mark_dirty()  # wake the broadcast thread so it exits
         self.stop_tx()
+        self.flowgraph.cleanup()
         self.stop_pipeline()
         if self.ws_server:
             self.ws_server.stop()
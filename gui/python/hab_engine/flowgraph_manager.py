@@ -1,5 +1,7 @@
 """Flowgraph Manager — manages the DVB-S2 TX GNU Radio flowgraph lifecycle via subprocess."""
 
+import asyncio
+import itertools
 import json
 import logging
 import os
@@ -8,32 +10,70 @@ import subprocess
 import threading
 import time
 import traceback
+from concurrent.futures import Future
 from pathlib import Path
-from typing import Optional, Callable
+from typing import Dict, Optional, Callable, Any
+
+import numpy as np
 
 from .models import SpectrumFrame
+from .spectrum_ring import SpectrumRing
 
 logger = logging.getLogger(__name__)
 
 WORKER_SCRIPT = str(Path(__file__).parent.parent / "dvbs2_tx_worker.py")
 
+SPECTRUM_BINS = 1024
+SPECTRUM_POLL_S = 0.05  # 20 fps
+
+# Config keys whose change invalidates the worker's precomputed taps
+_PREWARM_KEYS = {"symbol_rate", "rolloff", "modcod"}
+
+# Reply deadlines for worker commands
+DEFAULT_TIMEOUT_SEC = 10.0
+START_TIMEOUT_SEC = 15.0
+STOP_TIMEOUT_SEC = 8.0
+
+
+class WorkerError(RuntimeError):
+    """A worker command failed, or the worker exited before replying."""
+
+
+class WorkerTimeout(WorkerError):
+    """The worker did not reply to a command in time."""
+
 
 class FlowgraphManager:
     """
     Manages the DVB-S2 transmitter flowgraph lifecycle using a subprocess worker.
     The GNU Radio flowgraph runs in a separate process to avoid blocking the async event loop.
+
+    The worker is kept alive across start/stop cycles (warm standby): prewarm()
+    launches it and has it import GNU Radio and design the taps for the current
+    config, so start() only has to build blocks and open the device.
     """
 
     def __init__(self):
         self._process: Optional[subprocess.Popen] = None
         self._lock = threading.Lock()
+        self._launch_lock = threading.Lock()
+        self._send_lock = threading.Lock()
         self._running = False
         self._worker_ready = threading.Event()
-        self._response_lock = threading.Lock()
-        self._last_response: Optional[dict] = None
-        self._response_event = threading.Event()
+        self._warm = False
+        self._ids = itertools.count(1)
+        self._pending: Dict[int, Future] = {}
+        self._pending_lock = threading.Lock()
+        self._state_callback: Optional[Callable[[bool], None]] = None
+        self._stats: Dict[str, Any] = {}
+        self._stats_callback: Optional[Callable[[Dict[str, Any]], None]] = None
         self._read_thread: Optional[threading.Thread] = None
         self._spectrum_callback: Optional[Callable[[SpectrumFrame], None]] = None
+        self._spectrum_ring: Optional[SpectrumRing] = None
+        self._spectrum_thread: Optional[threading.Thread] = None
+        self._spectrum_stop = threading.Event()
+        self._freq_offsets: Optional[np.ndarray] = None
+        self._freq_span = 0.0
         self._config = {
             "device_args": "driver=hackrf",
             "center_freq": 915e6,
@@ -50,21 +90,108 @@ class FlowgraphManager:
     def is_running(self) -> bool:
         return self._running
 
+    @property
+    def is_warm(self) -> bool:
+        """True while an idle worker has GNU Radio loaded and taps precomputed."""
+        return self._warm and self._worker_alive()
+
     @property
     def config(self) -> dict:
         return dict(self._config)
 
+    @property
+    def stats(self) -> Dict[str, Any]:
+        """Latest TX counters streamed by the worker (empty when idle)."""
+        return dict(self._stats)
+
+    def set_state_callback(self, callback: Callable[[bool], None]):
+        """Called with the new running state whenever the worker confirms a change."""
+        self._state_callback = callback
+
+    def set_stats_callback(self, callback: Callable[[Dict[str, Any]], None]):
+        self._stats_callback = callback
+
     def set_spectrum_callback(self, callback: Callable[[SpectrumFrame], None]):
         self._spectrum_callback = callback
 
     def update_config(self, **kwargs):
         self._config.update(kwargs)
+        # Keep the standby worker's cached taps in step with the next start
+        if (not self._running and self._worker_alive()
+                and _PREWARM_KEYS.intersection(kwargs)):
+            self.request("prewarm", self._config).add_done_callback(
+                self._log_failure("prewarm"))
+
+    def prewarm(self) -> Future:
+        """Launch the worker (if needed) and precompute the flowgraph for the current config."""
+        future = self.request("prewarm", self._config)
+        future.add_done_callback(self._log_failure("prewarm"))
+        return future
+
+    def _ensure_spectrum_ring(self) -> Optional[str]:
+        """Create the shared spectrum ring (once) and return its name for the worker."""
+        if self._spectrum_ring is None:
+            try:
+                self._spectrum_ring = SpectrumRing.create(bins=SPECTRUM_BINS)
+            except Exception as e:
+                logger.error(f"Spectrum ring unavailable: {e}")
+                return None
+        return self._spectrum_ring.name
+
+    def _start_spectrum_reader(self):
+        if self._spectrum_ring is None:
+            return
+        if self._spectrum_thread is not None and self._spectrum_thread.is_alive():
+            return
+        self._spectrum_stop.clear()
+        self._spectrum_thread = threading.Thread(
+            target=self._read_spectrum, daemon=True
+        )
+        self._spectrum_thread.start()
+
+    def _stop_spectrum_reader(self):
+        self._spectrum_stop.set()
+        if self._spectrum_thread is not None:
+            self._spectrum_thread.join(timeout=1.0)
+            self._spectrum_thread = None
+
+    def _frequencies(self, center_freq: float, span_hz: float) -> np.ndarray:
+        """Bin frequencies for a frame; the offsets only change with the span."""
+        if self._freq_offsets is None or span_hz != self._freq_span:
+            bins = self._spectrum_ring.bins
+            self._freq_offsets = np.fft.fftshift(np.fft.fftfreq(bins, 1.0 / span_hz))
+            self._freq_span = span_hz
+        return center_freq + self._freq_offsets
+
+    def _read_spectrum(self):
+        """Poll the shared ring and hand each new frame to the spectrum callback."""
+        ring = self._spectrum_ring
+        last_seq = ring.latest_seq
+        while not self._spectrum_stop.wait(SPECTRUM_POLL_S):
+            frame = ring.read(last_seq)
+            if frame is None:
+                continue
+            last_seq, power_db, center_freq, span_hz, ts = frame
+            if self._spectrum_callback is None:
+                continue
+            try:
+                self._spectrum_callback(SpectrumFrame(
+                    frequencies=self._frequencies(center_freq, span_hz).tolist(),
+                    power_db=power_db.tolist(),
+                    timestamp=ts,
+                    center_freq=center_freq,
+                    span_hz=span_hz,
+                ))
+            except Exception as e:
+                logger.error(f"Spectrum callback error: {e}")
+        logger.info("Spectrum reader stopped")
 
     def _read_worker_output(self):
         """Read stdout from the worker process and dispatch responses."""
-        while self._process and self._process.poll() is None:
+        process = self._process
+        while process and process.poll() is None:
             try:
-                line = self._process.stdout.readline()
+                line = process.stdout.readline()
                 if not line:
                     break
                 line = line.strip()
@@ -83,35 +210,75 @@ class FlowgraphManager:
                 logger.error(f"Worker read error: {e}")
                 break
         logger.info("Worker output reader stopped")
+        # Whatever was in flight will never be answered by this process
+        self._fail_pending("Worker process exited")
+        if self._process is process:
+            self._set_running(False)
 
     def _handle_response(self, msg: dict):
-        """Handle a JSON response from the worker."""
+        """Handle a JSON response or event from the worker."""
+        event = msg.get("event")
+        if event == "stats":
+            self._stats = msg.get("data", {})
+            if self._stats_callback:
+                try:
+                    self._stats_callback(dict(self._stats))
+                except Exception as e:
+                    logger.error(f"Stats callback error: {e}")
+            return
+
         status = msg.get("status", "")
         error = msg.get("error", "")
 
         if status == "started":
-            with self._lock:
-                self._running = True
+            self._set_running(True)
             logger.info("DVBS2 flowgraph started via worker")
         elif status in ("stopped", "already_stopped"):
-            with self._lock:
-                self._running = False
+            self._set_running(False)
             logger.info(f"DVBS2 flowgraph {status} via worker")
+        elif status == "warm":
+            self._warm = True
+            logger.info(f"Worker warm ({msg.get('elapsed_sec', 0)}s)")
         elif status == "ready":
-            with self._response_lock:
-                self._worker_ready.set()
+            self._worker_ready.set()
             logger.info("Worker process ready")
         elif error:
             logger.error(f"Worker error: {error}")
         else:
             logger.debug(f"Worker response: {msg}")
 
+        if "id" in msg:
+            if error:
+                self._resolve(msg["id"], error=WorkerError(error))
+            else:
+                self._resolve(msg["id"], response=msg)
+
+    def _set_running(self, running: bool):
+        with self._lock:
+            changed = self._running != running
+            self._running = running
+            if not running:
+                self._stats = {}
+        if changed and self._state_callback:
+            try:
+                self._state_callback(running)
+            except Exception as e:
+                logger.error(f"State callback error: {e}")
+
+    def _worker_alive(self) -> bool:
+        return self._process is not None and self._process.poll() is None
+
     def _ensure_worker(self) -> bool:
-        """Start the worker subprocess if not already running."""
-        if self._process is not None and self._process.poll() is None:
+        """Start the worker subprocess if not already running (blocks until it is ready)."""
+        with self._launch_lock:
+            return self._launch_worker()
+
+    def _launch_worker(self) -> bool:
+        if self._worker_alive():
             return True
 
         self._worker_ready = threading.Event()
+        self._warm = False
 
         try:
             self._process = subprocess.Popen(
@@ -144,88 +311,195 @@ class FlowgraphManager:
             logger.error(f"Failed to start worker: {e}")
             return False
 
-    def _send_async(self, cmd: str, data: Optional[dict] = None):
-        """Send a command to the worker without waiting for response (fire-and-forget)."""
-        if self._process is None or self._process.poll() is not None:
-            if not self._ensure_worker():
-                return
+    # ── RPC ──
+
+    def request(self, cmd: str, data: Optional[dict] = None,
+                timeout: Optional[float] = DEFAULT_TIMEOUT_SEC) -> Future:
+        """
+        Send a command to the worker and return a Future for its response.
+
+        Each request carries an id that the worker echoes, so several can be
+        in flight at once.  The future resolves to the response dict, or fails
+        with WorkerError if the worker reports an error or exits, and with
+        WorkerTimeout if no reply arrives within *timeout* seconds.  From
+        asyncio code, use request_async() (or ``asyncio.wrap_future``).
 
+        Never blocks: if the worker is not up, it is launched on a background
+        thread and the command is sent (and its timeout started) once the
+        worker is ready.
+        """
+        future: Future = Future()
         msg = {"command": cmd, "data": data or {}}
+        if self._worker_alive():
+            self._send(future, msg, timeout)
+        else:
+            # Spawning the worker and waiting for "ready" takes seconds; never
+            # on the caller's thread, which may be the engine's event loop
+            threading.Thread(target=self._launch_and_send, args=(future, msg, timeout),
+                             name="worker-launch", daemon=True).start()
+        return future
+
+    def _launch_and_send(self, future: Future, msg: dict, timeout: Optional[float]):
+        if not self._ensure_worker():
+            future.set_exception(WorkerError("Worker process unavailable"))
+            return
+        self._send(future, msg, timeout)
+
+    def _send(self, future: Future, msg: dict, timeout: Optional[float]):
+        """Register *future* under a new id and write *msg* to the worker."""
+        cmd = msg["command"]
+        with self._pending_lock:
+            req_id = next(self._ids)
+            self._pending[req_id] = future
+        if timeout is not None:
+            timer = threading.Timer(
+                timeout, self._resolve,
+                kwargs={"req_id": req_id,
+                        "error": WorkerTimeout(f"{cmd}: no reply within {timeout:g}s")},
+            )
+            timer.daemon = True
+            timer.start()
+            future.add_done_callback(lambda _: timer.cancel())
+
         try:
-            self._process.stdin.write(json.dumps(msg) + "\n")
-            self._process.stdin.flush()
+            with self._send_lock:
+                self._process.stdin.write(json.dumps({"id": req_id, **msg}) + "\n")
+                self._process.stdin.flush()
         except BrokenPipeError:
             logger.error("Worker process died")
+            self._resolve(req_id, error=WorkerError("Worker process died"))
             self._cleanup()
         except Exception as e:
             logger.error(f"Worker send error on cmd={cmd}: {e}")
+            self._resolve(req_id, error=WorkerError(str(e)))
+
+    async def request_async(self, cmd: str, data: Optional[dict] = None,
+                            timeout: Optional[float] = DEFAULT_TIMEOUT_SEC) -> dict:
+        """Awaitable form of request()."""
+        return await asyncio.wrap_future(self.request(cmd, data, timeout))
+
+    def call(self, cmd: str, data: Optional[dict] = None,
+             timeout: Optional[float] = DEFAULT_TIMEOUT_SEC) -> dict:
+        """Blocking form of request(); raises WorkerError/WorkerTimeout."""
+        return self.request(cmd, data, timeout).result()
+
+    def _resolve(self, req_id: int, response: Optional[dict] = None,
+                 error: Optional[Exception] = None):
+        with self._pending_lock:
+            future = self._pending.pop(req_id, None)
+        if future is None or future.done():
+            return
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(response)
+
+    def _fail_pending(self, reason: str):
+        with self._pending_lock:
+            pending, self._pending = self._pending, {}
+        for future in pending.values():
+            if not future.done():
+                future.set_exception(WorkerError(reason))
+
+    @staticmethod
+    def _done(result: dict) -> Future:
+        future: Future = Future()
+        future.set_result(result)
+        return future
+
+    def _log_failure(self, cmd: str) -> Callable[[Future], None]:
+        def _check(future: Future):
+            if future.exception() is not None:
+                logger.error(f"Worker {cmd} failed: {future.exception()}")
+        return _check
 
-    def start(self) -> bool:
-        """Start the DVB-S2 TX flowgraph via the worker subprocess (non-blocking)."""
+    # ── Lifecycle ──
+
+    def start(self) -> Future:
+        """
+        Start the DVB-S2 TX flowgraph via the worker subprocess (non-blocking).
+
+        Returns a Future that resolves once the worker reports the flowgraph
+        running (is_running is True from then on), or fails with WorkerError.
+        """
         if self._running:
             logger.warning("Flowgraph already running")
-            return False
+            future: Future = Future()
+            future.set_exception(WorkerError("Flowgraph already running"))
+            return future
 
-        with self._lock:
-            self._running = False  # Will be set True when worker responds
-        
-        self._send_async("start", self._config)
-        return True
+        config = dict(self._config)
+        shm_name = self._ensure_spectrum_ring()
+        if shm_name:
+            config["spectrum_shm"] = shm_name
+            self._start_spectrum_reader()
+        # Opening the HackRF can take a few seconds on a cold worker
+        return self.request("start", config, timeout=START_TIMEOUT_SEC)
 
-    def stop(self):
-        """Stop the DVB-S2 TX flowgraph via the worker subprocess (non-blocking)."""
-        with self._lock:
-            was_running = self._running
-            self._running = False
-        
-        if self._process and self._process.poll() is None:
-            self._send_async("stop")
-            
-            # Give worker a moment to stop gracefully, then force kill if needed
-            def _wait_and_cleanup():
-                try:
-                    self._process.wait(timeout=8.0)
-                except subprocess.TimeoutExpired:
-                    logger.warning("Worker not stopping — SIGTERM")
-                    try:
-                        self._process.terminate()
-                        self._process.wait(timeout=5.0)
-                    except subprocess.TimeoutExpired:
-                        logger.warning("Worker not responding to SIGTERM — SIGKILL")
-                        self._process.kill()
-                        self._process.wait()
+    def stop(self) -> Future:
+        """
+        Stop the DVB-S2 TX flowgraph via the worker subprocess (non-blocking).
+
+        The worker stays up as a warm standby; only if it does not confirm the
+        stop in time is it torn down (and relaunched on the next start).
+        """
+        self._stop_spectrum_reader()
+        if not self._worker_alive():
+            self._set_running(False)
+            return self._done({"status": "already_stopped"})
+
+        future = self.request("stop", timeout=STOP_TIMEOUT_SEC)
+
+        def _check_stopped(f: Future):
+            if isinstance(f.exception(), WorkerTimeout):
+                logger.warning("Worker did not confirm stop — restarting it")
+                self._force_kill()
                 self._process = None
-                logger.info("DVBS2 worker process stopped")
-            
-            t = threading.Thread(target=_wait_and_cleanup, daemon=True)
-            t.start()
+                self._warm = False
+                self._set_running(False)
+
+        future.add_done_callback(_check_stopped)
+        return future
 
-    def reconfigure(self, **kwargs):
-        """Reconfigure running flowgraph parameters (fire-and-forget)."""
-        if self._process and self._process.poll() is None:
-            self._send_async("reconfigure", kwargs)
+    def reconfigure(self, **kwargs) -> Optional[Future]:
+        """Reconfigure running flowgraph parameters; None if no worker is up."""
+        if self._worker_alive():
+            future = self.request("reconfigure", kwargs)
+            future.add_done_callback(self._log_failure("reconfigure"))
+            return future
+        return None
 
     def _force_kill(self):
         """Force-kill the worker process."""
         if self._process:
             try:
-                # Use SIGTERM first (gentle cleanup)
-                self._process.terminate()
+                # EOF on stdin ends the worker's command loop (it stops TX and
+                # exits); it ignores SIGTERM, so that is only the fallback
+                self._process.stdin.close()
                 self._process.wait(timeout=5)
             except subprocess.TimeoutExpired:
-                # Only SIGKILL as last resort
-                logger.warning("Worker not responding to SIGTERM — using SIGKILL")
-                self._process.kill()
-                self._process.wait()
+                try:
+                    self._process.terminate()
+                    self._process.wait(timeout=1)
+                except subprocess.TimeoutExpired:
+                    logger.warning("Worker not responding to SIGTERM — using SIGKILL")
+                    self._process.kill()
+                    self._process.wait()
             except Exception:
                 pass
 
     def _cleanup(self):
-        """Full cleanup — kill the worker process."""
-        self._running = False
+        """Full cleanup — shut down the worker process."""
+        self._warm = False
+        self._stop_spectrum_reader()
         self._force_kill()
         self._process = None
+        self._fail_pending("Worker shut down")
+        self._set_running(False)
         self._read_thread = None
+        if self._spectrum_ring is not None:
+            self._spectrum_ring.close()
+            self._spectrum_ring = None
         logger.info("DVBS2 worker cleanup done")
 
     def cleanup(self):
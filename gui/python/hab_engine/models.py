@@ -10,6 +10,7 @@ import time
 class WSMessageType(str, Enum):
     """WebSocket message type identifiers."""
     STATUS = "status"
+    STATUS_DELTA = "status_delta"   # only the status fields that changed
     SPECTRUM = "spectrum"
     TELEMETRY = "telemetry"
     PIPELINE = "pipeline"
@@ -31,13 +32,25 @@ class WSMessageType(str, Enum):
 
 @dataclass
 class PipelineStatus:
-    """Status of the ffmpeg → tsp pipeline."""
+    """Status of the ffmpeg → pacer → FIFO pipeline."""
     running: bool = False
     file_path: str = ""
-    bitrate: float = 0.0
-    packets_sent: int = 0
-    errors: int = 0
-    duration_sec: float = 0.0
+    bitrate: float = 0.0            # TS rate the pacer regulates to (b/s)
+    packets_sent: int = 0           # TS packets written to the FIFO
+    errors: int = 0                 # ffmpeg/tsp error lines + TS continuity errors
+    duration_sec: float = 0.0       # encoded media time
+    # Encoder health (ffmpeg -progress)
+    fps: float = 0.0
+    speed: float = 0.0              # < 1.0 means the encoder is behind real time
+    encode_bitrate: float = 0.0     # ffmpeg output rate (b/s)
+    frames: int = 0
+    dropped_frames: int = 0
+    dup_frames: int = 0
+    # Pacing health (TsPacer / tsp)
+    null_packets: int = 0
+    cc_errors: int = 0
+    queue_fill: float = 0.0         # pacer input queue, 0..1
+    fifo_bytes: int = 0             # unread bytes in the TS FIFO
 
 
 @dataclass
@@ -97,6 +110,7 @@ class EngineStatus:
     running: bool = False
     pipeline: PipelineStatus = field(default_factory=PipelineStatus)
     tx_active: bool = False
+    tx_stats: Dict[str, Any] = field(default_factory=dict)
     rx_active: bool = False
     device_connected: bool = False
     device_serial: str = ""
@@ -112,6 +126,7 @@ class EngineStatus:
             "data": {
                 "running": self.running,
                 "tx_active": self.tx_active,
+                "tx_stats": dict(self.tx_stats),
                 "rx_active": self.rx_active,
                 "device_connected": self.device_connected,
                 "frequency": self.frequency,
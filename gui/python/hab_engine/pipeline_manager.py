@@ -1,27 +1,62 @@
-"""Pipeline Manager — controls ffmpeg → tsp → FIFO encoding pipeline."""
+"""Pipeline Manager — controls the ffmpeg → pacer → FIFO encoding pipeline."""
 
 import os
+import re
 import subprocess
 import threading
 import logging
+from dataclasses import replace
 from pathlib import Path
 from typing import Optional, Callable
 
 from .models import PipelineStatus
+from .ts_pacer import TsPacer
+from .dvbs2_rate import link_rates
+from .encode_profiles import PROFILES, build_video_args
 
 logger = logging.getLogger(__name__)
 
+# tsp continuity plugin reports, e.g. "continuity: packet index: 1,234, PID: 0x0100, missing 3 packets"
+_TSP_CC_RE = re.compile(r"continuity:.*(missing|discontinuity|duplicate)", re.IGNORECASE)
+
+# Link assumed when the caller gives none (QPSK 1/2, pilots, 1 Msym/s = 965326 b/s)
+DEFAULT_LINK = {"modcod": "QPSK1/2", "symbol_rate": 1e6, "pilots": True}
+
+
+def _parse_bitrate(rate: str) -> int:
+    """ffmpeg-style "700k" / "1.2M" / "965326" → b/s."""
+    rate = str(rate).strip()
+    scale = {"k": 1_000, "K": 1_000, "m": 1_000_000, "M": 1_000_000}.get(rate[-1:], 1)
+    return int(float(rate[:-1] if scale != 1 else rate) * scale)
+
+
+# ffmpeg -progress lines ("frame=42", "speed=1.01x", "progress=continue", ...)
+_PROGRESS_RE = re.compile(r"^[a-z_0-9]+=\S*$")
+
+
+def _num(value, default: float = 0.0) -> float:
+    """ffmpeg stat value → float; "N/A", "" and missing keep *default*."""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
 
 class PipelineManager:
     """
     Manages the video encoding pipeline:
-    ffmpeg (encode MP4 → MPEG-TS over UDP) → tsp (rate regulate) → FIFO file
+    ffmpeg (encode MP4 → MPEG-TS on stdout) → TsPacer (rate regulate, in
+    process) → FIFO file.
+
+    pacer="tsp" keeps the original external chain instead:
+    ffmpeg (MPEG-TS over UDP multicast) → tsp (rate regulate) → FIFO file
     """
 
     def __init__(self, tsfifo_path: str = "/tmp/tsfifo"):
         self.tsfifo_path = tsfifo_path
         self._ffmpeg: Optional[subprocess.Popen] = None
         self._tsp: Optional[subprocess.Popen] = None
+        self._pacer: Optional[TsPacer] = None
         self._debug_callback: Optional[Callable[[str, str], None]] = None
         self._lock = threading.Lock()
         self._status = PipelineStatus()
@@ -33,26 +68,81 @@ class PipelineManager:
 
     @property
     def status(self) -> PipelineStatus:
-        return self._status
+        """Copy of the pipeline status with the pacer's counters folded in.
+
+        Nothing is written back, so the broadcast loop and other threads can
+        read it without the lock.
+        """
+        st = self._status
+        pacer = self._pacer
+        if pacer is None:
+            return replace(st)
+        stats = pacer.stats
+        return replace(
+            st,
+            packets_sent=stats.packets_out,
+            null_packets=stats.null_packets,
+            queue_fill=stats.queue_depth / max(stats.queue_capacity, 1),
+            fifo_bytes=max(stats.fifo_bytes, 0),
+            errors=st.errors + stats.cc_errors,
+            cc_errors=st.cc_errors + stats.cc_errors,
+        )
 
     @property
     def is_running(self) -> bool:
         return self._status.running
 
+    @property
+    def pacer(self) -> Optional[TsPacer]:
+        """The in-process TS pacer while a builtin-paced pipeline runs."""
+        return self._pacer
+
     def start(self, input_file: str,
-              video_bitrate: str = "700k",
-              audio_bitrate: str = "128k",
+              video_bitrate: Optional[str] = None,
+              audio_bitrate: Optional[str] = None,
               resolution: str = "1920:1080",
               framerate: int = 30,
-              muxrate: int = 965326,
-              ts_bitrate: int = 965326) -> bool:
-        """Start ffmpeg + tsp pipeline for the given input file."""
+              muxrate: Optional[int] = None,
+              ts_bitrate: Optional[int] = None,
+              pacer: str = "builtin",
+              link: Optional[dict] = None,
+              profile: str = "file",
+              device: str = "/dev/video0",
+              encoder: str = "auto") -> bool:
+        """Start ffmpeg + pacer pipeline for the given input file.
+
+        Rates left as None are derived from the DVB-S2 link capacity
+        (dvbs2_rate.link_rates) for *link* — a dict with "modcod",
+        "symbol_rate" and "pilots", normally the flowgraph config.
+        pacer: "builtin" (TsPacer reading ffmpeg's stdout) or "tsp"
+        profile: "file" plays *input_file* in real time; "live" captures the
+            V4L2 *device* (input_file is ignored) with a low-latency encode,
+            *encoder* ("auto" = hardware if available, else libx264), and a
+            resolution picked from the link capacity (encode_profiles)
+        """
         if self._status.running:
             logger.warning("Pipeline already running")
             return False
 
-        if not os.path.exists(input_file):
-            logger.error(f"Input file not found: {input_file}")
+        if profile not in PROFILES:
+            logger.error(f"Unknown pipeline profile: {profile}")
+            return False
+        live = profile == "live"
+        try:
+            rates = self.rates_for_link(link)
+        except ValueError as e:
+            logger.error(f"Cannot size pipeline for link: {e}")
+            return False
+        ts_bitrate = ts_bitrate or rates["ts_bitrate"]
+        muxrate = muxrate or ts_bitrate
+        # Live capture has no audio, so video also gets the audio share
+        video_bps = rates["video_bitrate"] + (rates["audio_bitrate"] if live else 0)
+        video_bitrate = video_bitrate or f"{video_bps // 1000}k"
+        audio_bitrate = audio_bitrate or f"{rates['audio_bitrate'] // 1000}k"
+        source = device if live else input_file
+
+        if not os.path.exists(source):
+            logger.error(f"Input not found: {source}")
             return False
 
         with self._lock:
@@ -63,75 +153,72 @@ class PipelineManager:
                 os.mkfifo(self.tsfifo_path)
                 logger.info(f"Created FIFO: {self.tsfifo_path}")
 
+                builtin = pacer != "tsp"
+                output = "pipe:1" if builtin else "udp://239.1.1.1:5001?pkt_size=1316"
+
                 # ── ffmpeg command ──
-                ffmpeg_cmd = [
-                    "ffmpeg", "-re", "-fflags", "+genpts",
-                    "-i", input_file,
-                    "-vf", f"scale={resolution},format=yuv420p",
-                    "-r", str(framerate),
-                    "-c:v", "libx264", "-preset", "veryfast",
-                    "-tune", "zerolatency",
-                    "-g", str(framerate),
-                    "-keyint_min", str(framerate),
-                    "-b:v", video_bitrate,
-                    "-maxrate", video_bitrate,
-                    "-bufsize", str(int(video_bitrate.replace("k", "")) * 3 // 4) + "k",
-                    "-c:a", "mp2",
-                    "-b:a", audio_bitrate,
+                # -progress: machine-readable key=value stats on stderr
+                ffmpeg_cmd = ["ffmpeg", "-hide_banner", "-nostats", "-progress", "pipe:2"] + build_video_args(
+                    profile, input_file=input_file, device=device, encoder=encoder,
+                    video_bps=_parse_bitrate(video_bitrate),
+                    resolution=resolution, framerate=framerate,
+                )
+                if not live:
+                    ffmpeg_cmd += ["-c:a", "mp2", "-b:a", audio_bitrate]
+                ffmpeg_cmd += [
                     "-f", "mpegts",
                     "-muxrate", str(muxrate),
                     "-mpegts_flags", "+resend_headers",
-                    f"udp://239.1.1.1:5001?pkt_size=1316"
                 ]
+                if live:
+                    # Flush each packet and keep the muxer from buffering
+                    ffmpeg_cmd += ["-flush_packets", "1", "-max_delay", "0"]
+                ffmpeg_cmd.append(output)
 
-                self._ffmpeg = subprocess.Popen(
-                    ffmpeg_cmd,
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.STDOUT,
-                    text=True,
-                    bufsize=1,
-                )
-
-                # ── tsp command ──
-                tsp_cmd = [
-                    "tsp", "-I", "ip", "239.1.1.1:5001",
-                    "-P", "regulate", "--bitrate", str(ts_bitrate),
-                    "-O", "file", self.tsfifo_path,
-                ]
+                if builtin:
+                    # TS on stdout straight into the pacer; logs on stderr
+                    self._ffmpeg = subprocess.Popen(
+                        ffmpeg_cmd,
+                        stdin=subprocess.DEVNULL,
+                        stdout=subprocess.PIPE,
+                        stderr=subprocess.PIPE,
+                        bufsize=0,
+                    )
+                    self._pacer = TsPacer(ts_bitrate, self.tsfifo_path)
+                    self._pacer.start(self._ffmpeg.stdout)
+                    self._start_reader(self._ffmpeg.stderr, "ffmpeg")
+                else:
+                    self._ffmpeg = subprocess.Popen(
+                        ffmpeg_cmd,
+                        stdout=subprocess.PIPE,
+                        stderr=subprocess.STDOUT,
+                        bufsize=0,
+                    )
 
-                self._tsp = subprocess.Popen(
-                    tsp_cmd,
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.STDOUT,
-                    text=True,
-                    bufsize=1,
-                )
+                    # ── tsp command ──
+                    tsp_cmd = [
+                        "tsp", "-I", "ip", "239.1.1.1:5001",
+                        "-P", "continuity",
+                        "-P", "regulate", "--bitrate", str(ts_bitrate),
+                        "-O", "file", self.tsfifo_path,
+                    ]
 
-                # Start output reader threads
-                if self._ffmpeg.stdout:
-                    t = threading.Thread(
-                        target=self._read_output,
-                        args=(self._ffmpeg, "ffmpeg"),
-                        daemon=True
-                    )
-                    t.start()
-                    self._threads.append(t)
-
-                if self._tsp.stdout:
-                    t = threading.Thread(
-                        target=self._read_output,
-                        args=(self._tsp, "tsp"),
-                        daemon=True
+                    self._tsp = subprocess.Popen(
+                        tsp_cmd,
+                        stdout=subprocess.PIPE,
+                        stderr=subprocess.STDOUT,
+                        bufsize=0,
                     )
-                    t.start()
-                    self._threads.append(t)
+                    self._start_reader(self._ffmpeg.stdout, "ffmpeg")
+                    self._start_reader(self._tsp.stdout, "tsp")
 
                 self._status = PipelineStatus(
                     running=True,
-                    file_path=input_file,
+                    file_path=source,
                     bitrate=ts_bitrate,
                 )
-                logger.info(f"Pipeline started: {input_file}")
+                logger.info(f"Pipeline started ({profile}): {source} "
+                            f"(TS {ts_bitrate} b/s, video {video_bitrate}, audio {audio_bitrate})")
                 return True
 
             except Exception as e:
@@ -139,11 +226,41 @@ class PipelineManager:
                 self._cleanup()
                 return False
 
-    def _read_output(self, process: subprocess.Popen, name: str):
-        """Read stdout from a process line by line."""
+    @staticmethod
+    def rates_for_link(link: Optional[dict] = None) -> dict:
+        """TS/mux/encoder rates (b/s) for a flowgraph-style link config.
+
+        Raises ValueError for a modcod the flowgraph would also reject.
+        """
+        link = {**DEFAULT_LINK, **(link or {})}
+        return link_rates(str(link["modcod"]), float(link["symbol_rate"]),
+                          bool(link["pilots"]))
+
+    def _start_reader(self, stream, name: str):
+        if stream is None:
+            return
+        t = threading.Thread(
+            target=self._read_output,
+            args=(stream, name),
+            daemon=True
+        )
+        t.start()
+        self._threads.append(t)
+
+    def _read_output(self, stream, name: str):
+        """Read a process's log output line by line, collecting health metrics."""
+        progress: dict = {}
         try:
-            for line in process.stdout:
-                line = line.strip()
+            for raw in stream:
+                line = raw.decode("utf-8", "replace").strip()
+                if name == "ffmpeg" and _PROGRESS_RE.match(line):
+                    key, _, value = line.partition("=")
+                    progress[key] = value
+                    if key == "progress":
+                        self._apply_progress(progress)
+                        progress = {}
+                    continue
+                self._count_errors(name, line)
                 if line:
                     if self._debug_callback:
                         self._debug_callback(name, line)
@@ -151,6 +268,27 @@ class PipelineManager:
         except Exception:
             pass
 
+    def _apply_progress(self, progress: dict):
+        """Fold one ffmpeg -progress block into the status."""
+        st = self._status
+        st.fps = _num(progress.get("fps"), st.fps)
+        st.speed = _num(progress.get("speed", "").rstrip("x"), st.speed)
+        st.frames = int(_num(progress.get("frame"), st.frames))
+        st.dropped_frames = int(_num(progress.get("drop_frames"), st.dropped_frames))
+        st.dup_frames = int(_num(progress.get("dup_frames"), st.dup_frames))
+        st.duration_sec = _num(progress.get("out_time_us"), st.duration_sec * 1e6) / 1e6
+        bitrate = progress.get("bitrate", "")
+        if bitrate.endswith("kbits/s"):
+            st.encode_bitrate = _num(bitrate[:-7], st.encode_bitrate / 1000) * 1000
+
+    def _count_errors(self, name: str, line: str):
+        st = self._status
+        if name == "tsp" and _TSP_CC_RE.search(line):
+            st.cc_errors += 1
+            st.errors += 1
+        elif "error" in line.lower():
+            st.errors += 1
+
     def stop(self):
         """Stop the pipeline and clean up."""
         with self._lock:
@@ -173,6 +311,11 @@ class PipelineManager:
         self._ffmpeg = None
         self._tsp = None
 
+        # ffmpeg is gone, so the pacer's input has hit EOF
+        if self._pacer:
+            self._pacer.stop()
+            self._pacer = None
+
         if os.path.exists(self.tsfifo_path):
             try:
                 os.remove(self.tsfifo_path)
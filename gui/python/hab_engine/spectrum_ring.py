@@ -0,0 +1,115 @@
+"""Spectrum Ring — shared-memory FFT frame channel between the TX worker and the engine."""
+
+import struct
+import time
+from multiprocessing import shared_memory
+from typing import Optional, Tuple
+
+import numpy as np
+
+# Header: magic, version, slot count, bins per frame, latest committed seq
+_HEADER = struct.Struct("<IHHIxxxxQ")
+_MAGIC = 0x48414253  # "HABS"
+_VERSION = 1
+# Per-slot metadata: seq, center_freq, span_hz, timestamp (all 8-byte aligned)
+_SLOT_META = struct.Struct("<Qddd")
+
+
+class SpectrumRing:
+    """
+    Fixed ring of spectrum frames in a ``multiprocessing.shared_memory`` block.
+
+    One writer (the DVB-S2 worker) and any number of readers.  Each frame goes
+    into slot ``seq % slots``; the slot's sequence number is cleared while the
+    frame is written and set afterwards, then the header's latest-seq is
+    bumped.  A reader copies the slot and re-checks the slot seq, so a frame
+    torn by a concurrent write is skipped rather than returned.  No locks,
+    pickling or JSON — frames are raw float32 power values in dB.
+    """
+
+    def __init__(self, shm: shared_memory.SharedMemory, owner: bool):
+        self._shm = shm
+        self._owner = owner
+        magic, version, slots, bins, _ = _HEADER.unpack_from(shm.buf, 0)
+        if magic != _MAGIC or version != _VERSION:
+            raise ValueError(f"Not a spectrum ring: {shm.name}")
+        self.slots = slots
+        self.bins = bins
+        self._slot_size = _SLOT_META.size + 4 * bins
+        self._seq = np.ndarray((1,), dtype=np.uint64, buffer=shm.buf, offset=_HEADER.size - 8)
+
+    @classmethod
+    def create(cls, bins: int = 1024, slots: int = 4,
+               name: Optional[str] = None) -> "SpectrumRing":
+        size = _HEADER.size + slots * (_SLOT_META.size + 4 * bins)
+        shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        shm.buf[:size] = bytes(size)
+        _HEADER.pack_into(shm.buf, 0, _MAGIC, _VERSION, slots, bins, 0)
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name: str) -> "SpectrumRing":
+        """Open an existing ring without taking ownership of its lifetime."""
+        try:
+            shm = shared_memory.SharedMemory(name=name, track=False)
+        except TypeError:
+            # Python < 3.13: stop the resource tracker unlinking it on our exit
+            from multiprocessing import resource_tracker
+            shm = shared_memory.SharedMemory(name=name)
+            resource_tracker.unregister(shm._name, "shared_memory")
+        return cls(shm, owner=False)
+
+    @property
+    def name(self) -> str:
+        return self._shm.name
+
+    @property
+    def latest_seq(self) -> int:
+        return int(self._seq[0])
+
+    def _slot(self, seq: int) -> Tuple[int, np.ndarray]:
+        offset = _HEADER.size + (seq % self.slots) * self._slot_size
+        power = np.ndarray((self.bins,), dtype=np.float32, buffer=self._shm.buf,
+                           offset=offset + _SLOT_META.size)
+        return offset, power
+
+    def write(self, power_db, center_freq: float, span_hz: float,
+              timestamp: Optional[float] = None) -> int:
+        """Publish one frame (*bins* dB values); returns its sequence number."""
+        seq = self.latest_seq + 1
+        offset, power = self._slot(seq)
+        buf = self._shm.buf
+        _SLOT_META.pack_into(buf, offset, 0, 0.0, 0.0, 0.0)
+        power[:] = power_db
+        _SLOT_META.pack_into(buf, offset, seq, center_freq, span_hz,
+                             time.time() if timestamp is None else timestamp)
+        self._seq[0] = seq
+        return seq
+
+    def read(self, after_seq: int = 0):
+        """
+        Newest frame if it is newer than *after_seq*.
+
+        Returns:
+            (seq, power_db copy, center_freq, span_hz, timestamp) or None
+        """
+        seq = self.latest_seq
+        if seq == 0 or seq == after_seq:
+            return None
+        offset, power = self._slot(seq)
+        buf = self._shm.buf
+        slot_seq, center_freq, span_hz, ts = _SLOT_META.unpack_from(buf, offset)
+        data = power.copy()
+        if slot_seq != seq or _SLOT_META.unpack_from(buf, offset)[0] != seq:
+            return None  # overwritten while copying; the next poll gets a fresh one
+        return seq, data, center_freq, span_hz, ts
+
+    def close(self):
+        """Detach; the creating side also unlinks the block."""
+        self._seq = None
+        self._shm.close()
+        if self._owner:
+            try:
+                self._shm.unlink()
+            except FileNotFoundError:
+                pass
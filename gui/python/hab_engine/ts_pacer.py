@@ -0,0 +1,196 @@
+"""TS Pacer — regulates an MPEG-TS byte stream to a constant bitrate, in process."""
+
+import fcntl
+import logging
+import os
+import queue
+import struct
+import termios
+import threading
+import time
+from dataclasses import dataclass
+from typing import BinaryIO, Optional
+
+logger = logging.getLogger(__name__)
+
+TS_PACKET_SIZE = 188
+TS_SYNC = 0x47
+NULL_PID = 0x1FFF
+
+# Schedule slip (e.g. the flowgraph stopped reading) after which pacing restarts
+MAX_BACKLOG_SEC = 0.25
+
+# Output FIFO fill is sampled once per this many packets written
+FIFO_POLL_PACKETS = 256
+
+# Null packet: sync, PID 0x1FFF, payload only (adaptation_field_control=01), CC 0
+NULL_PACKET = bytes([TS_SYNC, 0x1F, 0xFF, 0x10]) + b"\xff" * (TS_PACKET_SIZE - 4)
+
+
+@dataclass
+class PacerStats:
+    """Counters since start()."""
+    packets_in: int = 0
+    packets_out: int = 0
+    null_packets: int = 0
+    resyncs: int = 0
+    cc_errors: int = 0          # continuity-counter gaps in the input stream
+    queue_depth: int = 0
+    queue_capacity: int = 0
+    fifo_bytes: int = 0         # unread bytes in the output FIFO (-1 = unknown)
+
+
+class TsPacer:
+    """
+    Constant-bitrate TS regulator (replaces ``tsp -P regulate``).
+
+    A reader thread splits the source (ffmpeg's stdout) into 188-byte
+    packets, re-synchronising on the 0x47 sync byte if it ever loses
+    alignment, and queues them.  A writer thread sends packets to the output
+    path (the flowgraph's TS FIFO) on a fixed schedule of *bitrate* bits/s;
+    whenever a packet is due and none is queued, it sends a null packet
+    instead, so the modulator always sees a full-rate stream.
+
+    The queue holds *max_latency_sec* worth of packets; when it is full the
+    reader blocks, which back-pressures ffmpeg rather than letting latency
+    grow.
+    """
+
+    def __init__(self, bitrate: float, output_path: str,
+                 max_latency_sec: float = 0.5, burst_packets: int = 7):
+        self.bitrate = float(bitrate)
+        self.output_path = output_path
+        self.burst_packets = burst_packets
+        depth = max(burst_packets, int(self.bitrate * max_latency_sec / (TS_PACKET_SIZE * 8)))
+        self._queue: "queue.Queue[bytes]" = queue.Queue(maxsize=depth)
+        self._stats = PacerStats(queue_capacity=depth)
+        self._cc: dict[int, int] = {}
+        self._running = False
+        self._source: Optional[BinaryIO] = None
+        self._threads: list[threading.Thread] = []
+
+    @property
+    def stats(self) -> PacerStats:
+        self._stats.queue_depth = self._queue.qsize()
+        return PacerStats(**vars(self._stats))
+
+    @property
+    def is_running(self) -> bool:
+        return self._running
+
+    def start(self, source: BinaryIO):
+        """Start pacing packets read from *source* (a binary, blocking stream)."""
+        self._source = source
+        self._running = True
+        self._threads = [
+            threading.Thread(target=self._read_loop, name="ts-pacer-read", daemon=True),
+            threading.Thread(target=self._write_loop, name="ts-pacer-write", daemon=True),
+        ]
+        for t in self._threads:
+            t.start()
+
+    def stop(self):
+        self._running = False
+        # A writer still waiting in open() for the FIFO's reader would never
+        # notice; open the read end briefly so it can return and exit
+        try:
+            fd = os.open(self.output_path, os.O_RDONLY | os.O_NONBLOCK)
+            os.close(fd)
+        except OSError:
+            pass
+        for t in self._threads:
+            t.join(timeout=2.0)
+        self._threads = []
+
+    def _read_loop(self):
+        """Split the source into aligned TS packets and queue them."""
+        buf = bytearray()
+        try:
+            while self._running:
+                chunk = self._source.read(TS_PACKET_SIZE * self.burst_packets)
+                if not chunk:
+                    break
+                buf += chunk
+                while len(buf) >= TS_PACKET_SIZE:
+                    if buf[0] != TS_SYNC:
+                        # Lost alignment: skip to the next sync byte
+                        idx = buf.find(TS_SYNC, 1)
+                        del buf[:idx if idx > 0 else len(buf)]
+                        self._stats.resyncs += 1
+                        continue
+                    packet = bytes(buf[:TS_PACKET_SIZE])
+                    del buf[:TS_PACKET_SIZE]
+                    self._stats.packets_in += 1
+                    self._check_continuity(packet)
+                    while self._running:
+                        try:
+                            self._queue.put(packet, timeout=0.2)
+                            break
+                        except queue.Full:
+                            continue
+        except Exception as e:
+            logger.error(f"TS pacer read error: {e}")
+        logger.info("TS pacer input ended")
+
+    def _check_continuity(self, packet: bytes):
+        """Count continuity-counter gaps per PID (one repeat is allowed)."""
+        pid = ((packet[1] & 0x1F) << 8) | packet[2]
+        if pid == NULL_PID or not packet[3] & 0x10:
+            return  # nulls and adaptation-only packets don't advance the CC
+        cc = packet[3] & 0x0F
+        last = self._cc.get(pid)
+        discontinuity = packet[3] & 0x20 and packet[4] > 0 and packet[5] & 0x80
+        if last is not None and not discontinuity and cc not in (last, (last + 1) & 0x0F):
+            self._stats.cc_errors += 1
+        self._cc[pid] = cc
+
+    def _fifo_fill(self, fd: int) -> int:
+        """Bytes written to the FIFO but not yet read by the flowgraph."""
+        try:
+            return struct.unpack("i", fcntl.ioctl(fd, termios.FIONREAD, b"\0" * 4))[0]
+        except OSError:
+            return -1
+
+    def _write_loop(self):
+        """Send queued (or null) packets at exactly self.bitrate."""
+        packet_sec = TS_PACKET_SIZE * 8 / self.bitrate
+        try:
+            # Opening a FIFO for writing blocks until the flowgraph opens it
+            fd = os.open(self.output_path, os.O_WRONLY)
+        except OSError as e:
+            logger.error(f"TS pacer cannot open {self.output_path}: {e}")
+            self._running = False
+            return
+
+        try:
+            t0 = time.monotonic()
+            sent = 0
+            while self._running:
+                due = int((time.monotonic() - t0) / packet_sec) - sent
+                if due > MAX_BACKLOG_SEC / packet_sec:
+                    # The reader stalled (writes blocked); restart the schedule
+                    # instead of bursting the backlog into the FIFO
+                    t0, sent, due = time.monotonic(), 0, 1
+                if due <= 0:
+                    time.sleep(min(packet_sec * self.burst_packets, 0.005))
+                    continue
+                due = min(due, self.burst_packets)
+                out = bytearray()
+                for _ in range(due):
+                    try:
+                        out += self._queue.get_nowait()
+                    except queue.Empty:
+                        out += NULL_PACKET
+                        self._stats.null_packets += 1
+                os.write(fd, out)
+                sent += due
+                self._stats.packets_out += due
+                if self._stats.packets_out % FIFO_POLL_PACKETS < due:
+                    self._stats.fifo_bytes = self._fifo_fill(fd)
+        except BrokenPipeError:
+            logger.info("TS pacer output closed by reader")
+        except Exception as e:
+            logger.error(f"TS pacer write error: {e}")
+        finally:
+            os.close(fd)
+            self._running = False
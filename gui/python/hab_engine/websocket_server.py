@@ -31,12 +31,17 @@ class WebSocketServer:
         self._clients: Set[Any] = set()
         self._running = False
         self._command_handler: Optional[callable] = None
+        self._connect_handler: Optional[callable] = None
         self._message_queue: asyncio.Queue = None
 
     def set_command_handler(self, handler: callable):
         """Set callback for incoming commands from clients."""
         self._command_handler = handler
 
+    def set_connect_handler(self, handler: callable):
+        """Set callback returning a message to send each newly connected client."""
+        self._connect_handler = handler
+
     def start(self):
         """Start the WebSocket server in a background thread."""
         if not HAS_WEBSOCKETS:
@@ -60,6 +65,9 @@ class WebSocketServer:
             self._clients.add(websocket)
             logger.info(f"WebSocket client connected ({len(self._clients)} total)")
             try:
+                if self._connect_handler:
+                    # Full state up front; later updates are deltas
+                    await websocket.send(json.dumps(self._connect_handler()))
                 async for raw in websocket:
                     try:
                         msg = json.loads(raw)
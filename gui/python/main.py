@@ -27,7 +27,7 @@ class MainWindow(QMainWindow):
         self.resize(1400, 900)
 
         # Initialize the engine (singleton)
-        self.engine = HabEngine(enable_websocket=True)
+        self.engine = HabEngine(enable_websocket=True, prewarm=True)
 
         # Root widget
         root = QWidget()
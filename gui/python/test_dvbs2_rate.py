@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+DVB-S2 link capacity — pinned TS bitrates for the Kbch, slot and pilot math.
+
+Expected values are worked out by hand from ETSI EN 302 307:
+(Kbch - 80) * Rs / (90 * (slots + 1) + 36 * pilot blocks).
+
+Usage:
+    python test_dvbs2_rate.py
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from hab_engine.dvbs2_rate import link_rates, parse_modcod, plframe_symbols, ts_bitrate
+from hab_engine.pipeline_manager import PipelineManager
+
+
+def test_parse_modcod():
+    """Spacing, case and separators are ignored; unknown MODCODs raise."""
+    assert parse_modcod("QPSK 1/2") == ("QPSK", "1/2")
+    assert parse_modcod("qpsk1/2") == ("QPSK", "1/2")
+    assert parse_modcod("8PSK-3/5") == ("8PSK", "3/5")
+    assert parse_modcod("32apsk 9/10") == ("32APSK", "9/10")
+    for bad in ("QPSK7/8", "64APSK1/2", ""):
+        try:
+            parse_modcod(bad)
+        except ValueError:
+            continue
+        raise AssertionError(f"{bad!r} accepted")
+
+
+def test_plframe_symbols():
+    """PLHEADER slot + payload slots + one 36-symbol pilot block per 16 slots."""
+    assert plframe_symbols("QPSK1/2") == 90 * 361 + 36 * 22           # 360 slots
+    assert plframe_symbols("QPSK1/2", pilots=False) == 90 * 361
+    assert plframe_symbols("8PSK3/5") == 90 * 241 + 36 * 14           # 240 slots
+    assert plframe_symbols("16APSK3/4", True, "short") == 90 * 46 + 36 * 2
+    assert plframe_symbols("QPSK1/2", False, "short") == 90 * 91
+
+
+def test_qpsk_half_normal():
+    """QPSK 1/2, pilots, 1 Msym/s: the rate the pipeline used to hard-code."""
+    assert ts_bitrate("QPSK1/2", 1e6) == 965326
+
+
+def test_short_frame():
+    """Short FECFRAME uses the short Kbch table (QPSK 1/2: 7032)."""
+    assert ts_bitrate("QPSK1/2", 1e6, pilots=False, fec_frame="short") == 848840
+    try:
+        ts_bitrate("QPSK9/10", 1e6, fec_frame="short")
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("9/10 has no short frame")
+
+
+def test_higher_order():
+    """8PSK and APSK: fewer slots per frame, scaled by symbol rate."""
+    assert ts_bitrate("8PSK3/5", 2e6) == 3479138
+    assert ts_bitrate("16APSK3/4", 1e6, pilots=True, fec_frame="short") == 2761633
+    assert ts_bitrate("8PSK3/5", 1e6) == ts_bitrate("8PSK3/5", 2e6) // 2
+
+
+def test_link_rates():
+    """muxrate equals the TS rate; audio + video fill ES_SHARE of it."""
+    rates = link_rates("QPSK1/2", 1e6)
+    assert rates == {"ts_bitrate": 965326, "muxrate": 965326,
+                     "video_bitrate": 702180, "audio_bitrate": 128000}, rates
+    # On a thin link audio is held to a quarter of the ES budget
+    thin = link_rates("QPSK1/4", 100e3)
+    assert thin["audio_bitrate"] == int(thin["ts_bitrate"] * 0.86) // 4
+    assert thin["video_bitrate"] + thin["audio_bitrate"] <= thin["ts_bitrate"]
+
+
+def test_pipeline_link():
+    """Missing keys come from DEFAULT_LINK; an unknown modcod is refused, like the flowgraph."""
+    assert PipelineManager.rates_for_link(None) == link_rates("QPSK1/2", 1e6)
+    # Flowgraph extras are ignored
+    assert PipelineManager.rates_for_link({"symbol_rate": 500e3, "center_freq": 915e6}) \
+        == link_rates("QPSK1/2", 500e3)
+    try:
+        PipelineManager.rates_for_link({"modcod": "QPSK7/7", "symbol_rate": 2e6})
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("unknown modcod sized")
+    pipeline = PipelineManager(tsfifo_path="/nonexistent/tsfifo")
+    assert pipeline.start(__file__, link={"modcod": "QPSK7/7"}) is False
+    assert not pipeline.is_running
+
+
+TESTS = [
+    ("parse modcod",      test_parse_modcod),
+    ("plframe symbols",   test_plframe_symbols),
+    ("QPSK 1/2 normal",   test_qpsk_half_normal),
+    ("short frame",       test_short_frame),
+    ("8PSK / APSK",       test_higher_order),
+    ("link rates",        test_link_rates),
+    ("pipeline link",     test_pipeline_link),
+]
+
+
+if __name__ == '__main__':
+    failed = 0
+    for name, fn in TESTS:
+        try:
+            fn()
+            print(f"  ✓  {name}")
+        except Exception as e:
+            print(f"  ✗  {name:<20s}  {e}")
+            failed += 1
+    sys.exit(failed)
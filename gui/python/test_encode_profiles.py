@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Encode profiles — resolution ladder, encoder choice and ffmpeg arguments.
+
+Pure argument building; the encoder probe runs a stand-in ffmpeg from a
+temporary PATH entry, so no real ffmpeg is needed.
+
+Usage:
+    python test_encode_profiles.py
+"""
+import os
+import stat
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from hab_engine import encode_profiles
+from hab_engine.encode_profiles import (LIVE_LADDER, SW_ENCODER, build_video_args,
+                                        live_format, select_encoder)
+
+
+def _with_encoders(encoders, fn):
+    """Run *fn* with available_encoders() reporting *encoders*."""
+    real = encode_profiles.available_encoders
+    encode_profiles.available_encoders = lambda: tuple(encoders)
+    try:
+        return fn()
+    finally:
+        encode_profiles.available_encoders = real
+
+
+def _value(args, flag):
+    return args[args.index(flag) + 1]
+
+
+def test_ladder():
+    """The first rung the video rate can carry is used, down to 240p."""
+    hw = "h264_v4l2m2m"
+    assert live_format(5_000_000, hw) == (1280, 720, 30)
+    assert live_format(2_500_000, hw) == (1280, 720, 30)
+    assert live_format(2_499_999, hw) == (960, 540, 30)
+    assert live_format(700_000, hw) == (848, 480, 25)
+    assert live_format(300_000, hw) == (640, 360, 25)
+    assert live_format(100_000, hw) == (424, 240, 15)
+    assert live_format(0, hw) == LIVE_LADDER[-1][1:]
+
+
+def test_software_cap():
+    """libx264 never gets a rung above 540p, however fast the link."""
+    assert live_format(10_000_000, SW_ENCODER) == (960, 540, 30)
+    assert live_format(700_000, SW_ENCODER) == (848, 480, 25)
+
+
+def test_file_profile():
+    """File playback: real-time read, scaled, libx264 with a 1 s GOP."""
+    args = build_video_args("file", input_file="/tmp/in.mp4", video_bps=700_000,
+                            resolution="1280:720", framerate=25)
+    assert args[:5] == ["-re", "-fflags", "+genpts", "-i", "/tmp/in.mp4"]
+    assert _value(args, "-vf") == "scale=1280:720,format=yuv420p"
+    assert _value(args, "-c:v") == SW_ENCODER
+    assert (_value(args, "-g"), _value(args, "-keyint_min")) == ("25", "25")
+    assert (_value(args, "-b:v"), _value(args, "-maxrate")) == ("700k", "700k")
+    assert _value(args, "-bufsize") == "525k"
+    assert _value(args, "-preset") == "veryfast"
+
+
+def test_live_software():
+    """Live on libx264: V4L2 at the ladder size, half-second GOP, intra refresh."""
+    args = _with_encoders([SW_ENCODER], lambda: build_video_args(
+        "live", device="/dev/video2", video_bps=2_000_000))
+    assert "-re" not in args
+    assert _value(args, "-f") == "v4l2"
+    assert _value(args, "-i") == "/dev/video2"
+    assert _value(args, "-video_size") == "960x540"
+    assert _value(args, "-framerate") == "30"
+    assert "-an" in args
+    assert (_value(args, "-g"), _value(args, "-bf")) == ("15", "0")
+    assert _value(args, "-bufsize") == "500k"
+    assert _value(args, "-preset") == "ultrafast"
+    assert "intra-refresh=1" in _value(args, "-x264-params")
+
+
+def test_live_hardware():
+    """Hardware encoders come first; VAAPI uploads frames and names its device."""
+    args = _with_encoders(["h264_vaapi", SW_ENCODER], lambda: build_video_args(
+        "live", video_bps=3_000_000))
+    assert _value(args, "-c:v") == "h264_vaapi"
+    assert _value(args, "-video_size") == "1280x720"
+    assert _value(args, "-vf") == "scale=1280:720,format=nv12,hwupload"
+    assert args.index("-vaapi_device") < args.index("-c:v")
+    assert "-x264-params" not in args
+
+
+def test_select_encoder():
+    """A requested encoder is used if present, else the best available."""
+    encoders = ["h264_v4l2m2m", SW_ENCODER]
+    assert _with_encoders(encoders, lambda: select_encoder()) == "h264_v4l2m2m"
+    assert _with_encoders(encoders, lambda: select_encoder(SW_ENCODER)) == SW_ENCODER
+    assert _with_encoders(encoders, lambda: select_encoder("h264_rkmpp")) == "h264_v4l2m2m"
+    try:
+        build_video_args("screen", video_bps=1_000_000)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("unknown profile accepted")
+
+
+def test_probe_once():
+    """The encoder list is parsed from `ffmpeg -encoders` and probed only once."""
+    bindir = tempfile.mkdtemp()
+    calls = os.path.join(bindir, "calls")
+    script = os.path.join(bindir, "ffmpeg")
+    with open(script, "w") as f:
+        f.write(f"""#!/bin/sh
+echo x >> {calls}
+echo 'Encoders:'
+echo ' V....D libx264              libx264 H.264 / AVC'
+echo ' V....D h264_v4l2m2m         V4L2 mem2mem H.264 encoder wrapper'
+echo ' V....D mpeg2video           MPEG-2 video'
+""")
+    os.chmod(script, os.stat(script).st_mode | stat.S_IXUSR)
+    path = os.environ.get("PATH", "")
+    os.environ["PATH"] = bindir + os.pathsep + path
+    encode_profiles._probe_encoders.cache_clear()
+    try:
+        assert encode_profiles.available_encoders() == ("h264_v4l2m2m", SW_ENCODER)
+        assert encode_profiles.available_encoders() == ("h264_v4l2m2m", SW_ENCODER)
+        with open(calls) as f:
+            assert len(f.readlines()) == 1, "ffmpeg probed more than once"
+    finally:
+        os.environ["PATH"] = path
+        encode_profiles._probe_encoders.cache_clear()
+
+
+TESTS = [
+    ("resolution ladder", test_ladder),
+    ("software cap",      test_software_cap),
+    ("file profile",      test_file_profile),
+    ("live libx264",      test_live_software),
+    ("live hardware",     test_live_hardware),
+    ("select encoder",    test_select_encoder),
+    ("probe once",        test_probe_once),
+]
+
+
+if __name__ == '__main__':
+    failed = 0
+    for name, fn in TESTS:
+        try:
+            fn()
+            print(f"  ✓  {name}")
+        except Exception as e:
+            print(f"  ✗  {name:<20s}  {e}")
+            failed += 1
+    sys.exit(failed)
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+FlowgraphManager — worker RPC without GNU Radio.
+
+Runs the manager against a stand-in worker that speaks the same JSON
+protocol (ready line, echoed ids, "stats" events), to cover id matching,
+WorkerTimeout, stats routing and the non-blocking worker launch.
+
+Usage:
+    python test_flowgraph_manager.py
+"""
+import os
+import stat
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from hab_engine import flowgraph_manager
+from hab_engine.flowgraph_manager import FlowgraphManager, WorkerError, WorkerTimeout
+
+# Replies to "echo" after data["delay"] seconds (on its own thread, so later
+# requests can overtake it), never replies to "hang", emits a stats event
+# for "stats", and announces itself after READY_DELAY seconds.
+FAKE_WORKER = '''#!{python}
+import json, os, sys, threading, time
+lock = threading.Lock()
+def write(msg):
+    with lock:
+        print(json.dumps(msg), flush=True)
+time.sleep({ready_delay})
+write({{"status": "ready"}})
+for line in sys.stdin:
+    msg = json.loads(line)
+    cmd, data, rid = msg["command"], msg.get("data", {{}}), msg.get("id")
+    if cmd == "echo":
+        def reply(rid=rid, data=data):
+            time.sleep(data.get("delay", 0))
+            write({{"id": rid, "status": "ok", "value": data.get("value"),
+                   "pid": os.getpid()}})
+        threading.Thread(target=reply).start()
+    elif cmd == "stats":
+        write({{"event": "stats", "data": {{"bytes": 188, "underruns": 0}}}})
+        write({{"id": rid, "status": "ok"}})
+    elif cmd == "fail":
+        write({{"id": rid, "error": "boom"}})
+    elif cmd == "hang":
+        pass
+'''
+
+
+def _manager(ready_delay=0.0):
+    """A FlowgraphManager whose worker is the stand-in script."""
+    path = os.path.join(tempfile.mkdtemp(), "fake_worker.py")
+    with open(path, "w") as f:
+        f.write(FAKE_WORKER.format(python=sys.executable, ready_delay=ready_delay))
+    os.chmod(path, os.stat(path).st_mode | stat.S_IXUSR)
+    flowgraph_manager.WORKER_SCRIPT = path
+    return FlowgraphManager()
+
+
+def test_id_matching():
+    """Out-of-order replies resolve the request they belong to."""
+    mgr = _manager()
+    try:
+        slow = mgr.request("echo", {"value": "slow", "delay": 0.5})
+        fast = mgr.request("echo", {"value": "fast"})
+        assert fast.result(timeout=5)["value"] == "fast"
+        assert not slow.done(), "slow request resolved by the fast reply"
+        assert slow.result(timeout=5)["value"] == "slow"
+    finally:
+        mgr.cleanup()
+
+
+def test_error_reply():
+    """An error reply fails only its own future, with WorkerError."""
+    mgr = _manager()
+    try:
+        try:
+            mgr.call("fail")
+        except WorkerTimeout:
+            raise AssertionError("error reply surfaced as a timeout")
+        except WorkerError as e:
+            assert "boom" in str(e)
+        else:
+            raise AssertionError("error reply did not raise")
+        assert mgr.call("echo", {"value": 1})["value"] == 1
+    finally:
+        mgr.cleanup()
+
+
+def test_timeout():
+    """No reply within the deadline raises WorkerTimeout; the worker stays usable."""
+    mgr = _manager()
+    try:
+        t0 = time.monotonic()
+        try:
+            mgr.call("hang", timeout=0.3)
+        except WorkerTimeout:
+            pass
+        else:
+            raise AssertionError("hang did not time out")
+        assert time.monotonic() - t0 < 2.0
+        assert not mgr._pending, "timed-out request still pending"
+        assert mgr.call("echo", {"value": 2})["value"] == 2
+    finally:
+        mgr.cleanup()
+
+
+def test_exit_fails_pending():
+    """Requests in flight fail with WorkerError when the worker goes away."""
+    mgr = _manager()
+    hung = mgr.request("hang", timeout=None)
+    mgr.call("echo")
+    mgr.cleanup()
+    try:
+        hung.result(timeout=5)
+    except WorkerTimeout:
+        raise AssertionError("reported as a timeout")
+    except WorkerError:
+        pass
+    else:
+        raise AssertionError("pending request not failed")
+
+
+def test_stats_routing():
+    """Stats events reach the callback and stats, not any request future."""
+    mgr = _manager()
+    received = []
+    mgr.set_stats_callback(received.append)
+    try:
+        reply = mgr.call("stats")
+        assert reply == {"id": reply["id"], "status": "ok"}, reply
+        assert received == [{"bytes": 188, "underruns": 0}], received
+        assert mgr.stats == {"bytes": 188, "underruns": 0}
+    finally:
+        mgr.cleanup()
+
+
+def test_launch_does_not_block():
+    """request() returns at once while a cold worker is still starting."""
+    mgr = _manager(ready_delay=1.0)
+    try:
+        t0 = time.monotonic()
+        futures = [mgr.request("echo", {"value": n}) for n in range(3)]
+        elapsed = time.monotonic() - t0
+        assert elapsed < 0.2, f"request() blocked for {elapsed:.2f}s"
+        replies = [f.result(timeout=10) for f in futures]
+        assert [r["value"] for r in replies] == [0, 1, 2]
+        assert len({r["pid"] for r in replies}) == 1, "concurrent requests spawned two workers"
+    finally:
+        mgr.cleanup()
+
+
+TESTS = [
+    ("id matching",        test_id_matching),
+    ("error reply",        test_error_reply),
+    ("timeout",            test_timeout),
+    ("exit fails pending", test_exit_fails_pending),
+    ("stats routing",      test_stats_routing),
+    ("non-blocking launch", test_launch_does_not_block),
+]
+
+
+if __name__ == '__main__':
+    failed = 0
+    for name, fn in TESTS:
+        try:
+            fn()
+            print(f"  ✓  {name}")
+        except Exception as e:
+            print(f"  ✗  {name:<20s}  {e}")
+            failed += 1
+    sys.exit(failed)
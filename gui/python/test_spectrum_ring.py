@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+SpectrumRing — shared-memory round trip in one process.
+
+Covers the header and slot layout, wraparound and the torn-read check.
+No GNU Radio or HackRF needed.
+
+Usage:
+    python test_spectrum_ring.py
+"""
+import os
+import struct
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import numpy as np
+from hab_engine.spectrum_ring import SpectrumRing
+
+BINS = 16
+SLOTS = 4
+
+
+def _frame(n):
+    return np.arange(BINS, dtype=np.float32) - 100.0 + n
+
+
+def test_header_layout():
+    """Header is <IHHIxxxxQ: magic, version, slots, bins, pad, latest seq."""
+    ring = SpectrumRing.create(bins=BINS, slots=SLOTS)
+    try:
+        magic, version, slots, bins, seq = struct.unpack_from("<IHHIxxxxQ", ring._shm.buf, 0)
+        assert magic == 0x48414253, f"magic {magic:#x}"
+        assert (version, slots, bins, seq) == (1, SLOTS, BINS, 0)
+        assert ring._shm.size >= 24 + SLOTS * (32 + 4 * BINS)
+        assert ring.read() is None, "empty ring returned a frame"
+    finally:
+        ring.close()
+
+
+def test_slot_layout():
+    """Slot is <Qddd metadata followed by float32 dB values."""
+    ring = SpectrumRing.create(bins=BINS, slots=SLOTS)
+    try:
+        seq = ring.write(_frame(1), 915e6, 2e6, timestamp=123.5)
+        assert seq == 1
+        offset = 24 + (seq % SLOTS) * (32 + 4 * BINS)
+        meta = struct.unpack_from("<Qddd", ring._shm.buf, offset)
+        assert meta == (1, 915e6, 2e6, 123.5), meta
+        power = np.frombuffer(ring._shm.buf, dtype=np.float32, count=BINS, offset=offset + 32)
+        assert np.array_equal(power, _frame(1))
+        assert struct.unpack_from("<Q", ring._shm.buf, 16)[0] == 1, "header seq not bumped"
+        del power
+    finally:
+        ring.close()
+
+
+def test_attach_round_trip():
+    """A second handle opened by name sees the writer's frames."""
+    writer = SpectrumRing.create(bins=BINS, slots=SLOTS)
+    reader = SpectrumRing.attach(writer.name)
+    try:
+        assert (reader.slots, reader.bins) == (SLOTS, BINS)
+        writer.write(_frame(7), 433.92e6, 1e6, timestamp=42.0)
+        seq, power, fc, span, ts = reader.read()
+        assert (seq, fc, span, ts) == (1, 433.92e6, 1e6, 42.0)
+        assert np.array_equal(power, _frame(7))
+        # The copy is detached from shared memory
+        writer.write(_frame(8), 433.92e6, 1e6)
+        assert np.array_equal(power, _frame(7))
+        assert reader.read(after_seq=2) is None, "same seq returned twice"
+    finally:
+        reader.close()
+        writer.close()
+
+
+def test_wraparound():
+    """Writing past the slot count reuses slots; the newest frame wins."""
+    ring = SpectrumRing.create(bins=BINS, slots=SLOTS)
+    try:
+        for n in range(1, 3 * SLOTS + 2):
+            ring.write(_frame(n), 915e6, 2e6)
+        seq, power, *_ = ring.read()
+        assert seq == 3 * SLOTS + 1
+        assert np.array_equal(power, _frame(seq))
+    finally:
+        ring.close()
+
+
+def test_torn_read_skipped():
+    """A slot whose seq is cleared (write in progress) is not returned."""
+    ring = SpectrumRing.create(bins=BINS, slots=SLOTS)
+    try:
+        seq = ring.write(_frame(1), 915e6, 2e6)
+        offset = 24 + (seq % SLOTS) * (32 + 4 * BINS)
+        struct.pack_into("<Q", ring._shm.buf, offset, 0)
+        assert ring.read() is None, "torn frame returned"
+        struct.pack_into("<Q", ring._shm.buf, offset, seq + SLOTS)
+        assert ring.read() is None, "overwritten slot returned"
+    finally:
+        ring.close()
+
+
+def test_owner_unlinks():
+    """Closing the creating side removes the block; attaching then fails."""
+    ring = SpectrumRing.create(bins=BINS, slots=SLOTS)
+    name = ring.name
+    reader = SpectrumRing.attach(name)
+    reader.close()
+    ring.close()
+    try:
+        SpectrumRing.attach(name)
+    except FileNotFoundError:
+        pass
+    else:
+        raise AssertionError("ring still attachable after owner closed it")
+
+
+TESTS = [
+    ("header layout",    test_header_layout),
+    ("slot layout",      test_slot_layout),
+    ("attach round trip", test_attach_round_trip),
+    ("wraparound",       test_wraparound),
+    ("torn read",        test_torn_read_skipped),
+    ("owner unlinks",    test_owner_unlinks),
+]
+
+
+if __name__ == '__main__':
+    failed = 0
+    for name, fn in TESTS:
+        try:
+            fn()
+            print(f"  ✓  {name}")
+        except Exception as e:
+            print(f"  ✗  {name:<20s}  {e}")
+            failed += 1
+    sys.exit(failed)
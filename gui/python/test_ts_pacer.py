@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+TsPacer — constant-bitrate pacing into a FIFO, without ffmpeg or GNU Radio.
+
+Feeds the pacer from a pipe or BytesIO and reads a temporary FIFO the way
+the flowgraph would, checking null stuffing, output rate, burst capping,
+queue back-pressure and stop() while the writer waits for the FIFO reader.
+
+Usage:
+    python test_ts_pacer.py
+"""
+import io
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from hab_engine import ts_pacer
+from hab_engine.pipeline_manager import PipelineManager
+from hab_engine.ts_pacer import NULL_PACKET, TS_PACKET_SIZE, PacerStats, TsPacer
+
+PACKETS_PER_SEC = 2000
+BITRATE = PACKETS_PER_SEC * TS_PACKET_SIZE * 8
+
+
+def _packet(i, pid=0x100):
+    """Payload-only TS packet on *pid* with continuity counter i % 16."""
+    return bytes([0x47, pid >> 8, pid & 0xFF, 0x10 | (i & 0x0F)]) + bytes([i & 0xFF]) * 184
+
+
+def _fifo():
+    path = os.path.join(tempfile.mkdtemp(), "tsfifo")
+    os.mkfifo(path)
+    return path
+
+
+def _idle_source():
+    """A pipe that stays open but never delivers data (ffmpeg still starting)."""
+    r, w = os.pipe()
+    return os.fdopen(r, "rb", buffering=0), w
+
+
+class _FifoReader(threading.Thread):
+    """Reads the FIFO for *duration* seconds after it opens, like the flowgraph."""
+
+    def __init__(self, path, duration):
+        super().__init__(daemon=True)
+        self.path = path
+        self.duration = duration
+        self.data = bytearray()
+
+    def run(self):
+        fd = os.open(self.path, os.O_RDONLY)
+        try:
+            end = time.monotonic() + self.duration
+            while time.monotonic() < end:
+                self.data += os.read(fd, 65536)
+        finally:
+            os.close(fd)
+
+    def packets(self):
+        return [bytes(self.data[i:i + TS_PACKET_SIZE])
+                for i in range(0, len(self.data) - TS_PACKET_SIZE + 1, TS_PACKET_SIZE)]
+
+
+def _run(source, duration=1.0, end_input=None, **kwargs):
+    path = _fifo()
+    reader = _FifoReader(path, duration)
+    reader.start()
+    pacer = TsPacer(BITRATE, path, **kwargs)
+    pacer.start(source)
+    reader.join(timeout=duration + 5)
+    stats = pacer.stats
+    if end_input is not None:
+        end_input()  # as when PipelineManager stops ffmpeg before the pacer
+    pacer.stop()
+    return reader, stats
+
+
+def _within(value, expected, tolerance=0.1):
+    return abs(value - expected) <= expected * tolerance
+
+
+def test_null_stuffing_rate():
+    """With no input the output is all null packets at the target rate."""
+    source, w = _idle_source()
+    reader, stats = _run(source, end_input=lambda: os.close(w))
+    packets = reader.packets()
+    assert len(reader.data) % TS_PACKET_SIZE == 0, "partial packet written"
+    assert all(p == NULL_PACKET for p in packets), "non-null packet without input"
+    assert _within(len(packets), PACKETS_PER_SEC), f"{len(packets)} packets in 1 s"
+    # Counters are sampled mid-loop, so they may differ by one burst
+    assert 0 <= stats.null_packets - stats.packets_out <= 7, stats
+
+
+def test_data_then_nulls():
+    """Input packets go out first, in order, then nulls keep the rate up."""
+    data = [_packet(i) for i in range(300)]
+    reader, stats = _run(io.BytesIO(b"".join(data)))
+    packets = reader.packets()
+    assert packets[:300] == data, "data packets reordered or dropped"
+    assert all(p == NULL_PACKET for p in packets[300:])
+    assert _within(len(packets), PACKETS_PER_SEC), f"{len(packets)} packets in 1 s"
+    assert (stats.packets_in, stats.cc_errors, stats.resyncs) == (300, 0, 0)
+    assert 0 <= stats.null_packets - (stats.packets_out - 300) <= 7, stats
+
+
+def test_resync_and_cc():
+    """Garbage before a sync byte is skipped; a CC gap is counted."""
+    data = b"\x00\x12" + _packet(0) + _packet(1) + _packet(5)
+    reader, stats = _run(io.BytesIO(data), duration=0.2)
+    assert reader.packets()[:3] == [_packet(0), _packet(1), _packet(5)]
+    assert (stats.resyncs, stats.cc_errors) == (1, 1), stats
+
+
+class _StallingOs:
+    """Forwards to os, recording write sizes and stalling one write."""
+
+    def __init__(self, stall_after, stall_sec):
+        self.sizes = []
+        self._stall_after = stall_after
+        self._stall_sec = stall_sec
+
+    def __getattr__(self, name):
+        return getattr(os, name)
+
+    def write(self, fd, data):
+        self.sizes.append(len(data))
+        if len(self.sizes) == self._stall_after:
+            time.sleep(self._stall_sec)
+        return os.write(fd, data)
+
+
+def _run_stalled(stall_sec):
+    recorder = _StallingOs(stall_after=50, stall_sec=stall_sec)
+    ts_pacer.os = recorder
+    source, w = _idle_source()
+    try:
+        reader, stats = _run(source, end_input=lambda: os.close(w), burst_packets=7)
+    finally:
+        ts_pacer.os = os
+    return recorder, reader
+
+
+def test_burst_cap():
+    """After a short stall the backlog is caught up in bursts of <= burst_packets."""
+    recorder, reader = _run_stalled(0.1)
+    assert max(recorder.sizes) <= 7 * TS_PACKET_SIZE, f"burst of {max(recorder.sizes)} bytes"
+    # A 100 ms stall is within MAX_BACKLOG_SEC, so the schedule catches up
+    assert _within(len(reader.packets()), PACKETS_PER_SEC), len(reader.packets())
+
+
+def test_backlog_reset():
+    """A stall longer than MAX_BACKLOG_SEC restarts the schedule instead of bursting."""
+    stall = ts_pacer.MAX_BACKLOG_SEC + 0.15
+    recorder, reader = _run_stalled(stall)
+    assert max(recorder.sizes) <= 7 * TS_PACKET_SIZE
+    expected = PACKETS_PER_SEC * (1.0 - stall)
+    assert _within(len(reader.packets()), expected, 0.15), \
+        f"{len(reader.packets())} packets, expected ~{expected:.0f}"
+
+
+def test_queue_back_pressure():
+    """A fast source fills the queue and then blocks instead of growing latency."""
+    path = _fifo()
+    reader = _FifoReader(path, 0.5)
+    reader.start()
+    pacer = TsPacer(BITRATE, path, max_latency_sec=0.1)
+    pacer.start(io.BytesIO(b"".join(_packet(i) for i in range(5000))))
+    time.sleep(0.3)
+    stats = pacer.stats
+    assert stats.queue_capacity == int(BITRATE * 0.1 / (TS_PACKET_SIZE * 8))
+    assert stats.queue_depth >= stats.queue_capacity - 7, stats
+    # Read but not yet queued: at most the packet the reader is blocked on
+    # plus the rest of its current chunk
+    backlog = stats.packets_in - stats.packets_out - stats.queue_depth
+    assert 0 <= backlog <= pacer.burst_packets, stats
+    assert stats.null_packets == 0
+    t0 = time.monotonic()
+    pacer.stop()
+    assert time.monotonic() - t0 < 1.0, "stop() stuck behind a full queue"
+    reader.join(timeout=5)
+
+
+def test_stop_while_waiting_for_reader():
+    """stop() returns although nothing ever opened the FIFO for reading."""
+    source, w = _idle_source()
+    pacer = TsPacer(BITRATE, _fifo())
+    pacer.start(source)
+    time.sleep(0.1)
+    # The reader thread sees EOF (ffmpeg stopped); only the writer, blocked
+    # in open(), is left for stop() to release
+    os.close(w)
+    t0 = time.monotonic()
+    pacer.stop()
+    elapsed = time.monotonic() - t0
+    assert elapsed < 1.0, f"stop() took {elapsed:.2f}s"
+    assert not pacer.is_running
+    assert pacer.stats.packets_out == 0
+
+
+def test_pipeline_status_snapshot():
+    """PipelineManager.status folds the pacer counters into a copy, never into its own state."""
+    class _Pacer:
+        stats = PacerStats(packets_out=900, null_packets=100, cc_errors=2,
+                           queue_depth=5, queue_capacity=20, fifo_bytes=-1)
+
+    pipeline = PipelineManager()
+    pipeline._status.errors = 1
+    pipeline._pacer = _Pacer()
+    for _ in range(3):
+        status = pipeline.status
+        assert (status.packets_sent, status.null_packets) == (900, 100)
+        assert (status.errors, status.cc_errors) == (3, 2), status
+        assert (status.queue_fill, status.fifo_bytes) == (0.25, 0)
+    assert (pipeline._status.errors, pipeline._status.cc_errors) == (1, 0)
+    assert status is not pipeline._status
+
+
+TESTS = [
+    ("null stuffing rate",  test_null_stuffing_rate),
+    ("data then nulls",     test_data_then_nulls),
+    ("resync and CC",       test_resync_and_cc),
+    ("burst cap",           test_burst_cap),
+    ("backlog reset",       test_backlog_reset),
+    ("queue back-pressure", test_queue_back_pressure),
+    ("stop before reader",  test_stop_while_waiting_for_reader),
+    ("pipeline status",     test_pipeline_status_snapshot),
+]
+
+
+if __name__ == '__main__':
+    failed = 0
+    for name, fn in TESTS:
+        try:
+            fn()
+            print(f"  ✓  {name}")
+        except Exception as e:
+            print(f"  ✗  {name:<20s}  {e}")
+            failed += 1
+    sys.exit(failed)
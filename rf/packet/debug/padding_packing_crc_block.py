@@ -8,24 +8,24 @@
 # Description: Pads unpacked bits from FEC decoder, packs them into bytes, and validates CRC
 # GNU Radio version: 3.10.12.0
 
+import os
+import sys
+
 from gnuradio import gr
+import numpy as np
 import pmt
 import zlib
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from link_constants import IncrementalCrc32
+
 
 #====================================
 # Helper functions
 #===================================
 def pack_bits_to_bytes(bits):
-    packed_bytes = []
-    for i in range(0, len(bits), 8):
-        byte_val = 0
-        for j in range(8):
-            if i + j < len(bits):
-                bit_val = bits[i + j] & 0x01
-                byte_val |= (bit_val << (7 - j))
-        packed_bytes.append(byte_val)
-    return packed_bytes
+    """Unpacked bits (LSB of each element) → bytes, MSB first, zero-padded."""
+    return np.packbits(np.asarray(bits, dtype=np.uint8) & 0x01).tolist()
 
 
 class padding_packing_crc_block(gr.hier_block2):
@@ -168,29 +168,32 @@ class PaddingPackingCrcProcessor(gr.basic_block):
                     
                     best_packed = None
                     best_pattern = None
-                    
+
+                    # Pack once with zero padding; each pattern only changes
+                    # the last byte(s).  The CRC state over the bytes no
+                    # pattern touches is computed once and forked per pattern.
+                    base = pack_bits_to_bytes(vec + [0] * padding_needed)
+                    len_data = len(base) - 4
+                    stable = min(current_bits // 8, len_data)
+                    crc = IncrementalCrc32(bytes(base[:stable]))
+
                     for pad_pattern in range(2 ** padding_needed):
-                        # Create test vector with this padding pattern
-                        test_vec = vec.copy()
-                        # Add padding bits (LSB first for the pattern)
+                        test_packed = list(base)
+                        # Set padding bits (LSB of the pattern is the first bit)
                         for bit_pos in range(padding_needed):
-                            bit_val = (pad_pattern >> bit_pos) & 0x01
-                            test_vec.append(bit_val)
-                        
-                        # Pack the test vector
-                        test_packed = pack_bits_to_bytes(test_vec)
-                        
+                            if (pad_pattern >> bit_pos) & 0x01:
+                                pos = current_bits + bit_pos
+                                test_packed[pos // 8] |= 1 << (7 - pos % 8)
+
                         # We don't know the length of the bytes, but the CRC is always 4 bytes.
-                        len_data = len(test_packed) - 4
-                        data_bytes = bytes(test_packed[:len_data])
                         received_crc = bytes(test_packed[len_data:])
-                        computed_crc = zlib.crc32(data_bytes).to_bytes(4, 'little')
-                        
+                        computed_crc = crc.fork(bytes(test_packed[stable:len_data])).to_bytes(4, 'little')
+
                         if received_crc == computed_crc:
                             best_packed = test_packed[:len_data] #store only the data bytes, not the CRC
                             best_pattern = pad_pattern
                             break  # Found valid CRC, use this
-                    
+
                     # If we found a valid CRC, use it; otherwise print failure message
                     if best_packed is not None:
                         packed_bytes = best_packed
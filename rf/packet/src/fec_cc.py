@@ -6,6 +6,9 @@ k=7, rate=1/2, polys=[109,79], terminated.
 Matches the exact bit-level output of GNU Radio's fec.cc_encoder
 from telemetry_tx.py (polys=[109,79], k=7, rate=2, CC_TERMINATED).
 
+Also provides puncturing to rates 2/3 and 3/4 (erasures re-inserted before
+Viterbi) and a block interleaver, used by packet_codec's codec profiles.
+
 Usage:
     python3 fec_cc.py [--gr-check] [--test]
 """
@@ -27,6 +30,8 @@ K = 7           # constraint length
 RATE = 2        # 1/2
 NUM_STATES = 1 << (K - 1)  # 64
 
+ERASURE = 2     # marker for a code bit that was not transmitted
+
 
 def make_next_states(poly0: int, poly1: int
                      ) -> Tuple[np.ndarray, np.ndarray]:
@@ -142,7 +147,21 @@ def decode_bytes_hard(encoded: bytes, pad_bits: int = 2) -> bytes:
     for b in encoded:
         for i in range(8):
             bits.append((b >> (7 - i)) & 1)
+    return decode_bits_hard(bits, pad_bits)
 
+
+def decode_bits_hard(bits, pad_bits: int = 2) -> bytes:
+    """
+    Hard-decision Viterbi decoder over unpacked code bits.
+
+    Each entry of *bits* is 0, 1 or ERASURE.  An erased bit (punctured
+    away, see depuncture()) adds nothing to either branch metric, so the
+    trellis is decided by the bits that were actually received.
+
+    Returns:
+        Decoded bits as unpacked bytes, termination and padding stripped
+        (same as decode_bytes_hard).
+    """
     nsteps = len(bits) // 2
 
     INF = 1 << 30
@@ -155,6 +174,10 @@ def decode_bytes_hard(encoded: bytes, pad_bits: int = 2) -> bytes:
     for step in range(nsteps):
         out0 = bits[2 * step]
         out1 = bits[2 * step + 1]
+        # Branch metric for each parity pair (out0<<1 | out1)
+        c0 = (0, 0) if out0 == ERASURE else (out0, out0 ^ 1)
+        c1 = (0, 0) if out1 == ERASURE else (out1, out1 ^ 1)
+        branch = (c0[0] + c1[0], c0[0] + c1[1], c0[1] + c1[0], c0[1] + c1[1])
         new_metric = np.full(NUM_STATES, INF, dtype=np.int32)
 
         for s in range(NUM_STATES):
@@ -163,9 +186,7 @@ def decode_bytes_hard(encoded: bytes, pad_bits: int = 2) -> bytes:
                 continue
             for b in (0, 1):
                 ns = NEXT_STATE[s, b]
-                p = OUT_PARITY[s, b]
-                bm = (out0 ^ ((p >> 1) & 1)) + (out1 ^ (p & 1))
-                cand = m + bm
+                cand = m + branch[OUT_PARITY[s, b]]
                 if cand < new_metric[ns]:
                     new_metric[ns] = cand
                     trace_state[step, ns] = s
@@ -187,6 +208,61 @@ def decode_bytes_hard(encoded: bytes, pad_bits: int = 2) -> bytes:
     return bytes(decoded[:-strip] if len(decoded) > strip else decoded)
 
 
+# ── Puncturing ─────────────────────────────────────────────────
+# Keep-masks over the rate-1/2 output stream (out0, out1, out0, out1, ...).
+# Standard k=7 patterns: 2/3 = G0:10 G1:11, 3/4 = G0:101 G1:110.
+PUNCTURE_PATTERNS = {
+    '1/2': (1, 1),
+    '2/3': (1, 1, 0, 1),
+    '3/4': (1, 1, 0, 1, 1, 0),
+}
+
+
+def punctured_length(n_bits: int, pattern) -> int:
+    """Number of code bits left after puncturing *n_bits* with *pattern*."""
+    period = len(pattern)
+    full, rest = divmod(n_bits, period)
+    return full * sum(pattern) + sum(pattern[:rest])
+
+
+def puncture(bits: np.ndarray, pattern) -> np.ndarray:
+    """Drop the code bits whose pattern entry is 0."""
+    keep = np.resize(np.asarray(pattern, dtype=bool), len(bits))
+    return bits[keep]
+
+
+def depuncture(bits: np.ndarray, pattern) -> np.ndarray:
+    """
+    Re-expand received code bits to the mother-code stream, with ERASURE
+    at every punctured position.  A trailing partial period is dropped.
+    """
+    period, kept = len(pattern), sum(pattern)
+    periods = len(bits) // kept
+    out = np.full(periods * period, ERASURE, dtype=np.uint8)
+    keep = np.resize(np.asarray(pattern, dtype=bool), len(out))
+    out[keep] = bits[:periods * kept]
+    return out
+
+
+# ── Block interleaver ──────────────────────────────────────────
+def interleave(bits: np.ndarray, rows: int, cols: int) -> np.ndarray:
+    """
+    Row-in, column-out block interleaver over whole rows*cols blocks.
+
+    Bits adjacent on air end up *cols* apart in the code stream, so a fade
+    of up to *rows* bits turns into isolated errors the Viterbi decoder
+    can correct.  len(bits) must be a multiple of rows*cols.
+    """
+    return bits.reshape(-1, rows, cols).transpose(0, 2, 1).reshape(-1)
+
+
+def deinterleave(bits: np.ndarray, rows: int, cols: int) -> np.ndarray:
+    """Inverse of interleave(); a trailing partial block is dropped."""
+    block = rows * cols
+    usable = len(bits) // block * block
+    return bits[:usable].reshape(-1, cols, rows).transpose(0, 2, 1).reshape(-1)
+
+
 def _encode_check() -> bool:
     """Verify our encoder produces the same output as GNU Radio."""
     from gnuradio import fec, gr
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Link-layer constants, built once at import.
+
+The sync word and its correlation templates are used on every chunk the
+receiver scans (once per FO candidate and decimation phase), so they are
+computed here a single time and shared read-only:
+
+  • SYNC_BITS_ARRAY    sync word bits, MSB first (uint8 0/1)
+  • SYNC_BPSK          BPSK symbols, bit 0 → +1, bit 1 → -1 (TX mapping)
+  • SYNC_BPSK_COMPLEX  the same as complex64, for complex correlators
+  • sync_template(sps) symbols repeated sps times for sample-rate
+                       correlation (cached per SPS)
+
+IncrementalCrc32 keeps running zlib CRC-32 state over a common prefix, so
+validating several candidate tails (e.g. padding patterns) only hashes the
+bytes that differ.
+
+Usage:
+    corr = np.abs(np.correlate(symbols, SYNC_BPSK, 'valid'))
+    crc = IncrementalCrc32(frame[:-4])
+    ok = crc.fork(b'') == int.from_bytes(frame[-4:], 'big')
+"""
+import zlib
+from functools import lru_cache
+
+import numpy as np
+
+# GNU Radio default access code; chosen to NOT appear in the preamble
+SYNC_WORD = 0xACDDA4E2
+SYNC_BITS = 32
+PREAMBLE_BITS = 192  # 24 bytes of preamble
+
+
+def _frozen(arr: np.ndarray) -> np.ndarray:
+    arr.setflags(write=False)
+    return arr
+
+
+SYNC_BITS_ARRAY = _frozen(np.array([(SYNC_WORD >> (SYNC_BITS - 1 - i)) & 1
+                                    for i in range(SYNC_BITS)], dtype=np.uint8))
+SYNC_BPSK = _frozen(1.0 - 2.0 * SYNC_BITS_ARRAY.astype(np.float64))
+SYNC_BPSK_COMPLEX = _frozen(SYNC_BPSK.astype(np.complex64))
+
+
+@lru_cache(maxsize=None)
+def sync_template(sps: int) -> np.ndarray:
+    """SYNC_BPSK held for *sps* samples per symbol (read-only)."""
+    return _frozen(np.repeat(SYNC_BPSK, sps))
+
+
+class IncrementalCrc32:
+    """
+    zlib CRC-32 with reusable prefix state.
+
+    update() extends the prefix in place; fork() returns the CRC of
+    prefix + tail without changing the state, so each candidate only
+    costs its own tail.
+    """
+    __slots__ = ('value',)
+
+    def __init__(self, prefix: bytes = b''):
+        self.value = zlib.crc32(prefix)
+
+    def update(self, data: bytes) -> 'IncrementalCrc32':
+        self.value = zlib.crc32(data, self.value)
+        return self
+
+    def fork(self, tail: bytes) -> int:
+        return zlib.crc32(tail, self.value) & 0xFFFFFFFF
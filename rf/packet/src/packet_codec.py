@@ -13,6 +13,26 @@ Packet payload format (before FEC):
   • CRC-32 covers [length][payload_data]
   • Pre-padded with 2 zero bits before FEC encoding for byte alignment
 
+Codec profiles (both ends must be configured with the same one):
+
+  • r1/2       k=7 rate-1/2, no interleaving (the original link format)
+  • r2/3, r3/4 punctured to rate 2/3 or 3/4
+  • *-il       the same, plus a 24×32-bit block interleaver so a fade of
+               up to 24 bits becomes isolated errors for the Viterbi
+
+Punctured bits are re-inserted as erasures before Viterbi decoding.
+
+  • *-rs       adds a Reed–Solomon outer code (rs_codec, CCSDS-like) between
+               the CRC and the convolutional code, so residual Viterbi error
+               bursts are corrected instead of failing the CRC:
+
+    [ length (2) | RS parity (8) ] [ payload + CRC | RS(255,223) parity ] ...
+
+               The length gets its own small codeword so the receiver knows
+               the block layout before decoding the body.  The body is split
+               into ceil((N+4)/223) near-equal shortened codewords with 32
+               parity bytes each (up to 16 byte errors corrected per block).
+
 Frame-level structure (in the radio burst):
 
     [ preamble (24 B) ] [ sync word (4 B) ] [ FEC-encoded payload ]
@@ -27,14 +47,46 @@ On the RX side:
 Usage:
     encoded = packet_encode(b"HELLO WORLD\\n")       # → 36 bytes
     payload = packet_decode(encoded)                  # → b"HELLO WORLD\\n"
+    frames = packet_encode_telemetry(packets)         # telemetry, packed per frame
+    encoded = packet_encode(payload, profile='r3/4-il')
+    encoded = packet_encode(payload, profile='r1/2-il-rs')
 """
 import zlib
-from typing import Optional
+from typing import List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from fec_cc import (encode_bytes, decode_bits_hard, PUNCTURE_PATTERNS,
+                    punctured_length, puncture, depuncture, interleave, deinterleave)
+from rs_codec import rs_encode, rs_decode, NN, NROOTS
+from telemetry_codec import pack_records
 
-from fec_cc import encode_bytes, decode_bytes_hard
 
+class CodecProfile(NamedTuple):
+    """Code rate and interleaving applied on top of the rate-1/2 mother code."""
+    rate: str                                   # key of PUNCTURE_PATTERNS
+    interleave: Optional[Tuple[int, int]]       # (rows, cols) or None
+    outer_rs: bool = False                      # Reed–Solomon outer code
 
-def packet_encode(payload: bytes) -> bytes:
+
+INTERLEAVE_BLOCK = (24, 32)
+
+PROFILES = {
+    'r1/2':    CodecProfile('1/2', None),
+    'r2/3':    CodecProfile('2/3', None),
+    'r3/4':    CodecProfile('3/4', None),
+    'r1/2-il': CodecProfile('1/2', INTERLEAVE_BLOCK),
+    'r2/3-il': CodecProfile('2/3', INTERLEAVE_BLOCK),
+    'r3/4-il': CodecProfile('3/4', INTERLEAVE_BLOCK),
+}
+PROFILES.update({f'{name}-rs': p._replace(outer_rs=True) for name, p in list(PROFILES.items())})
+
+RS_HEADER_ROOTS = 8         # parity on the 2-byte length codeword
+
+DEFAULT_PROFILE = 'r1/2'
+
+
+def packet_encode(payload: bytes, profile: str = DEFAULT_PROFILE) -> bytes:
     """
     CRC-32 protect + FEC encode a payload, with embedded length byte.
 
@@ -42,6 +94,7 @@ def packet_encode(payload: bytes) -> bytes:
 
     Args:
         payload: Raw data bytes (any length 0..65535)
+        profile: Codec profile name (see PROFILES)
 
     Returns:
         FEC-encoded bytes, always byte-aligned
@@ -49,36 +102,61 @@ def packet_encode(payload: bytes) -> bytes:
     data = len(payload).to_bytes(2, 'big') + payload
     crc = zlib.crc32(data) & 0xFFFFFFFF
     data_with_crc = data + crc.to_bytes(4, 'big')
-    return encode_bytes(data_with_crc, pad_bits=2)
-
-
-def packet_decode(encoded: bytes, max_payload: int = 512) -> Optional[bytes]:
+    rate, il, outer_rs = PROFILES[profile]
+    if outer_rs:
+        data_with_crc = _rs_encode_frame(data_with_crc)
+    coded = encode_bytes(data_with_crc, pad_bits=2)
+    if rate == '1/2' and il is None:
+        return coded
+
+    bits = puncture(np.unpackbits(np.frombuffer(coded, dtype=np.uint8)),
+                    PUNCTURE_PATTERNS[rate])
+    padded = np.zeros(_padded_bits(len(bits), il), dtype=np.uint8)
+    padded[:len(bits)] = bits
+    if il is not None:
+        padded = interleave(padded, *il)
+    return np.packbits(padded).tobytes()
+
+
+def packet_decode(encoded: bytes, max_payload: int = 512,
+                  profile: str = DEFAULT_PROFILE) -> Optional[bytes]:
     """
     FEC decode + length-byte validation + CRC-32 check.
 
     The encoded data should be the full FEC output from packet_encode().
-    Extra garbage bytes at the end are safe: the Viterbi decoder will
-    still produce a plausible output; the length+CRC check catches it.
+    Extra garbage bytes at the end are safe: the length read from a first
+    decode pass sets the frame size, and only that many bytes are decoded
+    for the payload; the length+CRC check catches the rest.
 
     Args:
         encoded: FEC-encoded bytes from packet_encode() (or oversized)
         max_payload: Maximum allowed payload length (default 512)
+        profile: Codec profile the sender used (see PROFILES)
 
     Returns:
         Original payload bytes if validation passes, None otherwise
     """
-    bit_decoded = decode_bytes_hard(encoded, pad_bits=2)
-    if len(bit_decoded) < 32:
-        return None  # can't have even 4 bytes (len + CRC)
+    rate, il, outer_rs = PROFILES[profile]
+    packed = _fec_decode(encoded, rate, il)
+    if packed is None:
+        return None
 
-    # Pack bits back to bytes (MSB first)
-    packed = bytearray()
-    for i in range(0, len(bit_decoded), 8):
-        b = 0
-        for j in range(8):
-            if i + j < len(bit_decoded):
-                b |= (bit_decoded[i + j] & 1) << (7 - j)
-        packed.append(b)
+    # A capture longer than the frame puts noise after the termination; a
+    # heavily punctured trellis can wander into it and trace back from the
+    # wrong state.  Once the length is known, decode the exact frame again.
+    payload_len = _frame_length(packed, outer_rs)
+    if payload_len is None or payload_len > max_payload:
+        return None
+    frame_size = encode_size_for_payload(payload_len, profile)
+    if len(encoded) > frame_size:
+        packed = _fec_decode(encoded[:frame_size], rate, il)
+        if packed is None:
+            return None
+
+    if outer_rs:
+        packed = _rs_decode_frame(packed, max_payload)
+        if packed is None:
+            return None
 
     total_bytes = len(packed)
     if total_bytes < 6:
@@ -103,23 +181,127 @@ def packet_decode(encoded: bytes, max_payload: int = 512) -> Optional[bytes]:
     return bytes(packed[2:2 + payload_len])
 
 
-def encode_size_for_payload(payload_len: int) -> int:
+def _fec_decode(encoded: bytes, rate: str, il: Optional[Tuple[int, int]]) -> Optional[bytearray]:
+    """Deinterleave, depuncture and Viterbi-decode *encoded*; None if too short."""
+    bits = np.unpackbits(np.frombuffer(encoded, dtype=np.uint8))
+    if il is not None:
+        bits = deinterleave(bits, *il)
+    bits = depuncture(bits, PUNCTURE_PATTERNS[rate])
+    bit_decoded = decode_bits_hard(bits.tolist(), pad_bits=2)
+    if len(bit_decoded) < 32:
+        return None  # can't have even 4 bytes (len + CRC)
+
+    # Pack bits back to bytes (MSB first)
+    packed = bytearray()
+    for i in range(0, len(bit_decoded), 8):
+        b = 0
+        for j in range(8):
+            if i + j < len(bit_decoded):
+                b |= (bit_decoded[i + j] & 1) << (7 - j)
+        packed.append(b)
+    return packed
+
+
+def _frame_length(packed: bytes, outer_rs: bool) -> Optional[int]:
+    """Payload length from the decoded frame header (RS-corrected if present)."""
+    if outer_rs:
+        header = rs_decode(bytes(packed[:2 + RS_HEADER_ROOTS]), RS_HEADER_ROOTS)
+        if header is None:
+            return None
+        return int.from_bytes(header[0], 'big')
+    if len(packed) < 2:
+        return None
+    return int.from_bytes(packed[:2], 'big')
+
+
+def packet_encode_telemetry(packets, max_payload: int = 512,
+                            profile: str = DEFAULT_PROFILE) -> List[bytes]:
+    """
+    Pack telemetry dicts several-per-frame and FEC encode each frame.
+
+    Args:
+        packets: Telemetry dicts in transmit order
+        max_payload: Largest payload per frame; must not exceed the
+            receiver's packet_decode() max_payload
+        profile: Codec profile name (see PROFILES)
+
+    Returns:
+        FEC-encoded frames, one per radio burst
+    """
+    return [packet_encode(p, profile) for p in pack_records(packets, max_payload)]
+
+
+def encode_size_for_payload(payload_len: int, profile: str = DEFAULT_PROFILE) -> int:
     """
     How many bytes the FEC encoder will produce for a given payload length.
 
-    Accounts for the +2 length bytes (big-endian) + 4 CRC bytes.
+    Accounts for the +2 length bytes (big-endian) + 4 CRC bytes, and for the
+    profile's puncturing and interleaver block padding.
 
     Args:
         payload_len: Number of payload bytes
+        profile: Codec profile name (see PROFILES)
 
     Returns:
         Number of FEC-encoded bytes
     """
     total = 2 + payload_len + 4  # +2 length bytes, +4 CRC
-    return (total * 8 + 8) * 2 // 8  # (8*total + 2_pad + 6_term) * 2 / 8
+    rate, il, outer_rs = PROFILES[profile]
+    if outer_rs:
+        total += RS_HEADER_ROOTS + NROOTS * len(_rs_body_blocks(payload_len + 4))
+    mother_bits = (total * 8 + 8) * 2  # (8*total + 2_pad + 6_term) * 2
+    bits = punctured_length(mother_bits, PUNCTURE_PATTERNS[rate])
+    return _padded_bits(bits, il) // 8
+
+
+def _rs_body_blocks(body_len: int) -> List[int]:
+    """Data sizes of the RS codewords carrying *body_len* bytes (payload + CRC)."""
+    k = NN - NROOTS
+    count = -(-body_len // k)
+    base, extra = divmod(body_len, count)
+    return [base + 1] * extra + [base] * (count - extra)
+
+
+def _rs_encode_frame(data_with_crc: bytes) -> bytes:
+    """[len][payload][crc] → length codeword + body codewords."""
+    out = bytearray(data_with_crc[:2] + rs_encode(data_with_crc[:2], RS_HEADER_ROOTS))
+    pos = 2
+    for size in _rs_body_blocks(len(data_with_crc) - 2):
+        block = data_with_crc[pos:pos + size]
+        out += block + rs_encode(block)
+        pos += size
+    return bytes(out)
+
+
+def _rs_decode_frame(packed: bytes, max_payload: int) -> Optional[bytes]:
+    """Correct and strip the RS layer; returns [len][payload][crc] or None."""
+    head_len = 2 + RS_HEADER_ROOTS
+    header = rs_decode(bytes(packed[:head_len]), RS_HEADER_ROOTS)
+    if header is None:
+        return None
+    length = header[0]
+    payload_len = int.from_bytes(length, 'big')
+    if payload_len > max_payload:
+        return None
+    out = bytearray(length)
+    pos = head_len
+    for size in _rs_body_blocks(payload_len + 4):
+        block = rs_decode(bytes(packed[pos:pos + size + NROOTS]))
+        if block is None:
+            return None
+        out += block[0]
+        pos += size + NROOTS
+    return bytes(out)
+
+
+def _padded_bits(n_bits: int, il: Optional[Tuple[int, int]]) -> int:
+    """Round a code-bit count up to whole bytes, or whole interleaver blocks."""
+    block = il[0] * il[1] if il is not None else 8
+    return -(-n_bits // block) * block
 
 
-def max_encoded_size_for_payload(max_payload: int = 512) -> int:
+def max_encoded_size_for_payload(max_payload: int = 512,
+                                 profile: str = DEFAULT_PROFILE) -> int:
     """
     Max FEC-encoded bytes for a receiver to extract.
 
@@ -129,11 +311,12 @@ def max_encoded_size_for_payload(max_payload: int = 512) -> int:
 
     Args:
         max_payload: Maximum expected payload length (default 512)
+        profile: Codec profile name (see PROFILES)
 
     Returns:
         Max FEC-encoded bytes to extract
     """
-    return encode_size_for_payload(max_payload)
+    return encode_size_for_payload(max_payload, profile)
 
 
 # ── Self-test ──────────────────────────────────────────────────────
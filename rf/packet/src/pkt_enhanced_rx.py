@@ -19,24 +19,16 @@ No more brute-force bit shifting or heuristic text matching.
 """
 import numpy as np
 import sys, time, argparse
-from packet_codec import packet_decode, max_encoded_size_for_payload
+from functools import lru_cache
+from packet_codec import (packet_decode, max_encoded_size_for_payload,
+                          PROFILES, DEFAULT_PROFILE)
+# Packet structure (from pkt_enhanced_tx.py) and the sync word as BPSK
+# symbols (0→+1, 1→-1, matches TX mapping), precomputed once at import
+from link_constants import PREAMBLE_BITS, SYNC_BITS, SYNC_WORD, SYNC_BPSK
 
 SPS = 20
 FS = 2000000
 
-# Packet structure (from pkt_enhanced_tx.py)
-PREAMBLE_BITS = 192  # 24 bytes of preamble
-SYNC_BITS = 32
-
-# Sync word: GNU Radio default access code (from packet_rx.py preamble_dummy).
-# Chosen to NOT appear in the preamble, giving unambiguous correlation peaks.
-SYNC_WORD = 0xACDDA4E2
-
-# Precomputed sync word as BPSK symbols (0→+1, 1→-1)
-_SYNC_BI = np.array([(SYNC_WORD >> (31 - i)) & 1 for i in range(SYNC_BITS)],
-                    dtype=np.float64)
-SYNC_BPSK = -2.0 * _SYNC_BI + 1.0  # bit 0→+1, 1→-1 (matches TX mapping)
-
 # Maximum FEC-encoded bytes the receiver will extract after the sync word.
 # This is a fixed budget large enough for any payload up to 512 bytes.
 MAX_FEC_BYTES = max_encoded_size_for_payload(512)      # 1038
@@ -80,6 +72,16 @@ def apply_digital_agc(samples, target_rms=0.3, min_rms=1e-3):
     return samples * gain
 
 
+@lru_cache(maxsize=None)
+def _scan_rrc_taps(sps):
+    """Peak-normalized RRC taps for the FO scan (built once per SPS)."""
+    from gnuradio.filter import firdes
+    taps = np.array(firdes.root_raised_cosine(1.0, sps, 1.0, 0.35, 11 * sps))
+    taps /= np.max(np.abs(taps))
+    taps.setflags(write=False)
+    return taps
+
+
 def scan_frequency(samples, search_width=None, sps=SPS, samp_rate=FS, narrow=False):
     """
     Estimate carrier frequency offset by maximizing sync-word correlation.
@@ -100,8 +102,6 @@ def scan_frequency(samples, search_width=None, sps=SPS, samp_rate=FS, narrow=Fal
     Returns:
         Estimated frequency offset in Hz
     """
-    from gnuradio.filter import firdes
-    
     symbol_rate = samp_rate / sps
     if search_width is None:
         search_width = int(0.2 * symbol_rate)  # 20% of symbol rate
@@ -109,9 +109,6 @@ def scan_frequency(samples, search_width=None, sps=SPS, samp_rate=FS, narrow=Fal
         if narrow:
             search_width = min(search_width, _FO_NARROW_WIDTH)
     
-    SYNC_BPSK_LOCAL = np.array([(SYNC_WORD >> (31 - i)) & 1 for i in range(32)],
-                               dtype=np.float64) * 2.0 - 1.0
-    
     # Find a high-energy segment
     n = min(131072, len(samples))
     end = min(n * 16, len(samples))
@@ -125,8 +122,7 @@ def scan_frequency(samples, search_width=None, sps=SPS, samp_rate=FS, narrow=Fal
     
     seg = samples[best_start:best_start + n]
     t_arr = np.arange(n, dtype=np.float64)
-    rrc_tmp = np.array(firdes.root_raised_cosine(1.0, sps, 1.0, 0.35, 11 * sps))
-    rrc_tmp /= np.max(np.abs(rrc_tmp))
+    rrc_tmp = _scan_rrc_taps(sps)
     
     # RRC filter once, then rotate per candidate
     filt_full = np.convolve(seg, rrc_tmp, 'same')
@@ -157,7 +153,7 @@ def scan_frequency(samples, search_width=None, sps=SPS, samp_rate=FS, narrow=Fal
     for fo_candidate in np.arange(-search_width, search_width + step, step):
         for syms, ts in zip(sym_list, t_sym_list):
             rotated = syms * np.exp(-2j * np.pi * fo_candidate * ts / samp_rate)
-            corr = np.abs(np.correlate(rotated, SYNC_BPSK_LOCAL, 'valid'))
+            corr = np.abs(np.correlate(rotated, SYNC_BPSK, 'valid'))
             m = np.max(corr)
             if m > best_corr:
                 best_corr = m
@@ -228,7 +224,7 @@ def correct_fo_on_symbols(symbols, dfo, symbol_rate=FS/SPS):
     return symbols * correction
 
 
-def decode_payload_symbols(payload_syms):
+def decode_payload_symbols(payload_syms, profile=DEFAULT_PROFILE):
     """
     Convert BPSK symbols to bytes via hard decisions, then packet_decode().
     Tries both normal and inverted polarity (180° phase ambiguity).
@@ -238,6 +234,7 @@ def decode_payload_symbols(payload_syms):
 
     Args:
         payload_syms: BPSK symbols (float, >0 = bit 0, <0 = bit 1)
+        profile: Codec profile the transmitter uses
 
     Returns:
         (decoded_message, polarity) or (None, None)
@@ -254,7 +251,7 @@ def decode_payload_symbols(payload_syms):
                     b |= int(bits_hard[i + j]) << (7 - j)
             fec_data.append(b)
         # Pass all bytes — packet_decode handles length extraction
-        result = packet_decode(bytes(fec_data))
+        result = packet_decode(bytes(fec_data), profile=profile)
         if result is not None:
             return result, label
     return None, None
@@ -262,7 +259,7 @@ def decode_payload_symbols(payload_syms):
 
 def process_phase(filtered, phase, fo, sps=SPS,
                    pre_bits=PREAMBLE_BITS,
-                   top_n=5):
+                   top_n=5, profile=DEFAULT_PROFILE):
     """Process one SPS decimation phase, returning decoded packets.
     
     Instead of an adaptive threshold that can miss the real sync or
@@ -270,7 +267,7 @@ def process_phase(filtered, phase, fo, sps=SPS,
     top `top_n` correlation peaks and try to decode each one.
     CRC validation on the decoded data filters out false alarms.
     
-    Always extracts MAX_FEC_SYMS symbols after the sync word. The
+    Always extracts a max-size frame (MAX_FEC_SYMS for r1/2) after the sync word. The
     embedded length byte in the FEC-protected data tells packet_decode()
     how many bytes are real; extra symbols produce garbage that CRC
     catches.
@@ -282,6 +279,7 @@ def process_phase(filtered, phase, fo, sps=SPS,
         sps: Samples per symbol (default SPS)
         pre_bits: Number of preamble symbols before sync word
         top_n: Number of correlation peaks to try
+        profile: Codec profile the transmitter uses
     """
     symbols = filtered[phase::sps]
     # We need at least preamble+sync+stream_id_syms.  The actual FEC
@@ -311,10 +309,11 @@ def process_phase(filtered, phase, fo, sps=SPS,
 
     # Sort by correlation strength, try top N
     candidates.sort(key=lambda x: -x[0])
+    max_syms = max_encoded_size_for_payload(512, profile) * 8
     for corr_val, idx in candidates[:top_n]:
         payload_start = idx + SYNC_BITS
-        # Extract available symbols up to MAX_FEC_SYMS
-        n_syms = min(MAX_FEC_SYMS, len(symbols) - payload_start)
+        # Extract available symbols up to the profile's max frame size
+        n_syms = min(max_syms, len(symbols) - payload_start)
         payload = symbols[payload_start:payload_start + n_syms]
         
         # Refine FO from sync word symbols to correct residual rotation
@@ -322,7 +321,7 @@ def process_phase(filtered, phase, fo, sps=SPS,
         dfo = refine_fo_from_sync(sync_syms, symbol_rate=FS/sps)
         payload_corrected = correct_fo_on_symbols(payload, dfo, symbol_rate=FS/sps)
         
-        msg, polarity = decode_payload_symbols(payload_corrected)
+        msg, polarity = decode_payload_symbols(payload_corrected, profile)
         if msg is not None:
             results.append({
                 'message': msg,
@@ -338,8 +337,9 @@ def process_phase(filtered, phase, fo, sps=SPS,
 class LiveReceiver:
     def __init__(self, freq=915e6, lna=8, vga=12,
                  amp=False, serial=None, duration=30,
-                 sps=SPS, samp_rate=FS, agc_target=0.3):
+                 sps=SPS, samp_rate=FS, agc_target=0.3, profile=DEFAULT_PROFILE):
         self.fs = int(samp_rate)
+        self.profile = profile
         self.sps = sps
         self.freq = freq
         self.lna, self.vga, self.amp = lna, vga, amp
@@ -457,7 +457,7 @@ class LiveReceiver:
         phase_indices = np.linspace(0, self.sps - 1, n_phases, dtype=int)
         for phase in phase_indices:
             all_results.extend(
-                process_phase(filtered, phase, fo, sps=self.sps))
+                process_phase(filtered, phase, fo, sps=self.sps, profile=self.profile))
 
         # Track unique sync positions (same packet detected by multiple
         # decimation phases should count once; different packets at different
@@ -504,6 +504,8 @@ if __name__ == '__main__':
                         help='Sample rate in Hz (default: %(default)s)')
     parser.add_argument('--agc-target', type=float, default=0.3,
                         help='Digital AGC target RMS (default: %(default)s)')
+    parser.add_argument('--profile', choices=sorted(PROFILES), default=DEFAULT_PROFILE,
+                        help='Codec profile; must match TX (default: %(default)s)')
     args = parser.parse_args()
     
     sps = args.sps
@@ -530,7 +532,7 @@ if __name__ == '__main__':
         n_phases = min(sps, 20)
         phase_indices = np.linspace(0, sps - 1, n_phases, dtype=int)
         for phase in phase_indices:
-            results = process_phase(filtered, phase, fo, sps=sps)
+            results = process_phase(filtered, phase, fo, sps=sps, profile=args.profile)
             for r in results:
                 msg = r['message']
                 if msg not in seen:
@@ -545,5 +547,6 @@ if __name__ == '__main__':
                           amp=args.amp, serial=args.serial,
                           duration=args.duration,
                           sps=sps, samp_rate=fs,
-                          agc_target=args.agc_target)
+                          agc_target=args.agc_target,
+                          profile=args.profile)
         rx.run()
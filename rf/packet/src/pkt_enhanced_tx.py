@@ -13,7 +13,7 @@ Combined preamble+sync gives SHARP correlation with no false peaks.
 """
 import numpy as np
 import argparse, time
-from packet_codec import packet_encode, encode_size_for_payload
+from packet_codec import packet_encode, encode_size_for_payload, PROFILES, DEFAULT_PROFILE
 
 SPS = 20
 FS = 2_000_000
@@ -28,8 +28,8 @@ PREAMBLE_BYTES = bytes([
 
 # Sync word: GNU Radio default access code (from packet_rx.py preamble_dummy)
 # This is DIFFERENT from the first 4 bytes of the preamble, giving unambiguous
-# correlation.
-SYNC_WORD = 0xACDDA4E2
+# correlation.  Shared with the RX via link_constants.
+from link_constants import SYNC_WORD, SYNC_BITS_ARRAY
 
 
 def make_preamble_bits():
@@ -43,7 +43,7 @@ def make_preamble_bits():
 
 def make_sync_bits():
     """Convert SYNC_WORD to a bit list (MSB first)."""
-    return [(SYNC_WORD >> (31 - i)) & 1 for i in range(32)]
+    return SYNC_BITS_ARRAY.tolist()
 
 
 def bpsk_modulate(bits, sps=SPS, alpha=RRC_ALPHA):
@@ -88,11 +88,11 @@ def apply_burst_shaping(waveform, sps=SPS, ramp_symbols=50):
     return waveform
 
 
-def make_packet_bits(payload_bytes):
+def make_packet_bits(payload_bytes, profile=DEFAULT_PROFILE):
     """Build full packet bit stream: preamble + sync + FEC payload."""
     preamble_bits = make_preamble_bits()
     sync_bits = make_sync_bits()
-    fec_bytes = packet_encode(payload_bytes)
+    fec_bytes = packet_encode(payload_bytes, profile)
     payload_bits = []
     for b in fec_bytes:
         for i in range(8):
@@ -100,9 +100,10 @@ def make_packet_bits(payload_bytes):
     return preamble_bits + sync_bits + payload_bits
 
 
-def make_test_burst(payload, n_packets=20, gap_ms=50, sps=SPS, fs=FS, ramp_symbols=50):
+def make_test_burst(payload, n_packets=20, gap_ms=50, sps=SPS, fs=FS, ramp_symbols=50,
+                    profile=DEFAULT_PROFILE):
     """Build a burst of multiple packets with gaps."""
-    bits = make_packet_bits(payload)
+    bits = make_packet_bits(payload, profile)
     waveform = np.array(bpsk_modulate(bits, sps=sps))
     
     # Apply burst shaping (Hann ramp)
@@ -110,8 +111,8 @@ def make_test_burst(payload, n_packets=20, gap_ms=50, sps=SPS, fs=FS, ramp_symbo
     
     gap_samples = int(gap_ms * fs / 1000)
 
-    fec_len = encode_size_for_payload(len(payload))
-    print(f"[EnhancedTX] Payload: {len(payload)}B → FEC: {fec_len}B "
+    fec_len = encode_size_for_payload(len(payload), profile)
+    print(f"[EnhancedTX] Payload: {len(payload)}B → FEC ({profile}): {fec_len}B "
           f"({len(bits)} packet bits, {len(waveform)/fs*1000:.1f} ms)")
 
     burst = []
@@ -140,12 +141,15 @@ def main():
                         help='Samples per symbol (default: %(default)s)')
     parser.add_argument('--samp-rate', type=float, default=2e6, dest='samp_rate',
                         help='Sample rate in Hz (default: %(default)s)')
+    parser.add_argument('--profile', choices=sorted(PROFILES), default=DEFAULT_PROFILE,
+                        help='Codec profile; RX must match (default: %(default)s)')
     args = parser.parse_args()
 
     fs = int(args.samp_rate)
     sps = args.sps
     payload = (args.message + '\n').encode('ascii')
-    burst = make_test_burst(payload, n_packets=args.n_packets, sps=sps, fs=fs)
+    burst = make_test_burst(payload, n_packets=args.n_packets, sps=sps, fs=fs,
+                            profile=args.profile)
 
     repeat_gap = max(0, int(args.repeat * fs - len(burst)))
     full_waveform = burst + [0j] * repeat_gap
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Reed–Solomon code over GF(256), CCSDS-style parameters.
+
+Field polynomial x^8+x^7+x^2+x+1 (0x187), first consecutive root 112 and
+primitive element step 11, as in CCSDS 131.0-B (conventional basis — the
+dual-basis transform is not applied).  RS(255,223) uses nroots=32 and
+corrects up to 16 byte errors per codeword; shorter blocks are sent as
+shortened codewords (virtual leading zeros are not transmitted).
+
+All field arithmetic goes through precomputed log/antilog tables and is
+vectorized with numpy: encoding is one table lookup + XOR-reduce against
+precomputed remainders of x^(nroots+p) mod g(x), and the syndrome and
+Chien searches evaluate every root/position in a single array operation.
+
+Usage:
+    parity = rs_encode(data)                   # 32 parity bytes
+    fixed = rs_decode(data + parity)           # → (data, n_corrected) or None
+"""
+from typing import Optional, Tuple
+
+import numpy as np
+
+GF_POLY = 0x187
+FCR = 112       # first consecutive root (log form)
+PRIM = 11       # primitive element step between roots
+NN = 255        # full codeword length
+NROOTS = 32     # RS(255,223)
+
+
+def _make_tables():
+    exp = np.zeros(2 * NN, dtype=np.int32)
+    log = np.zeros(NN + 1, dtype=np.int32)
+    x = 1
+    for i in range(NN):
+        exp[i] = x
+        log[x] = i
+        x <<= 1
+        if x & 0x100:
+            x ^= GF_POLY
+    exp[NN:] = exp[:NN]      # exp[i + j] without a modulo for i, j < 255
+    return exp, log
+
+
+# Antilog (EXP) and log (LOG) tables; LOG[0] is unused and must be masked
+EXP, LOG = _make_tables()
+
+
+def _mul(a: int, b: int) -> int:
+    if a == 0 or b == 0:
+        return 0
+    return int(EXP[LOG[a] + LOG[b]])
+
+
+def _div(a: int, b: int) -> int:
+    if a == 0:
+        return 0
+    return int(EXP[(LOG[a] - LOG[b]) % NN])
+
+
+_CODES = {}
+
+
+def _code(nroots: int):
+    """Generator-derived tables for *nroots*, built once per size."""
+    if nroots not in _CODES:
+        # g(x) = prod_j (x - alpha^(PRIM*(FCR+j))), coefficients low degree first
+        gen = [1]
+        for j in range(nroots):
+            root = int(EXP[(PRIM * (FCR + j)) % NN])
+            gen = [(gen[i - 1] if i else 0) ^ (_mul(gen[i], root) if i < len(gen) else 0)
+                   for i in range(len(gen) + 1)]
+        # rem[p] = x^(nroots+p) mod g(x), for every data position p
+        rem = np.zeros((NN - nroots, nroots), dtype=np.int32)
+        cur = gen[:nroots]                       # x^nroots ≡ g_low(x)  (char 2)
+        for p in range(NN - nroots):
+            rem[p] = cur
+            top = cur[-1]
+            cur = [0] + cur[:-1]
+            if top:
+                cur = [c ^ _mul(top, g) for c, g in zip(cur, gen[:nroots])]
+        # Root exponents alpha^(PRIM*(FCR+j)) as logs, for the syndromes
+        root_logs = (PRIM * (FCR + np.arange(nroots))) % NN
+        _CODES[nroots] = (np.where(rem == 0, -1, LOG[rem]), root_logs)
+    return _CODES[nroots]
+
+
+def rs_encode(data: bytes, nroots: int = NROOTS) -> bytes:
+    """
+    Parity bytes for *data* (systematic; send data + parity).
+
+    Args:
+        data: 1..255-nroots message bytes
+        nroots: Parity bytes per codeword (corrects nroots//2 byte errors)
+    """
+    k = len(data)
+    if not 0 < k <= NN - nroots:
+        raise ValueError(f"RS block of {k} bytes, expected 1..{NN - nroots}")
+    rem_log, _ = _code(nroots)
+    d = np.frombuffer(data, dtype=np.uint8).astype(np.int32)
+    nz = d != 0
+    # Data byte i sits at degree k-1-i of the message polynomial
+    rl = rem_log[k - 1 - np.flatnonzero(nz)]
+    terms = np.where(rl >= 0, EXP[(LOG[d[nz]][:, None] + rl) % NN], 0)
+    parity = np.bitwise_xor.reduce(terms, axis=0) if len(terms) else np.zeros(nroots, np.int32)
+    # Parity coefficient t has degree t; transmitted high degree first
+    return parity[::-1].astype(np.uint8).tobytes()
+
+
+def _syndromes(r: np.ndarray, nroots: int) -> np.ndarray:
+    _, root_logs = _code(nroots)
+    n = len(r)
+    idx = np.flatnonzero(r)
+    if not len(idx):
+        return np.zeros(nroots, dtype=np.int32)
+    p = (n - 1 - idx)                       # degree of each nonzero byte
+    e = (LOG[r[idx]][None, :] + root_logs[:, None] * p[None, :]) % NN
+    return np.bitwise_xor.reduce(EXP[e], axis=1)
+
+
+def rs_decode(codeword: bytes, nroots: int = NROOTS) -> Optional[Tuple[bytes, int]]:
+    """
+    Correct a (possibly shortened) codeword in place of its data bytes.
+
+    Returns:
+        (data bytes, number of corrected bytes), or None when there are
+        more errors than the code can correct
+    """
+    n = len(codeword)
+    if not nroots < n <= NN:
+        return None
+    r = np.frombuffer(codeword, dtype=np.uint8).astype(np.int32)
+    synd = _syndromes(r, nroots)
+    if not synd.any():
+        return bytes(codeword[:n - nroots]), 0
+
+    # Berlekamp–Massey: error locator Λ(x), low degree first
+    s = [int(v) for v in synd]
+    lam, prev = [1], [1]
+    order, shift, last_d = 0, 1, 1
+    for step in range(nroots):
+        d = s[step]
+        for i in range(1, order + 1):
+            if i < len(lam):
+                d ^= _mul(lam[i], s[step - i])
+        if d == 0:
+            shift += 1
+            continue
+        coef = _div(d, last_d)
+        update = [0] * shift + [_mul(coef, c) for c in prev]
+        new = [(lam[i] if i < len(lam) else 0) ^ (update[i] if i < len(update) else 0)
+               for i in range(max(len(lam), len(update)))]
+        if 2 * order <= step:
+            prev, order, last_d, shift = lam, step + 1 - order, d, 1
+        else:
+            shift += 1
+        lam = new
+    while len(lam) > 1 and lam[-1] == 0:
+        lam.pop()
+    if order != len(lam) - 1 or order > nroots // 2:
+        return None
+
+    # Chien search: Λ(X_p^-1) == 0 with X_p = alpha^(PRIM*p), p < n
+    lam_arr = np.array(lam, dtype=np.int32)
+    nzl = np.flatnonzero(lam_arr)
+    p = np.arange(n)
+    e = (LOG[lam_arr[nzl]][None, :] - (PRIM * p[:, None] * nzl[None, :])) % NN
+    positions = p[np.bitwise_xor.reduce(EXP[e], axis=1) == 0]
+    if len(positions) != order:
+        return None
+
+    # Forney: Y = X^(1-FCR) Ω(X^-1) / Λ'(X^-1), Ω = S·Λ mod x^nroots
+    omega = [0] * nroots
+    for i, li in enumerate(lam):
+        if li:
+            for j in range(nroots - i):
+                omega[i + j] ^= _mul(li, s[j])
+    fixed = r.copy()
+    for pos in positions.tolist():
+        x_inv = (-PRIM * pos) % NN                     # log of X^-1
+        num = 0
+        for i, w in enumerate(omega):
+            if w:
+                num ^= int(EXP[(LOG[w] + x_inv * i) % NN])
+        den = 0
+        for i in range(1, len(lam), 2):                # odd terms of Λ
+            if lam[i]:
+                den ^= int(EXP[(LOG[lam[i]] + x_inv * (i - 1)) % NN])
+        if den == 0:
+            return None
+        x_pow = (PRIM * pos * (1 - FCR)) % NN
+        fixed[n - 1 - pos] ^= _mul(int(EXP[x_pow]), _div(num, den))
+    if _syndromes(fixed, nroots).any():
+        return None
+    return fixed[:n - nroots].astype(np.uint8).tobytes(), order
+
+
+# ── Self-test ──────────────────────────────────────────────────────
+if __name__ == '__main__':
+    import sys
+
+    rng = np.random.default_rng(1)
+    all_ok = True
+    for k, n_err in [(223, 0), (223, 16), (223, 17), (40, 8), (1, 16)]:
+        data = rng.integers(0, 256, k, dtype=np.uint8).tobytes()
+        cw = bytearray(data + rs_encode(data))
+        for i in rng.choice(len(cw), size=min(n_err, len(cw)), replace=False):
+            cw[i] ^= int(rng.integers(1, 256))
+        res = rs_decode(bytes(cw))
+        ok = (res is None) if n_err > NROOTS // 2 else (res is not None and res[0] == data)
+        all_ok &= ok
+        print(f"  {'OK' if ok else 'FAIL'}  k={k:3d} errors={n_err:2d}  → "
+              f"{'uncorrectable' if res is None else f'{res[1]} corrected'}")
+    sys.exit(0 if all_ok else 1)
@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+"""
+Compact binary telemetry records for the RF link.
+
+The JSON telemetry objects spend most of their bytes on key names.  This
+module packs the four packet types into fixed-layout, big-endian structs
+with fixed-point fields, and converts back to the same dict shape the
+ground station already uses (``{"v", "id", "mid", "seq", "t", "type", ...}``).
+
+Record layout (version 1):
+
+    [ ver|type (1 B) ] [ seq (2 B) ] [ t (4 B) ] [ body (type-specific) ]
+
+  • ver|type: high nibble = format version (1), low nibble = type code
+      1 position, 2 motion, 3 environment, 4 power
+  • seq: low 16 bits of the payload sequence (the server handles wraps)
+  • t: milliseconds since 00:00 UTC (the "THH:MM:SS" time of day)
+
+  position     22 B  lat/lon 1e-7°, alt/agl cm, fix flags, sats, h/vdop 0.01
+  motion       26 B  speeds 0.01 m/s, angles 0.01° (0..360), accel 0.001,
+                     gyro 0.01 °/s
+  environment  14 B  temps 0.01 °C, pressure 0.001 hPa, humidity 0.01 %,
+                     baro alt cm
+  power         9 B  mV, mA, 0.01 W, %, 0.01 °C
+
+A position record is 29 bytes against ~250 bytes of JSON.  The first byte
+is never '{', so binary and JSON payloads can share the link
+(see ``is_binary``).  Records are self-delimiting (the type code fixes the
+size), so several can be concatenated into one frame payload.  Balloon and
+mission ids are not sent per record; ``decode_record`` fills them in from
+its arguments.  Out-of-range values saturate rather than fail, and a NaN
+(a sensor with no reading) is sent as the field's reserved missing value
+and decodes back to NaN, so the rest of the record still goes through.
+
+Usage:
+    data = encode_record(packet_dict)          # → bytes
+    packet, size = decode_record(data)          # → (dict, bytes consumed)
+    payloads = pack_records(packets)            # several records per frame
+    packets = decode_payload(payload)           # → [dict, ...] (or JSON)
+"""
+import json
+import math
+import struct
+from typing import Iterable, List, Optional, Tuple
+
+FORMAT_VERSION = 1
+
+_HEADER = struct.Struct('>BHI')
+
+TYPE_CODES = {'position': 1, 'motion': 2, 'environment': 3, 'power': 4}
+TYPE_NAMES = {code: name for name, code in TYPE_CODES.items()}
+
+_FIX_TYPES = ('none', '2d', '3d')
+
+# Per-type body: (field path, struct code, scale, angle?)
+#   stored = round(value * scale); angles are wrapped into 0..360 first.
+_FIELDS = {
+    'position': (
+        ('lat', 'i', 1e7, False),
+        ('lon', 'i', 1e7, False),
+        ('alt_m', 'i', 100, False),
+        ('agl_m', 'i', 100, False),
+        ('_fix', 'B', 1, False),        # bit 7 = fix, bits 0-1 = fix_type
+        ('sats', 'B', 1, False),
+        ('hdop', 'H', 100, False),
+        ('vdop', 'H', 100, False),
+    ),
+    'motion': (
+        ('gs_mps', 'h', 100, False),
+        ('vs_mps', 'h', 100, False),
+        ('heading_deg', 'H', 100, True),
+        ('cog_deg', 'H', 100, True),
+        ('accel.x', 'h', 1000, False),
+        ('accel.y', 'h', 1000, False),
+        ('accel.z', 'h', 1000, False),
+        ('gyro_dps.r', 'h', 100, False),
+        ('gyro_dps.p', 'h', 100, False),
+        ('gyro_dps.y', 'h', 100, False),
+        ('att_deg.roll', 'h', 100, False),
+        ('att_deg.pitch', 'h', 100, False),
+        ('att_deg.yaw', 'H', 100, True),
+    ),
+    'environment': (
+        ('temp_ext_c', 'h', 100, False),
+        ('temp_int_c', 'h', 100, False),
+        ('pressure_hpa', 'I', 1000, False),
+        ('humidity_pct', 'H', 100, False),
+        ('baro_alt_m', 'i', 100, False),
+    ),
+    'power': (
+        ('bat_v', 'H', 1000, False),
+        ('bat_a', 'h', 1000, False),
+        ('bat_w', 'H', 100, False),
+        ('bat_pct', 'B', 1, False),
+        ('bat_temp_c', 'h', 100, False),
+    ),
+}
+
+_BODIES = {t: struct.Struct('>' + ''.join(f[1] for f in fields))
+           for t, fields in _FIELDS.items()}
+
+# Saturation range per struct code; the one raw value left out of each is
+# reserved for a missing reading (_MISSING)
+_LIMITS = {
+    'b': (-0x7F, 0x7F), 'B': (0, 0xFE),
+    'h': (-0x7FFF, 0x7FFF), 'H': (0, 0xFFFE),
+    'i': (-0x7FFFFFFF, 0x7FFFFFFF), 'I': (0, 0xFFFFFFFE),
+}
+_MISSING = {
+    'b': -0x80, 'B': 0xFF,
+    'h': -0x8000, 'H': 0xFFFF,
+    'i': -0x80000000, 'I': 0xFFFFFFFF,
+}
+
+
+def record_size(pkt_type: str) -> int:
+    """Encoded size in bytes of one record of *pkt_type*."""
+    return _HEADER.size + _BODIES[pkt_type].size
+
+
+def is_binary(payload: bytes) -> bool:
+    """True if *payload* starts with a binary record (not a JSON object)."""
+    return (len(payload) >= _HEADER.size
+            and payload[0] >> 4 == FORMAT_VERSION
+            and (payload[0] & 0x0F) in TYPE_NAMES)
+
+
+def encode_record(packet: dict) -> bytes:
+    """Pack a telemetry dict into one binary record."""
+    pkt_type = packet['type']
+    values = []
+    for path, code, scale, angle in _FIELDS[pkt_type]:
+        if path == '_fix':
+            fix_type = packet.get('fix_type', 'none')
+            code_ft = _FIX_TYPES.index(fix_type) if fix_type in _FIX_TYPES else 0
+            values.append((0x80 if packet.get('fix') else 0) | code_ft)
+            continue
+        value = _get(packet, path)
+        if math.isnan(value):
+            values.append(_MISSING[code])
+            continue
+        if angle:
+            value %= 360.0
+        lo, hi = _LIMITS[code]
+        values.append(min(hi, max(lo, int(round(value * scale)))))
+    header = _HEADER.pack((FORMAT_VERSION << 4) | TYPE_CODES[pkt_type],
+                          packet.get('seq', 0) & 0xFFFF,
+                          _time_to_ms(packet.get('t')))
+    return header + _BODIES[pkt_type].pack(*values)
+
+
+def decode_record(data: bytes, offset: int = 0, balloon_id: Optional[str] = None,
+                  mission_id: Optional[str] = None) -> Tuple[dict, int]:
+    """
+    Unpack the record at *offset* back into the telemetry dict shape.
+
+    Returns:
+        (packet dict, number of bytes consumed)
+
+    Raises:
+        ValueError: unknown version/type or truncated record
+    """
+    if len(data) - offset < _HEADER.size:
+        raise ValueError("Truncated record header")
+    ver_type, seq, t_ms = _HEADER.unpack_from(data, offset)
+    if ver_type >> 4 != FORMAT_VERSION:
+        raise ValueError(f"Unsupported record version {ver_type >> 4}")
+    pkt_type = TYPE_NAMES.get(ver_type & 0x0F)
+    if pkt_type is None:
+        raise ValueError(f"Unknown record type {ver_type & 0x0F}")
+    body = _BODIES[pkt_type]
+    start = offset + _HEADER.size
+    if len(data) - start < body.size:
+        raise ValueError(f"Truncated {pkt_type} record")
+
+    packet = {'v': 1, 'id': balloon_id, 'mid': mission_id, 'seq': seq,
+              't': _ms_to_time(t_ms), 'type': pkt_type}
+    for (path, code, scale, _), raw in zip(_FIELDS[pkt_type], body.unpack_from(data, start)):
+        if path == '_fix':
+            packet['fix'] = bool(raw & 0x80)
+            packet['fix_type'] = _FIX_TYPES[raw & 0x03] if raw & 0x03 < 3 else 'none'
+        elif raw == _MISSING[code]:
+            _set(packet, path, math.nan)
+        elif scale == 1:
+            _set(packet, path, raw)
+        else:
+            _set(packet, path, raw / scale)
+    if balloon_id is None:
+        del packet['id']
+    if mission_id is None:
+        del packet['mid']
+    return packet, _HEADER.size + body.size
+
+
+def pack_records(packets: Iterable[dict], max_payload: int = 512) -> List[bytes]:
+    """
+    Aggregate telemetry dicts into as few frame payloads as possible.
+
+    Records are encoded in order and concatenated greedily; a new payload
+    is started whenever the next record would push the current one past
+    *max_payload* bytes.  Each payload goes through ``packet_encode`` as one
+    FEC frame, so the preamble, sync word and Viterbi pass are shared by
+    every reading in it.
+    """
+    payloads = []
+    current = bytearray()
+    for packet in packets:
+        record = encode_record(packet)
+        if len(record) > max_payload:
+            raise ValueError(f"{packet['type']} record exceeds max_payload={max_payload}")
+        if len(current) + len(record) > max_payload:
+            payloads.append(bytes(current))
+            current = bytearray()
+        current += record
+    if current:
+        payloads.append(bytes(current))
+    return payloads
+
+
+def decode_payload(payload: bytes, balloon_id: Optional[str] = None,
+                   mission_id: Optional[str] = None) -> List[dict]:
+    """
+    Frame payload → telemetry dicts, in the order they were packed.
+
+    A binary payload is split into its records; a legacy UTF-8 JSON payload
+    yields its single object.
+
+    Raises:
+        ValueError: malformed record or JSON
+    """
+    if not is_binary(payload):
+        return [json.loads(payload.decode('utf-8'))]
+    packets = []
+    offset = 0
+    while offset < len(payload):
+        packet, used = decode_record(payload, offset, balloon_id, mission_id)
+        packets.append(packet)
+        offset += used
+    return packets
+
+
+def _get(packet: dict, path: str) -> float:
+    node = packet
+    for key in path.split('.'):
+        node = node[key]
+    return float(node)
+
+
+def _set(packet: dict, path: str, value):
+    keys = path.split('.')
+    node = packet
+    for key in keys[:-1]:
+        node = node.setdefault(key, {})
+    node[keys[-1]] = value
+
+
+def _time_to_ms(t: Optional[str]) -> int:
+    """'THH:MM:SS[.fff]' or a full ISO timestamp → ms since midnight UTC."""
+    if not t or 'T' not in t:
+        return 0
+    clock = t.split('T', 1)[1].rstrip('Z').split('+')[0]
+    try:
+        hh, mm, ss = clock.split(':')
+        return int(round((int(hh) * 3600 + int(mm) * 60 + float(ss)) * 1000)) % 86_400_000
+    except ValueError:
+        return 0
+
+
+def _ms_to_time(ms: int) -> str:
+    secs, msec = divmod(ms, 1000)
+    text = f"T{secs // 3600:02d}:{secs // 60 % 60:02d}:{secs % 60:02d}"
+    return f"{text}.{msec:03d}" if msec else text
+
+
+# ── Self-test ──────────────────────────────────────────────────────
+if __name__ == '__main__':
+    import sys
+
+    sample = {
+        'v': 1, 'id': 'HAB-001', 'mid': 'SIM', 'seq': 1234, 't': 'T12:34:56',
+        'type': 'position', 'lat': 38.574712, 'lon': -121.493011, 'alt_m': 18190.55,
+        'agl_m': 18180.5, 'fix': True, 'fix_type': '3d', 'sats': 14,
+        'hdop': 0.91, 'vdop': 1.32,
+    }
+    enc = encode_record(sample)
+    dec, used = decode_record(enc, balloon_id='HAB-001', mission_id='SIM')
+    ok = dec == sample and used == len(enc)
+    print(f"  {'OK' if ok else 'FAIL'}  position: JSON {len(json.dumps(sample))}B "
+          f"→ binary {len(enc)}B")
+    sys.exit(0 if ok else 1)
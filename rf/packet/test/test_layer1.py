@@ -2,11 +2,17 @@
 """
 Layer 1 — Direct Codec Unit Tests.
 
-Tests packet_codec.py encode/decode round trip with no radio involvement.
+Tests packet_codec.py and telemetry_codec.py encode/decode round trip with no radio involvement.
 """
-import sys, os
+import math, sys, os
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
-from packet_codec import packet_encode, packet_decode, encode_size_for_payload
+import numpy as np
+from packet_codec import (packet_encode, packet_decode, encode_size_for_payload,
+                          max_encoded_size_for_payload, packet_encode_telemetry, PROFILES)
+from rs_codec import rs_encode, rs_decode
+from link_constants import SYNC_WORD, SYNC_BPSK, sync_template, IncrementalCrc32
+from telemetry_codec import (encode_record, decode_record, decode_payload, record_size,
+                             pack_records)
 
 
 def test_roundtrip_sizes():
@@ -80,6 +86,158 @@ def test_size_predictions():
     return f"OK  6 sizes matched"
 
 
+def test_profiles_roundtrip():
+    """Every codec profile: size prediction, round trip, trailing noise."""
+    payload = bytes(range(60))
+    for name in PROFILES:
+        enc = packet_encode(payload, profile=name)
+        assert len(enc) == encode_size_for_payload(len(payload), name), f"{name}: size"
+        assert packet_decode(enc, profile=name) == payload, f"{name}: round trip"
+        # Receivers pass the full extraction budget; the tail is channel noise
+        noise = os.urandom(max_encoded_size_for_payload(512, name) - len(enc))
+        assert packet_decode(enc + noise, profile=name) == payload, f"{name}: oversized"
+    assert packet_encode(payload, 'r1/2') == packet_encode(payload), "default changed"
+    sizes = ", ".join(f"{n} {encode_size_for_payload(60, n)}B" for n in PROFILES)
+    return f"OK  {sizes}"
+
+
+def test_profiles_burst():
+    """A 20-bit burst kills the plain code but not the interleaved profiles (no RS)."""
+    payload = bytes(range(60))
+    for name, profile in PROFILES.items():
+        if profile.outer_rs:
+            continue
+        bits = np.unpackbits(np.frombuffer(packet_encode(payload, name), dtype=np.uint8))
+        bits[200:220] ^= 1
+        dec = packet_decode(np.packbits(bits).tobytes(), profile=name)
+        if name.endswith('-il'):
+            assert dec == payload, f"{name}: burst not corrected"
+        else:
+            assert dec is None, f"{name}: burst unexpectedly survived"
+    return "OK"
+
+
+def test_rs_codec():
+    """RS(255,223): up to 16 byte errors corrected, 17 reported uncorrectable."""
+    rng = np.random.default_rng(7)
+    for k, n_err in [(223, 16), (100, 12), (1, 16), (223, 0)]:
+        data = rng.integers(0, 256, k, dtype=np.uint8).tobytes()
+        cw = bytearray(data + rs_encode(data))
+        for i in rng.choice(len(cw), size=n_err, replace=False):
+            cw[i] ^= int(rng.integers(1, 256))
+        assert rs_decode(bytes(cw)) == (data, n_err), f"k={k}: {n_err} errors"
+    data = bytes(223)
+    cw = bytearray(data + rs_encode(data))
+    for i in range(17):
+        cw[i * 7] ^= 0x5A
+    assert rs_decode(bytes(cw)) is None, "17 errors should be uncorrectable"
+    return "OK"
+
+
+def test_rs_profile_burst():
+    """A 60-bit burst after Viterbi is fixed by the RS outer code."""
+    payload = bytes(range(60))
+    for name in ('r1/2', 'r1/2-rs', 'r3/4-rs'):
+        bits = np.unpackbits(np.frombuffer(packet_encode(payload, name), dtype=np.uint8))
+        bits[120:180] ^= 1
+        dec = packet_decode(np.packbits(bits).tobytes(), profile=name)
+        assert (dec == payload) == name.endswith('-rs'), f"{name}: unexpected result"
+    return "OK"
+
+
+def test_link_constants():
+    """Sync templates match the sync word; forked CRC equals a full CRC."""
+    import zlib
+    bits = [(SYNC_WORD >> (31 - i)) & 1 for i in range(32)]
+    assert SYNC_BPSK.tolist() == [1.0 - 2.0 * b for b in bits], "BPSK template"
+    assert not SYNC_BPSK.flags.writeable, "template should be read-only"
+    up = sync_template(4)
+    assert up is sync_template(4) and up.tolist() == np.repeat(SYNC_BPSK, 4).tolist()
+    frame = bytes(range(200))
+    crc = IncrementalCrc32(frame[:150])
+    for tail in (frame[150:], b'', b'\x01\x02'):
+        assert crc.fork(tail) == zlib.crc32(frame[:150] + tail), "fork mismatch"
+    assert crc.update(frame[150:]).fork(b'') == zlib.crc32(frame), "update mismatch"
+    return "OK"
+
+
+SAMPLE_RECORDS = [
+    {'v': 1, 'seq': 7, 't': 'T12:34:56', 'type': 'position',
+     'lat': 38.5747123, 'lon': -121.4930117, 'alt_m': 18190.55, 'agl_m': 18180.5,
+     'fix': True, 'fix_type': '3d', 'sats': 14, 'hdop': 0.91, 'vdop': 1.32},
+    {'v': 1, 'seq': 8, 't': 'T12:34:57', 'type': 'motion',
+     'gs_mps': 12.34, 'vs_mps': -5.67, 'heading_deg': 359.99, 'cog_deg': 0.5,
+     'accel': {'x': 0.012, 'y': -0.034, 'z': 9.806},
+     'gyro_dps': {'r': 1.5, 'p': -2.25, 'y': 0.0},
+     'att_deg': {'roll': -3.5, 'pitch': 4.25, 'yaw': 181.0}},
+    {'v': 1, 'seq': 9, 't': 'T23:59:59', 'type': 'environment',
+     'temp_ext_c': -56.5, 'temp_int_c': 12.25, 'pressure_hpa': 71.234,
+     'humidity_pct': 3.5, 'baro_alt_m': 18201.33},
+    {'v': 1, 'seq': 10, 't': 'T00:00:00', 'type': 'power',
+     'bat_v': 7.412, 'bat_a': -0.125, 'bat_w': 0.93, 'bat_pct': 87, 'bat_temp_c': -4.5},
+]
+
+
+def test_telemetry_roundtrip():
+    """Binary record → dict reproduces every field at its fixed-point step."""
+    for pkt in SAMPLE_RECORDS:
+        enc = encode_record(pkt)
+        assert len(enc) == record_size(pkt['type']), f"{pkt['type']}: size"
+        dec, used = decode_record(enc)
+        assert used == len(enc), f"{pkt['type']}: consumed {used}"
+        assert dec == pkt, f"{pkt['type']}: {dec} != {pkt}"
+    sizes = ", ".join(f"{p['type']} {len(encode_record(p))}B" for p in SAMPLE_RECORDS)
+    return f"OK  {sizes}"
+
+
+def test_telemetry_edges():
+    """Saturation, missing values, 16-bit seq wrap, angle wrap, ids and JSON fallback."""
+    pkt = dict(SAMPLE_RECORDS[1], seq=70_001, gs_mps=1e6, heading_deg=-90.0)
+    dec, _ = decode_record(encode_record(pkt), balloon_id='HAB-001', mission_id='M1')
+    assert dec['seq'] == 70_001 & 0xFFFF, "seq not truncated to 16 bits"
+    assert dec['gs_mps'] == 327.67, "gs_mps did not saturate"
+    assert dec['heading_deg'] == 270.0, "heading not wrapped"
+    assert (dec['id'], dec['mid']) == ('HAB-001', 'M1'), "ids not filled in"
+    # A missing reading (NaN) keeps the record; saturation never looks missing
+    pkt = dict(SAMPLE_RECORDS[2], temp_ext_c=float('nan'), temp_int_c=-1e6, humidity_pct=1e6)
+    dec, _ = decode_record(encode_record(pkt))
+    assert math.isnan(dec['temp_ext_c']), "NaN not decoded as missing"
+    assert (dec['temp_int_c'], dec['humidity_pct']) == (-327.67, 655.34), "saturation"
+    assert dec['pressure_hpa'] == SAMPLE_RECORDS[2]['pressure_hpa']
+    json_pkt = b'{"type": "position", "seq": 1}'
+    assert decode_payload(json_pkt) == [{'type': 'position', 'seq': 1}], "JSON fallback"
+    assert decode_payload(encode_record(SAMPLE_RECORDS[0])) == [SAMPLE_RECORDS[0]]
+    try:
+        decode_record(encode_record(SAMPLE_RECORDS[0])[:-1])
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("truncated record accepted")
+    return "OK"
+
+
+def test_telemetry_over_fec():
+    """Binary record through packet_encode/packet_decode."""
+    pkt = SAMPLE_RECORDS[0]
+    dec = decode_payload(packet_decode(packet_encode(encode_record(pkt))))
+    assert dec == [pkt], "record changed over FEC"
+    return f"OK  {len(packet_encode(encode_record(pkt)))}B on air"
+
+
+def test_telemetry_aggregation():
+    """Several records per frame, split at max_payload, order preserved."""
+    packets = [dict(p, seq=i) for i in range(10) for p in SAMPLE_RECORDS]
+    payloads = pack_records(packets, max_payload=100)
+    assert all(len(p) <= 100 for p in payloads), "payload over max_payload"
+    assert len(payloads) < len(packets) // 2, f"poor packing: {len(payloads)} frames"
+    frames = packet_encode_telemetry(packets, max_payload=100)
+    out = [pkt for f in frames for pkt in decode_payload(packet_decode(f, max_payload=100))]
+    assert out == packets, "aggregated round trip mismatch"
+    one_each = sum(encode_size_for_payload(len(encode_record(p))) for p in packets)
+    return (f"OK  {len(packets)} readings in {len(frames)} frames, "
+            f"{sum(map(len, frames))}B vs {one_each}B one-per-frame")
+
+
 # ── Test registry ────────────────────────────────────────
 TESTS = [
     ("round-trip sizes",    test_roundtrip_sizes),
@@ -89,6 +247,15 @@ TESTS = [
     ("max_payload reject",  test_max_payload_rejection),
     ("corruption",          test_corruption),
     ("size predictions",    test_size_predictions),
+    ("codec profiles",      test_profiles_roundtrip),
+    ("interleaved burst",   test_profiles_burst),
+    ("reed-solomon",        test_rs_codec),
+    ("RS outer code burst", test_rs_profile_burst),
+    ("link constants",      test_link_constants),
+    ("telemetry records",   test_telemetry_roundtrip),
+    ("telemetry edges",     test_telemetry_edges),
+    ("telemetry over FEC",  test_telemetry_over_fec),
+    ("telemetry packing",   test_telemetry_aggregation),
 ]
 
 